@@ -0,0 +1,298 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard  # optional: smaller and faster than zlib when installed
+except ImportError:
+    zstandard = None
+
+import telemetry
+
+# Report Artifact Store
+# Per-document results of the expensive, deterministic stages - cleaned text
+# (compressed), GRI analysis and the company name Claude identified - keyed by the
+# report's content hash and a version hash of the code that produced them. A report
+# seen before skips download, extraction, analysis and the company lookup; changing
+# that code changes the version, so old entries are never read again. Every worker
+# records when it last ran its version; a version no worker has run for
+# ARTIFACT_RETIRE_DAYS (or one retired with `flask prune-artifacts`) is retired and
+# its entries are deleted, so old and new workers of a rolling deploy keep each
+# other's artifacts. The GRI analysis is versioned separately: each entry keeps its
+# phrase hit table and the fingerprints of the standards it was computed with, so a
+# standards edit only rescans the phrases of the standards that changed.
+
+ARTIFACT_DB = os.getenv("ARTIFACT_DB", "artifacts.sqlite3")
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_MB", "200")) * 1024 * 1024   # compressed text
+# A code version no worker has started or written with for this long is retired
+ARTIFACT_RETIRE_SECONDS = float(os.getenv("ARTIFACT_RETIRE_DAYS", "7")) * 24 * 3600
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+
+
+def compress(text):
+    """(codec, bytes) for a text, with zstd where available"""
+    data = text.encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return 'zlib', zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(codec, blob):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("Artifact was stored with zstd, which is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob).decode('utf-8')
+    if codec == 'zlib':
+        return zlib.decompress(blob).decode('utf-8')
+    raise ValueError(f"Unknown codec {codec}")
+
+
+class ArtifactStore:
+    def __init__(self, db_path=ARTIFACT_DB, max_bytes=ARTIFACT_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()     # one SQLite connection per thread
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                doc_key TEXT NOT NULL,
+                version TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                text BLOB NOT NULL,
+                chars INTEGER NOT NULL,
+                analysis TEXT NOT NULL,
+                company_name TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits TEXT NOT NULL DEFAULT '{}',
+                fingerprints TEXT NOT NULL DEFAULT '{}',
+                standards TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (doc_key, version)
+            )
+        """)
+        # Stores created before analyses were versioned: their entries read as stale
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(artifacts)")}
+        for column, definition in [('hits', "TEXT NOT NULL DEFAULT '{}'"),
+                                   ('fingerprints', "TEXT NOT NULL DEFAULT '{}'"),
+                                   ('standards', "TEXT NOT NULL DEFAULT ''")]:
+            if column not in columns:
+                conn.execute(f"ALTER TABLE artifacts ADD COLUMN {column} {definition}")
+        conn.execute("CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts (last_used)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS versions (
+                version TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL,
+                retired INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        # Reopen after a fork: SQLite connections must not cross processes
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, doc_key, version, touch=True):
+        """
+        The stored artifacts for a document, or None.
+
+        Args:
+            touch: Count the lookup as a use (for eviction and /metrics)
+
+        Returns:
+            dict with 'text' (cleaned), 'analysis', 'company_name' (None if not identified
+            yet) and the analysis inputs: 'hits' (phrase -> [start, end]), 'fingerprints'
+            (code -> fingerprint) and 'standards' (fingerprint of the whole database)
+        """
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT codec, text, analysis, company_name, hits, fingerprints, standards FROM artifacts "
+            "WHERE doc_key = ? AND version = ?",
+            (doc_key, version)
+        ).fetchone()
+        if row is None:
+            if touch:
+                telemetry.ARTIFACT_REQUESTS.inc(result='miss')
+            return None
+        try:
+            text = decompress(row[0], row[1])
+        except (ValueError, zlib.error) as e:
+            print(f"⚠️ Unreadable artifact for {doc_key} ({e}), rebuilding it")
+            if touch:
+                telemetry.ARTIFACT_REQUESTS.inc(result='miss')
+            return None
+        if touch:
+            conn.execute("UPDATE artifacts SET last_used = ? WHERE doc_key = ? AND version = ?",
+                         (time.time(), doc_key, version))
+            telemetry.ARTIFACT_REQUESTS.inc(result='hit')
+        return {
+            'text': text,
+            'analysis': json.loads(row[2]),
+            'company_name': row[3],
+            'hits': json.loads(row[4]),
+            'fingerprints': json.loads(row[5]),
+            'standards': row[6]
+        }
+
+    def put(self, doc_key, version, text, analysis, hits, fingerprints, standards, company_name=None):
+        """
+        Store (or replace) a document's cleaned text and GRI analysis.
+
+        Args:
+            hits, fingerprints, standards: What the analysis was computed from (see get())
+        """
+        codec, blob = compress(text)
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts (doc_key, version, codec, text, chars, analysis, "
+                "company_name, created_at, last_used, hits, fingerprints, standards) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_key, version, codec, blob, len(text), json.dumps(analysis), company_name, now, now,
+                 json.dumps(hits), json.dumps(fingerprints), standards)
+            )
+            self._touch_version(conn, version, now)
+            self._evict(conn, keep=(doc_key, version))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stale_analyses(self, version, standards):
+        """Keys of this version's documents analyzed against another standards database"""
+        return [row[0] for row in self._conn().execute(
+            "SELECT doc_key FROM artifacts WHERE version = ? AND standards != ?", (version, standards)
+        )]
+
+    def update_analyses(self, version, updates):
+        """
+        Replace the analyses of many documents in one transaction.
+
+        Args:
+            updates: List of (doc_key, analysis, hits, fingerprints, standards)
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE artifacts SET analysis = ?, hits = ?, fingerprints = ?, standards = ? "
+                "WHERE doc_key = ? AND version = ?",
+                [(json.dumps(analysis), json.dumps(hits), json.dumps(fingerprints), standards, doc_key, version)
+                 for doc_key, analysis, hits, fingerprints, standards in updates]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def set_company(self, doc_key, version, company_name):
+        """Record the company Claude identified for a stored document"""
+        self._conn().execute(
+            "UPDATE artifacts SET company_name = ? WHERE doc_key = ? AND version = ?",
+            (company_name, doc_key, version)
+        )
+
+    def _evict(self, conn, keep=None):
+        """
+        Drop least recently used entries until the stored text fits in max_bytes.
+        `keep` (doc_key, version) is never dropped, even if it alone is over the budget.
+        """
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(text)), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for doc_key, version, size in conn.execute(
+                "SELECT doc_key, version, LENGTH(text) FROM artifacts ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            if (doc_key, version) == keep:
+                continue
+            conn.execute("DELETE FROM artifacts WHERE doc_key = ? AND version = ?", (doc_key, version))
+            total -= size
+
+    def _touch_version(self, conn, version, now):
+        """Record that a worker runs `version` (un-retiring it if an old worker is still up)"""
+        conn.execute(
+            "INSERT INTO versions (version, last_seen) VALUES (?, ?) "
+            "ON CONFLICT (version) DO UPDATE SET last_seen = excluded.last_seen, retired = 0",
+            (version, now)
+        )
+
+    def retire(self, version=None, keep=None):
+        """
+        Mark versions retired so prune() deletes their entries.
+
+        Args:
+            version: Retire this version
+            keep: Retire every version except this one (once a deploy has finished)
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Versions written before the versions table existed have no row yet
+            conn.execute("INSERT OR IGNORE INTO versions (version, last_seen) "
+                         "SELECT DISTINCT version, ? FROM artifacts", (time.time(),))
+            if version is not None:
+                conn.execute("INSERT OR IGNORE INTO versions (version, last_seen) VALUES (?, ?)",
+                             (version, time.time()))
+                conn.execute("UPDATE versions SET retired = 1 WHERE version = ?", (version,))
+            if keep is not None:
+                conn.execute("UPDATE versions SET retired = 1 WHERE version != ?", (keep,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def prune(self, version, retire_after=ARTIFACT_RETIRE_SECONDS):
+        """
+        Record that `version` is running, retire versions no worker has run for
+        `retire_after` seconds, and delete the entries of retired versions.
+
+        Returns:
+            How many entries were removed
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._touch_version(conn, version, now)
+            # Versions written before the versions table existed start their clock now
+            conn.execute("INSERT OR IGNORE INTO versions (version, last_seen) "
+                         "SELECT DISTINCT version, ? FROM artifacts", (now,))
+            conn.execute("UPDATE versions SET retired = 1 WHERE last_seen < ? AND version != ?",
+                         (now - retire_after, version))
+            removed = conn.execute(
+                "DELETE FROM artifacts WHERE version IN (SELECT version FROM versions WHERE retired = 1)"
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def stats(self):
+        row = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0), COALESCE(SUM(chars), 0) FROM artifacts"
+        ).fetchone()
+        return {
+            'entries': row[0],
+            'bytes': row[1],
+            'text_chars': row[2],
+            'max_bytes': self.max_bytes,
+            'codec': 'zstd' if zstandard is not None else 'zlib'
+        }
+
+    def clear(self):
+        self._conn().execute("DELETE FROM artifacts")
+        self._conn().execute("DELETE FROM versions")
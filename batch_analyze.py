@@ -0,0 +1,265 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from gri_matcher import STANDARDS
+from pdf_text import _mp_context
+
+# Batch Report Analysis
+# Runs the report pipeline without the game: download -> extract -> clean_text ->
+# GRI compliance analysis -> metric extraction, for a whole directory or URL list,
+# one report per worker process. Only a few reports are in flight at once, so
+# memory stays bounded however long the list is. Every finished report is appended
+# to the output as one JSONL record and flushed; the output doubles as the
+# checkpoint, so after a crash the same command skips what is already done. Local
+# PDFs are hashed and read in place; only URLs go through the PDF cache. Recycling
+# workers (BATCH_TASKS_PER_WORKER) needs Python 3.11+; older versions keep them.
+#
+#     python -m batch_analyze reports/ urls.txt --output results.jsonl --workers 8
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+# Reports submitted to the pool at once (each holds one report's text in a worker)
+BATCH_MAX_IN_FLIGHT = int(os.getenv("BATCH_MAX_IN_FLIGHT", "0")) or None    # default: 2 per worker
+# Restart a worker after this many reports, returning whatever pypdf left allocated
+BATCH_TASKS_PER_WORKER = int(os.getenv("BATCH_TASKS_PER_WORKER", "50"))
+# ProcessPoolExecutor(max_tasks_per_child=...) was added in Python 3.11
+RECYCLES_WORKERS = sys.version_info >= (3, 11)
+PROGRESS_INTERVAL_SECONDS = 5
+
+# Every unit a standard requires, searched for numbers by PDFScraper.extract_metrics
+REQUIRED_METRICS = sorted({metric for standard in STANDARDS.values() for metric in standard['required_metrics']})
+
+
+def list_sources(args):
+    """
+    Reports named on the command line, in order and without duplicates.
+
+    Args:
+        args: Directories (every *.pdf below them), .txt files (one URL or path per
+              line, # for comments) and single URLs or PDF paths
+    """
+    sources = []
+    for arg in args:
+        if os.path.isdir(arg):
+            for root, dirs, files in os.walk(arg):
+                dirs.sort()
+                sources.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith('.pdf'))
+        elif arg.lower().endswith('.txt') and os.path.isfile(arg):
+            with open(arg, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        sources.append(line)
+        else:
+            sources.append(arg)
+    return list(dict.fromkeys(sources))
+
+
+def load_checkpoint(output_path):
+    """
+    Records already written to the output, by source. A line cut short by a crash is
+    truncated away so appending continues from the last complete record.
+    """
+    done = {}
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'rb+') as f:
+        good_end = 0
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b'\n'):
+                break
+            done[record['source']] = record
+            good_end += len(line)
+        if good_end < f.seek(0, os.SEEK_END):
+            print(f"⚠️ Dropping an incomplete record at the end of {output_path}", file=sys.stderr)
+            f.truncate(good_end)
+    return done
+
+
+def analyze_report(source, max_pages):
+    """
+    Worker: run one report through the pipeline.
+
+    Returns:
+        JSON-able record; failures are recorded with 'error' instead of raised
+    """
+    # Imported in the worker: the parent only schedules and writes records
+    import pdfile
+    from gri_analysis import analyze_text
+    from pdf_cache import file_sha256
+    from pdf_text import document_key, iter_page_texts, iter_source_pages, join_pages
+    from metric_extraction import totals_by_unit
+
+    started = time.perf_counter()
+    record = {'source': source}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper = pdfile.PDFScraper()
+            if os.path.isfile(source):
+                # Hashed and read in place: copying every input into the PDF cache would duplicate it
+                record['doc_key'] = file_sha256(source)
+                pages = iter_page_texts(source, max_pages=max_pages, workers=1)
+            else:
+                record['doc_key'] = document_key(source, max_pages)
+                pages = iter_source_pages(source, max_pages=max_pages, workers=1)
+            page_texts = [text for _, text in pages]
+            record['pages'] = len(page_texts)
+            cleaned = scraper.clean_text(join_pages(page_texts))
+            del page_texts
+            record['chars'] = len(cleaned)
+            analysis, _ = analyze_text(cleaned, verbose=False)
+            metrics = scraper.extract_metrics(cleaned, REQUIRED_METRICS)
+            table = scraper.extract_metric_table(cleaned)
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+        record['seconds'] = round(time.perf_counter() - started, 3)
+        return record
+
+    metric_counts = {}
+    for metric in metrics:
+        metric_counts[metric['metric']] = metric_counts.get(metric['metric'], 0) + 1
+    record.update({
+        'missing_standards': [item['code'] for item in analysis['missing_standards']],
+        'misleading_content': [{'code': item['code'], 'reason': item['reason']}
+                               for item in analysis['misleading_content']],
+        'compliant_standards': [item['code'] for item in analysis['compliant_standards']],
+        'metric_sentences': metric_counts,
+        'figures': len(table['value']),
+        'totals_by_unit': totals_by_unit(table),
+        'seconds': round(time.perf_counter() - started, 3)
+    })
+    return record
+
+
+class Progress:
+    """Throughput over the reports finished in this run"""
+
+    def __init__(self, total, already_done):
+        self.total = total
+        self.done = already_done
+        self.reports = 0
+        self.pages = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.last_print = 0.0
+
+    def add(self, record):
+        self.done += 1
+        self.reports += 1
+        self.pages += record.get('pages', 0)
+        self.errors += 'error' in record
+
+    def line(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (f"[{self.done}/{self.total}] {self.reports / elapsed * 60:.1f} reports/min, "
+                f"{self.pages / elapsed:.1f} pages/sec, {self.errors} errors")
+
+    def maybe_print(self, force=False):
+        now = time.perf_counter()
+        if force or now - self.last_print >= PROGRESS_INTERVAL_SECONDS:
+            print(self.line(), file=sys.stderr, flush=True)
+            self.last_print = now
+
+
+def run_batch(sources, output_path, workers=BATCH_WORKERS, max_in_flight=BATCH_MAX_IN_FLIGHT,
+              max_pages=None, retry_failed=False):
+    """
+    Analyze every source not already in the output and append a record for each.
+
+    Args:
+        workers: Worker processes
+        max_in_flight: Reports submitted at once (default: 2 per worker)
+        max_pages: Only read the first N pages of each report
+        retry_failed: Run sources whose previous record is an error again
+
+    Returns:
+        The Progress of this run
+    """
+    done = load_checkpoint(output_path)
+    pending = deque(source for source in sources
+                    if source not in done or (retry_failed and 'error' in done[source]))
+    progress = Progress(len(sources), len(sources) - len(pending))
+    if not pending:
+        print(f"✅ All {len(sources)} reports are already in {output_path}", file=sys.stderr)
+        return progress
+    print(f"📚 {len(pending)} reports to analyze ({progress.done} already in {output_path}), "
+          f"{workers} workers", file=sys.stderr)
+
+    max_in_flight = max_in_flight or 2 * workers
+    pool_options = {'max_tasks_per_child': BATCH_TASKS_PER_WORKER} if RECYCLES_WORKERS else {}
+    if not RECYCLES_WORKERS:
+        print(f"⚠️ Python {sys.version_info.major}.{sys.version_info.minor} can't recycle workers "
+              f"(needs 3.11+); each worker runs until the batch ends", file=sys.stderr)
+    # Sources running when the pool broke; a second break with one of them in flight marks it failed
+    suspects = set()
+    with open(output_path, 'a', encoding='utf-8') as out:
+        while pending:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context(), **pool_options)
+            in_flight = {}
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < max_in_flight:
+                        source = pending.popleft()
+                        in_flight[executor.submit(analyze_report, source, max_pages)] = source
+                    finished, _ = wait(in_flight, timeout=PROGRESS_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record = future.result()
+                        del in_flight[future]
+                        out.write(json.dumps(record) + "\n")
+                        out.flush()
+                        progress.add(record)
+                    progress.maybe_print()
+            except BrokenProcessPool:
+                # A worker died (killed, out of memory, segfault in a parser): retry what was running
+                print("⚠️ A worker process died, restarting the pool", file=sys.stderr)
+                for future, source in in_flight.items():
+                    if source in suspects:
+                        record = {'source': source, 'error': "BrokenProcessPool: worker died twice"}
+                        out.write(json.dumps(record) + "\n")
+                        out.flush()
+                        progress.add(record)
+                    else:
+                        suspects.add(source)
+                        pending.appendleft(source)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+    progress.maybe_print(force=True)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m batch_analyze',
+        description="Analyze many sustainability reports against the GRI standards, one JSONL record each."
+    )
+    parser.add_argument('sources', nargs='+', help='directories of PDFs, .txt lists of URLs/paths, or single reports')
+    parser.add_argument('--output', '-o', default='batch_results.jsonl', help='JSONL output, also the checkpoint')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS)
+    parser.add_argument('--max-in-flight', type=int, default=BATCH_MAX_IN_FLIGHT,
+                        help='reports submitted at once (default: 2 per worker)')
+    parser.add_argument('--max-pages', type=int, default=None, help='only read the first N pages of each report')
+    parser.add_argument('--retry-failed', action='store_true', help='run reports that failed last time again')
+    args = parser.parse_args(argv)
+
+    sources = list_sources(args.sources)
+    if not sources:
+        parser.error("no reports found")
+    progress = run_batch(sources, args.output, workers=max(1, args.workers), max_in_flight=args.max_in_flight,
+                         max_pages=args.max_pages, retry_failed=args.retry_failed)
+    print(f"✅ Analyzed {progress.reports} reports ({progress.pages} pages, {progress.errors} errors) "
+          f"in {time.perf_counter() - progress.started:.1f}s -> {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
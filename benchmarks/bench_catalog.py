@@ -0,0 +1,124 @@
+"""
+Benchmark: loading a large standards catalog, compiled vs memory-mapped.
+
+Generates GRI-, SASB- and ESRS-style catalog files with about --phrases
+phrases in total, then times building the matcher from the JSON (what every
+worker would pay without the artifact), the first load that also writes the
+artifact, and later loads that map it. The mapped matcher must find the same
+hits as the freshly built one on a synthetic report; its first scan (which
+also builds the report's token index) and a warm scan are timed as well:
+
+    python benchmarks/bench_catalog.py --phrases 10000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from standards_catalog import compile_catalog, load_catalog
+
+WORDS = ("energy emissions water waste scope intensity consumption renewable hazardous governance board "
+         "employees injuries training diversity community supplier biodiversity land effluent climate risk "
+         "transition physical methane fuel recycling landfill wages benefits turnover safety rights data "
+         "privacy product lifecycle materials packaging sourcing revenue capital tax ethics").split()
+UNITS = ["tonnes", "mwh", "gigajoules", "cubic meters", "hectares", "percentage", "hours", "ratio"]
+FRAMEWORKS = [('GRI', 'GRI 2-{n}', 0.4), ('SASB', 'SASB {n:04d}a.1', 0.3), ('ESRS', 'ESRS E{n}', 0.3)]
+
+
+def synthetic_catalogs(directory, phrases, rng):
+    """Writes one catalog file per framework; returns their paths"""
+    keywords_per_standard = 8     # plus two required metrics shared across standards
+    standards = phrases // keywords_per_standard
+    paths = []
+    for framework, pattern, share in FRAMEWORKS:
+        entries = {}
+        for n in range(int(standards * share)):
+            keywords = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))) + f' {framework.lower()}{n}k{i}'
+                        for i in range(keywords_per_standard)]
+            entries[pattern.format(n=n)] = {
+                'title': f"{framework} disclosure {n}",
+                'keywords': keywords,
+                'required_metrics': rng.sample(UNITS, 2)
+            }
+        data = {'framework': framework, 'standards': entries}
+        if framework == 'GRI':
+            data['bias_words'] = ["proud", "committed", "world-class", "journey", "industry-leading"]
+        path = os.path.join(directory, f"{framework.lower()}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        paths.append(path)
+    return paths
+
+
+def synthetic_text(catalog, chars, rng):
+    phrases = catalog.matcher.phrases
+    parts = []
+    size = 0
+    while size < chars:
+        part = rng.choice(phrases) if rng.random() < 0.1 else rng.choice(WORDS)
+        parts.append(part)
+        size += len(part) + 1
+    return ' '.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--phrases', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--text-chars', type=int, default=250_000)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = synthetic_catalogs(workdir, args.phrases, rng)
+        spec = os.pathsep.join(paths)
+        cache_dir = os.path.join(workdir, 'cache')
+
+        documents = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                documents.append((path, json.load(f)))
+        started = time.perf_counter()
+        meta, built = compile_catalog(documents)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_catalog(spec, cache_dir)
+        first_seconds = time.perf_counter() - started
+
+        loads = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            catalog = load_catalog(spec, cache_dir)
+            loads.append(time.perf_counter() - started)
+
+        text = synthetic_text(catalog, args.text_chars, rng)
+        started = time.perf_counter()
+        mapped_hits = catalog.matcher.scan(text)
+        cold_scan = time.perf_counter() - started
+        started = time.perf_counter()
+        catalog.matcher.scan(text)
+        warm_scan = time.perf_counter() - started
+        built_hits = built.scan(text)
+        artifact_mb = os.path.getsize(catalog.artifact_path) / 1e6
+
+    print(f"{len(meta['standards'])} standards, {len(meta['phrases']):,} phrases, "
+          f"{len(built.vocabulary):,} distinct tokens, artifact {artifact_mb:.1f} MB")
+    print(f"build from JSON      {build_seconds * 1000:9.1f} ms")
+    print(f"first load (+write)  {first_seconds * 1000:9.1f} ms")
+    print(f"mapped load          {statistics.median(loads) * 1000:9.1f} ms (median of {args.repeat})")
+    print(f"scan {len(text):,} chars: first {cold_scan * 1000:.1f} ms, warm {warm_scan * 1000:.1f} ms, "
+          f"{len(mapped_hits):,} hits, identical to built matcher: {mapped_hits == built_hits}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: prompt context selection, prefix vs BM25-ranked.
+
+Synthetic reports open with a few pages of front matter (no GRI content), as
+real ones do. Each Claude call of the pipeline (company, words, combined, word
+bank) is made against the local fake Anthropic endpoint, once with
+CONTEXT_MODE=prefix and once with CONTEXT_MODE=ranked. The fake charges
+--llm-per-kchar seconds per 1000 prompt chars on top of --llm-latency, so prompt
+size shows up as time-to-response. Reports prompt chars, the share of sentences
+sent that mention a GRI keyword, metric or bias word, context build time and
+response time per call:
+
+    python benchmarks/bench_context.py --pages 10 50 --llm-per-kchar 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import configure_environment
+from fixtures import FakeAnthropicServer, synthetic_report_pdf
+
+MODES = ['prefix', 'ranked']
+
+
+def report_text(app_main, pages, front_matter_pages):
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(synthetic_report_pdf(pages, seed=pages, front_matter_pages=front_matter_pages)))
+    return app_main.PDFScraper().clean_text(app_main.join_pages(page.extract_text() or "" for page in reader.pages))
+
+
+def relevant_share(context):
+    """Fraction of context sentences that contain any query phrase"""
+    import numpy as np
+    from report_index import get_report_index
+    from context_builder import GRI_MATCHER, sentence_ids
+    index = get_report_index(context)
+    if not index.sentence_count:
+        return 0.0
+    sentences = sentence_ids(index, GRI_MATCHER.hits(index)[1])
+    return len(np.unique(sentences[sentences >= 0])) / index.sentence_count
+
+
+def run_calls(app_main, text, analysis, llm, repeat):
+    """Prompt size, relevance and timings for each call (medians over `repeat` runs)"""
+    calls = {
+        'company': (lambda: app_main.extract_company_name(text),
+                    app_main.COMPANY_CONTEXT_CHARS, app_main.COMPANY_CONTEXT_TOKENS),
+        'words': (lambda: app_main.generate_words_from_pdf(text, "Acme Holdings", analysis, count=5),
+                  app_main.WORDS_CONTEXT_CHARS, app_main.WORDS_CONTEXT_TOKENS),
+        'combined': (lambda: app_main.generate_game_content(text, analysis, count=5),
+                     app_main.COMPANY_CONTEXT_CHARS, app_main.WORDS_CONTEXT_TOKENS),
+        'word_bank': (lambda: app_main.generate_word_bank(text, analysis),
+                      app_main.COMPANY_CONTEXT_CHARS, app_main.WORD_BANK_CONTEXT_TOKENS),
+    }
+    import context_builder
+    results = {}
+    for call, (fn, max_chars, max_tokens) in calls.items():
+        build, response, prompt = [], [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            context = context_builder.prompt_context(text, max_chars, max_tokens)
+            build.append(time.perf_counter() - started)
+            before = llm.prompt_chars
+            started = time.perf_counter()
+            fn()
+            response.append(time.perf_counter() - started)
+            prompt.append(llm.prompt_chars - before)
+        results[call] = {
+            'context_chars': len(context),
+            'prompt_chars': statistics.median(prompt),
+            'relevant_share': relevant_share(context),
+            'build_ms': statistics.median(build) * 1000,
+            'response_ms': statistics.median(response) * 1000,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--front-matter', type=int, default=3, help='boilerplate pages after the cover')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='seconds per fake LLM call')
+    parser.add_argument('--llm-per-kchar', type=float, default=0.05, help='extra seconds per 1000 prompt chars')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir, \
+            FakeAnthropicServer(latency=args.llm_latency, per_kchar=args.llm_per_kchar) as llm:
+        configure_environment(workdir, llm.url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import main as app_main
+        import context_builder
+        app_main.get_client()
+
+        for pages in args.pages:
+            with contextlib.redirect_stdout(io.StringIO()):
+                text = report_text(app_main, pages, min(args.front_matter, pages - 1))
+                analysis = app_main.PDFScraper().analyze_gri_compliance(text)
+            print(f"\n{pages} pages ({len(text):,} chars of text)")
+            by_mode = {}
+            for mode in MODES:
+                context_builder.CONTEXT_MODE = mode
+                with contextlib.redirect_stdout(io.StringIO()):
+                    by_mode[mode] = run_calls(app_main, text, analysis, llm, args.repeat)
+            for call in by_mode[MODES[0]]:
+                for mode in MODES:
+                    r = by_mode[mode][call]
+                    print(f"  {call:<10} {mode:<7} prompt {r['prompt_chars']:>7,.0f} chars   "
+                          f"relevant {r['relevant_share']:>4.0%}   build {r['build_ms']:6.1f} ms   "
+                          f"response {r['response_ms']:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
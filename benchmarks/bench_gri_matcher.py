@@ -0,0 +1,99 @@
+"""
+Benchmark: token n-gram matcher vs phrase automaton vs one substring scan per phrase.
+
+Scans a synthetic ~250k char report with growing pattern sets (the real
+GRI database, then generated phrases up to several thousand) and reports
+build and scan times. The n-gram matcher scans the report's cached token
+index (built once per report, timed separately); the last column counts
+phrases the substring scans find only inside longer words. Run from the
+repo root:
+
+    python benchmarks/bench_gri_matcher.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from GRI_STANDARDS_DATABASE import GRI_STANDARDS, BIAS_FLUFF_WORDS
+from phrase_matcher import NgramMatcher
+from phrase_automaton import PhraseMatcher
+from report_index import ReportIndex, get_report_index
+
+PATTERN_COUNTS = [100, 500, 1000, 2500, 5000]
+TEXT_CHARS = 250_000
+
+
+def gri_phrases():
+    phrases = []
+    for standard in GRI_STANDARDS.values():
+        phrases.extend(standard['keywords'] + standard['required_metrics'])
+    phrases.extend(BIAS_FLUFF_WORDS)
+    return sorted({p.lower() for p in phrases})
+
+
+def synthetic_phrases(count, vocab, rng):
+    """Two/three word phrases built from the report vocabulary (some will hit)"""
+    phrases = set(gri_phrases())
+    while len(phrases) < count:
+        phrases.add(' '.join(rng.choice(vocab) for _ in range(rng.randint(2, 3))))
+    return sorted(phrases)[:count]
+
+
+def synthetic_report(rng):
+    vocab = sorted({w for p in gri_phrases() for w in p.split()})
+    vocab += ['the', 'company', 'reported', 'total', 'annual', 'our', 'in', 'and', 'of', '2024', 'sites']
+    words = []
+    size = 0
+    while size < TEXT_CHARS:
+        word = rng.choice(vocab)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words), vocab
+
+
+def naive_scan(text, phrases):
+    return [p for p in phrases if p in text]
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rng = random.Random(42)
+    text, vocab = synthetic_report(rng)
+
+    sets = [('GRI database', gri_phrases())]
+    sets += [(f'{n} phrases', synthetic_phrases(n, vocab, rng)) for n in PATTERN_COUNTS]
+
+    index_time, _ = timed(ReportIndex, text)
+    index = get_report_index(text)
+    index.token_arrays()
+    print(f"Report: {len(text):,} chars, token index {index_time * 1000:.1f} ms\n")
+    print(f"{'pattern set':<16}{'patterns':>9}{'build ms':>10}{'n-gram ms':>11}{'automaton ms':>14}"
+          f"{'substring ms':>14}{'inside words':>14}")
+    for name, phrases in sets:
+        build_time, matcher = timed(PhraseMatcher, phrases, repeat=1)
+        _, ngram = timed(NgramMatcher, phrases, repeat=1)
+        ngram_time, counts = timed(ngram.counts, index)
+        scan_time, hits = timed(matcher.scan, text)
+        naive_time, found = timed(naive_scan, text, phrases)
+        # The automaton finds substrings like str.find; n-gram hits are the whole-word subset
+        assert {matcher.phrases[h[0]] for h in hits} == set(found)
+        whole_words = {phrases[i] for i in counts.nonzero()[0]}
+        assert whole_words <= set(found)
+        print(f"{name:<16}{len(phrases):>9}{build_time * 1000:>10.1f}{ngram_time * 1000:>11.1f}"
+              f"{scan_time * 1000:>14.1f}{naive_time * 1000:>14.1f}{len(found) - len(whole_words):>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Benchmark: the full game generation pipeline, offline.
+
+Synthetic sustainability reports (10/50/300 pages by default) are served by a
+local HTTP server, and a local fake of the Anthropic messages endpoint answers
+the LLM calls after a configurable delay. Each stage is timed separately, and
+/new-game is timed end to end both cold (nothing cached, no word bank) and with
+a warm word bank. Results are written as JSON so runs can be compared:
+
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --compare bench.json   # exit 1 on regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import ReportServer, FakeAnthropicServer, synthetic_report_pdf
+
+
+def configure_environment(workdir, llm_url):
+    """Point every store and client at throwaway local resources (before importing main)"""
+    os.environ.update({
+        'ANTHROPIC_API_KEY': 'offline-benchmark',
+        'ANTHROPIC_BASE_URL': llm_url,
+        'PDF_CACHE_DIR': os.path.join(workdir, 'pdf_cache'),
+        'GAME_POOL_DB': os.path.join(workdir, 'game_pool.sqlite3'),
+        'WORD_BANK_DB': os.path.join(workdir, 'word_bank.sqlite3'),
+        'GAME_STATE_DB': os.path.join(workdir, 'game_state.sqlite3'),
+        'ARTIFACT_DB': os.path.join(workdir, 'artifacts.sqlite3'),
+        'PRELOADER_ENABLED': '0',
+    })
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def summarize(samples):
+    return {
+        'median_ms': statistics.median(samples) * 1000,
+        'min_ms': min(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+        'runs': len(samples)
+    }
+
+
+def run_once(app_main, url, timings):
+    """One pass over every stage for one report; appends seconds to timings[stage]"""
+    from pdf_cache import get_pdf_cache
+    from grid_engine import build_grid
+
+    cache = get_pdf_cache()
+    scraper = app_main.PDFScraper()
+
+    cache.clear()
+    seconds, _ = timed(cache.fetch, url)
+    timings.setdefault('download', []).append(seconds)
+
+    seconds, pages = timed(lambda: [text for _, text in scraper.iter_pages(url)])
+    timings.setdefault('extract_text', []).append(seconds)
+    text = app_main.join_pages(pages)
+
+    seconds, cleaned = timed(scraper.clean_text, text)
+    timings.setdefault('clean_text', []).append(seconds)
+
+    seconds, analysis = timed(scraper.analyze_gri_compliance, cleaned)
+    timings.setdefault('analyze_gri_compliance', []).append(seconds)
+
+    seconds, company = timed(app_main.extract_company_name, cleaned)
+    timings.setdefault('llm_extract_company_name', []).append(seconds)
+
+    seconds, (words, _) = timed(app_main.generate_words_from_pdf, cleaned, company, analysis, count=5)
+    timings.setdefault('llm_generate_words', []).append(seconds)
+
+    seconds, _ = timed(app_main.generate_game_content, cleaned, analysis, count=5)
+    timings.setdefault('llm_combined', []).append(seconds)
+
+    seconds, _ = timed(build_grid, words)
+    timings.setdefault('build_grid', []).append(seconds)
+
+    client = app_main.app.test_client()
+    app_main.PDF_URLS[:] = [url]
+
+    # Cold: no cached PDF, no stored artifacts, no word bank, empty pool -> full on-demand generation
+    cache.clear()
+    app_main.artifact_store.clear()
+    app_main.WORD_BANK_ENABLED = False
+    seconds, response = timed(client.get, '/new-game')
+    assert response.status_code == 200, response.data
+    timings.setdefault('new_game_cold', []).append(seconds)
+
+    # Repeat report: text, analysis and company come from the artifact store
+    seconds, response = timed(client.get, '/new-game')
+    assert response.status_code == 200, response.data
+    timings.setdefault('new_game_repeat_report', []).append(seconds)
+
+    # Warm word bank: first call fills it, the timed one samples locally
+    app_main.WORD_BANK_ENABLED = True
+    client.get('/new-game')
+    seconds, response = timed(client.get, '/new-game')
+    assert response.status_code == 200, response.data
+    timings.setdefault('new_game_warm_bank', []).append(seconds)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    files = {f"report-{pages}.pdf": synthetic_report_pdf(pages, seed=pages) for pages in args.pages}
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir, \
+            ReportServer(files) as reports, \
+            FakeAnthropicServer(latency=args.llm_latency, per_kchar=args.llm_per_kchar) as llm:
+        configure_environment(workdir, llm.url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import main as app_main
+        # Load the lazily imported libraries up front so the first run doesn't pay for them
+        app_main.get_client()
+        import pypdf, requests  # noqa: F401
+
+        for pages in args.pages:
+            url = f"{reports.url}/report-{pages}.pdf"
+            timings = {}
+            for _ in range(args.repeat):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run_once(app_main, url, timings)
+            results[str(pages)] = {stage: summarize(samples) for stage, samples in timings.items()}
+            results[str(pages)]['pdf_bytes'] = len(files[f"report-{pages}.pdf"])
+            print(f"  {pages:>4} pages done", file=sys.stderr)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+        },
+        'config': {
+            'pages': args.pages,
+            'repeat': args.repeat,
+            'llm_latency': args.llm_latency,
+            'llm_per_kchar': args.llm_per_kchar,
+        },
+        'results': results
+    }
+
+
+def print_report(report):
+    for pages, stages in report['results'].items():
+        print(f"\n{pages} pages ({stages['pdf_bytes']:,} bytes)")
+        for stage, summary in stages.items():
+            if stage == 'pdf_bytes':
+                continue
+            print(f"  {stage:<28}{summary['median_ms']:>10.1f} ms  "
+                  f"(min {summary['min_ms']:.1f}, max {summary['max_ms']:.1f})")
+
+
+def compare(old, new, threshold, min_ms):
+    """Print median changes; returns True if any stage regressed beyond the threshold"""
+    regressed = False
+    print(f"\nComparing against {old['meta'].get('commit')} ({old['meta'].get('timestamp')})")
+    for pages, stages in new['results'].items():
+        old_stages = old['results'].get(pages, {})
+        for stage, summary in stages.items():
+            if stage == 'pdf_bytes' or stage not in old_stages:
+                continue
+            before = old_stages[stage]['median_ms']
+            after = summary['median_ms']
+            change = (after - before) / before if before else 0.0
+            flag = ''
+            if change > threshold and after - before > min_ms:
+                flag = '  <-- REGRESSION'
+                regressed = True
+            print(f"  {pages:>4}p {stage:<28}{before:>10.1f} -> {after:>10.1f} ms ({change:+.0%}){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 300])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='seconds per fake LLM call')
+    parser.add_argument('--llm-per-kchar', type=float, default=0.0, help='extra seconds per 1000 prompt chars')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown counted as a regression')
+    parser.add_argument('--min-ms', type=float, default=1.0, help='ignore regressions smaller than this')
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), report, args.threshold, args.min_ms):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
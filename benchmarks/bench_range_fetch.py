@@ -0,0 +1,71 @@
+"""
+Benchmark: page-limited extraction with Range requests vs a full download.
+
+A synthetic report with an image on every page is served by the local
+range-capable server (with per-request latency and a bandwidth cap, like a
+remote host), and its first --max-pages pages are extracted both ways through
+pdf_text.iter_source_pages. The ranged read is then repeated with the blocks it
+cached. Reports wall time, requests, bytes transferred and whether the ranged
+text matches the full download's:
+
+    python benchmarks/bench_range_fetch.py --pages 80 --image-kb 1000 --max-pages 10
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import ReportServer, synthetic_report_pdf
+
+
+def extract(pdf_text, url, max_pages, clear=True):
+    if clear:
+        pdf_text.get_pdf_cache().clear()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        texts = [text for _, text in pdf_text.iter_source_pages(url, max_pages=max_pages, workers=1)]
+    return time.perf_counter() - started, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=80)
+    parser.add_argument('--image-kb', type=int, default=1000, help='image bytes drawn on every page')
+    parser.add_argument('--max-pages', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every request')
+    parser.add_argument('--mbps', type=float, default=20, help='server bandwidth in MB/s')
+    args = parser.parse_args()
+
+    data = synthetic_report_pdf(args.pages, seed=args.pages, image_bytes=args.image_kb * 1000)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['PDF_CACHE_DIR'] = workdir
+        import pdf_text
+        import pypdf, requests  # noqa: F401  (loaded lazily by the download path)
+
+        results = {}
+        for ranges in (True, False):
+            with ReportServer({'report.pdf': data}, ranges=ranges, latency=args.latency,
+                              bytes_per_second=args.mbps * 1e6) as server:
+                seconds, texts = extract(pdf_text, f"{server.url}/report.pdf", args.max_pages)
+                results['ranged' if ranges else 'full'] = (seconds, texts, server.requests, server.bytes_sent)
+                if ranges:
+                    requests_before, sent_before = server.requests, server.bytes_sent
+                    seconds, texts = extract(pdf_text, f"{server.url}/report.pdf", args.max_pages, clear=False)
+                    results['repeat'] = (seconds, texts, server.requests - requests_before,
+                                         server.bytes_sent - sent_before)
+
+    print(f"{args.pages}-page report, {len(data) / 1e6:.1f} MB, first {args.max_pages} pages")
+    for name, (seconds, _, requests_made, sent) in results.items():
+        print(f"{name:<7} {seconds * 1000:8.1f} ms   {requests_made:5d} requests   {sent / 1e6:7.1f} MB sent")
+    print(f"text identical: {results['ranged'][1] == results['full'][1] == results['repeat'][1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: cold start of a web worker.
+
+Each run is a fresh interpreter that imports main, serves '/' and reads the
+game pool, like a gunicorn worker's first request. Reports import time, time
+to first response, peak RSS and whether the heavy generator-only libraries
+(anthropic, pypdf, requests) got loaded. Pass --baseline REV to run the same
+probe against an earlier commit for comparison:
+
+    python benchmarks/bench_startup.py --baseline HEAD~1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+HEAVY_MODULES = ['anthropic', 'httpx', 'pypdf', 'requests']
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+client = main.app.test_client()
+assert client.get('/').status_code == 200
+main.game_pool.depth()
+served = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - started,
+    'first_response_s': served - started,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': [m for m in %r if m in sys.modules]
+}))
+"""
+
+
+def probe(tree, workdir):
+    env = dict(os.environ,
+               ANTHROPIC_API_KEY='startup-benchmark',
+               PRELOADER_ENABLED='0',
+               PDF_CACHE_DIR=os.path.join(workdir, 'pdf_cache'),
+               GAME_POOL_DB=os.path.join(workdir, 'game_pool.sqlite3'),
+               WORD_BANK_DB=os.path.join(workdir, 'word_bank.sqlite3'),
+               GAME_STATE_DB=os.path.join(workdir, 'game_state.sqlite3'),
+               ARTIFACT_DB=os.path.join(workdir, 'artifacts.sqlite3'),
+               PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-c', PROBE % HEAVY_MODULES], cwd=tree, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(tree, repeat):
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        probe(tree, workdir)    # warm the OS file cache and .pyc files
+        for _ in range(repeat):
+            runs.append(probe(tree, workdir))
+    return {
+        'import_ms': statistics.median(r['import_s'] for r in runs) * 1000,
+        'first_response_ms': statistics.median(r['first_response_s'] for r in runs) * 1000,
+        'max_rss_mb': statistics.median(r['max_rss_mb'] for r in runs),
+        'loaded': runs[-1]['loaded']
+    }
+
+
+def export_revision(rev, target):
+    archive = subprocess.run(['git', 'archive', rev], cwd=REPO_ROOT, capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', target], input=archive.stdout, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', help='git revision to compare against')
+    args = parser.parse_args()
+
+    results = {'working tree': measure(REPO_ROOT, args.repeat)}
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tree:
+            export_revision(args.baseline, tree)
+            results[args.baseline] = measure(tree, args.repeat)
+
+    for name, r in results.items():
+        print(f"{name:<14} import {r['import_ms']:7.1f} ms   first response {r['first_response_ms']:7.1f} ms   "
+              f"peak RSS {r['max_rss_mb']:6.1f} MB   loaded: {', '.join(r['loaded']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Offline stand-ins for everything the game pipeline talks to over the network:
+synthetic sustainability-report PDFs, a local HTTP server hosting them, and a
+fake Anthropic messages endpoint with configurable latency and canned replies.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPANY_NAME = "Acme Holdings"
+
+# Sentence templates mixing GRI keywords, metrics, numbers and marketing language
+SENTENCES = [
+    "In {year} our scope 1 and scope 2 ghg emissions were {n:,} metric tons co2e across {k} sites.",
+    "Total energy consumption reached {n:,} MWh, of which {p}% came from renewable energy.",
+    "We are proud of our journey and deeply committed to a world-class culture of sustainability.",
+    "Water withdrawal was {n:,} cubic meters, with freshwater accounting for {p}% of the total.",
+    "Our vision is to be the industry-leading partner, and we strive to aspire to bolder goals.",
+    "Hazardous waste sent to landfill fell to {n:,} tonnes while recycling rose by {p}%.",
+    "The incident rate for lost time injuries was {d} per 200,000 hours worked.",
+    "Employees completed an average of {k} training hours as part of employee development.",
+    "Women represent {p}% of governance bodies and the equal remuneration ratio was {d}.",
+    "We believe sustainability is core to our DNA and central to our mission.",
+    "New hires totalled {n:,} and voluntary turnover was {p}% with parental leave for all staff.",
+    "Operating costs were {n:,} thousand and revenues grew as wages and benefits increased.",
+    "We protected {k} hectares of habitats near protected areas to support biodiversity.",
+    "Engagement with local communities covered {p}% of operations through impact assessments.",
+]
+
+# Front matter with none of the GRI phrases: what fills the first pages of real reports
+FRONT_MATTER = [
+    "This document has been prepared for shareholders, customers and other readers of the annual filing.",
+    "Forward-looking statements in this document are subject to uncertainties outside our control.",
+    "Contents: letter to shareholders, our story, governance overview, appendix and glossary.",
+    "The board thanks every colleague and partner for their contributions over the past twelve months.",
+    "Photographs throughout this publication show our offices, stores and people around the globe.",
+    "Readers should refer to the notes and definitions in the appendix when comparing figures.",
+]
+
+
+def _pdf_string(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def synthetic_report_lines(page_no, rng, lines_per_page=45, front_matter_pages=0):
+    if page_no == 0:
+        return [f"{COMPANY_NAME} Sustainability Report {2024}", "Table of Contents",
+                "Message from the CEO", "Our Approach to ESG", "GRI Content Index"]
+    templates = FRONT_MATTER if page_no <= front_matter_pages else SENTENCES
+    lines = []
+    for _ in range(lines_per_page):
+        template = rng.choice(templates)
+        lines.append(template.format(year=rng.choice([2022, 2023, 2024]), n=rng.randint(100, 999999),
+                                     k=rng.randint(2, 90), p=rng.randint(1, 99),
+                                     d=round(rng.uniform(0.1, 3.0), 2)))
+    return lines
+
+
+def synthetic_report_pdf(pages, seed=0, image_bytes=0, front_matter_pages=0):
+    """
+    Build an uncompressed PDF of `pages` pages (pypdf can extract it). With
+    image_bytes, every page also draws an image of that size, like the photos
+    that make real annual reports tens of MB; the first `front_matter_pages`
+    pages after the cover hold boilerplate instead of sustainability content.
+    """
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(None)
+    pages_id = add(None)
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for page_no in range(pages):
+        lines = synthetic_report_lines(page_no, rng, front_matter_pages=front_matter_pages)
+        content = b"BT /F1 7 Tf 24 810 Td 9 TL " + b" ".join(
+            b"(" + _pdf_string(line).encode('latin-1') + b") '" for line in lines) + b" ET"
+        xobjects = b""
+        if image_bytes:
+            side = max(1, int((image_bytes // 3) ** 0.5))
+            pixels = rng.randbytes(side * side * 3)
+            image_id = add(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                           b"/BitsPerComponent 8 /Length %d >>\nstream\n" % (side, side, len(pixels))
+                           + pixels + b"\nendstream")
+            content = b"q 200 0 0 200 200 100 cm /Im1 Do Q " + content
+            xobjects = b" /XObject << /Im1 %d 0 R >>" % image_id
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >>%s >> >>" % (pages_id, content_id, font_id, xobjects)))
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_at)
+    return bytes(out)
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _ServerThread:
+    def __init__(self, handler):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ReportServer(_ServerThread):
+    """
+    Serves in-memory PDFs at /<name> with ETag / Last-Modified revalidation and,
+    unless ranges=False, single-range Range requests (honouring If-Range).
+    `latency` seconds are added to every request and bodies are sent at no more
+    than `bytes_per_second` (if set), to mimic a remote host.
+    """
+
+    def __init__(self, files, ranges=True, latency=0.0, bytes_per_second=None):
+        self.files = files
+        self.ranges = ranges
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.requests = 0
+        self.range_requests = 0
+        self.bytes_sent = 0
+        self._last_modified = formatdate(time.time(), usegmt=True)
+        self._etags = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(_QuietHandler):
+            def _headers(self, body, etag, length):
+                self.send_header('Content-Type', 'application/pdf')
+                self.send_header('Content-Length', str(length))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', server._last_modified)
+                if server.ranges:
+                    self.send_header('Accept-Ranges', 'bytes')
+
+            def _send(self, data):
+                """Writes the body (throttled if configured); returns the bytes the client took"""
+                chunk = max(1, int(server.bytes_per_second / 20)) if server.bytes_per_second else len(data)
+                sent = 0
+                try:
+                    for i in range(0, len(data), chunk):
+                        self.wfile.write(data[i:i + chunk])
+                        sent += len(data[i:i + chunk])
+                        if server.bytes_per_second:
+                            time.sleep(len(data[i:i + chunk]) / server.bytes_per_second)
+                except ConnectionError:
+                    pass    # clients hang up on bodies they didn't want
+                return sent
+
+            def _resolve(self):
+                server.count(requests=1)
+                time.sleep(server.latency)
+                body = server.files.get(self.path.lstrip('/'))
+                if body is None:
+                    self.send_error(404)
+                    return None, None
+                return body, server.etag(body)
+
+            def _range(self, body, etag):
+                """(start, end) for a satisfiable single range this server should honour, else None"""
+                header = self.headers.get('Range')
+                if not server.ranges or not header or not header.startswith('bytes='):
+                    return None
+                if_range = self.headers.get('If-Range')
+                if if_range and if_range != etag:
+                    return None
+                spec = header[len('bytes='):]
+                if ',' in spec:
+                    return None
+                first, _, last = spec.partition('-')
+                if first:
+                    start, end = int(first), (int(last) + 1 if last else len(body))
+                else:
+                    start, end = max(0, len(body) - int(last)), len(body)
+                end = min(end, len(body))
+                return (start, end) if start < end else None
+
+            def do_HEAD(self):
+                body, etag = self._resolve()
+                if body is None:
+                    return
+                self.send_response(200)
+                self._headers(body, etag, len(body))
+                self.end_headers()
+
+            def do_GET(self):
+                body, etag = self._resolve()
+                if body is None:
+                    return
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                span = self._range(body, etag)
+                if span:
+                    start, end = span
+                    server.count(range_requests=1)
+                    self.send_response(206)
+                    self._headers(body, etag, end - start)
+                    self.send_header('Content-Range', f'bytes {start}-{end - 1}/{len(body)}')
+                    self.end_headers()
+                    server.count(bytes_sent=self._send(body[start:end]))
+                    return
+                self.send_response(200)
+                self._headers(body, etag, len(body))
+                self.end_headers()
+                server.count(bytes_sent=self._send(body))
+
+        super().__init__(Handler)
+
+    def count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def etag(self, body):
+        # Hashing a large report on every (range) request would dominate the timings
+        key = id(body)
+        cached = self._etags.get(key)
+        if cached is None or cached[0] is not body:
+            cached = self._etags[key] = (body, '"%s"' % hashlib.sha256(body).hexdigest()[:16])
+        return cached[1]
+
+
+def canned_reply(prompt, max_tokens):
+    """Reply text shaped like what each of the pipeline's prompts expects"""
+    words = ["CARBON", "WATER", "ENERGY", "WASTE", "SCOPE", "METHANE", "HABITAT", "RECYCLE",
+             "TURNOVER", "SAFETY", "GENDER", "WAGES", "LANDFILL", "FUEL", "SPECIES", "TRAINING"]
+    statuses = ["missing", "misleading", "compliant", "general"]
+    codes = ["GRI 302", "GRI 303", "GRI 305", "GRI 306", "GRI 401", "GRI 403", "BIAS", ""]
+    if "identify the main company name" in prompt:
+        return COMPANY_NAME
+    if "build a bank of" in prompt:
+        bank = [{"word": w, "clue": f"Fill in the blank: ____ figure {i}",
+                 "gri_code": codes[i % len(codes)], "status": statuses[i % len(statuses)]}
+                for i, w in enumerate(words + [w[::-1] for w in words])]
+        return json.dumps({"company_name": COMPANY_NAME, "words": bank})
+    if "JSON object" in prompt:
+        return json.dumps({"company_name": COMPANY_NAME,
+                           "words": [{"word": w, "clue": f"A metric this report mentions: ____ ({w[0]})"}
+                                     for w in words[:8]]})
+    return "\n".join(f"{w}\nA metric this report fails to disclose: ____ ({i})" for i, w in enumerate(words[:5]))
+
+
+class FakeAnthropicServer(_ServerThread):
+    """
+    Local stand-in for POST /v1/messages. Sleeps `latency` seconds per call
+    (plus `per_kchar` seconds per 1000 prompt chars) and returns a canned reply.
+    """
+
+    def __init__(self, latency=0.0, per_kchar=0.0):
+        self.latency = latency
+        self.per_kchar = per_kchar
+        self.calls = 0
+        self.prompt_chars = 0
+        server = self
+
+        class Handler(_QuietHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                prompt = "".join(m['content'] if isinstance(m['content'], str) else json.dumps(m['content'])
+                                 for m in payload.get('messages', []))
+                server.calls += 1
+                server.prompt_chars += len(prompt)
+                time.sleep(server.latency + server.per_kchar * len(prompt) / 1000)
+                text = canned_reply(prompt, payload.get('max_tokens', 0))
+                body = json.dumps({
+                    "id": f"msg_fake_{server.calls}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": payload.get('model', 'fake'),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        super().__init__(Handler)
@@ -0,0 +1,100 @@
+"""
+Aho-Corasick automaton over raw characters (substring semantics): the phrase
+matcher the GRI analysis used before NgramMatcher, kept as a baseline for
+bench_gri_matcher.py.
+"""
+
+
+class PhraseMatcher:
+    def __init__(self, phrases):
+        """
+        Builds the automaton.
+
+        Args:
+            phrases: List of lowercase phrases; a hit's phrase_id is its index here
+        """
+        self.phrases = list(phrases)
+        self._goto = [{}]       # trie edges per state
+        self._fail = [0]        # failure link per state
+        self._out = [()]        # phrase ids ending at each state (incl. via failure links)
+
+        for phrase_id, phrase in enumerate(self.phrases):
+            state = 0
+            for ch in phrase:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            if phrase:
+                self._out[state] += (phrase_id,)
+
+        # Breadth-first pass to fill in failure links and merge outputs
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+        # Full transition table, filled lazily per (state, char) the first time it is seen
+        self._delta = [dict(edges) for edges in self._goto]
+        self._lengths = [len(phrase) for phrase in self.phrases]
+
+    def _step(self, state, ch):
+        """Follows failure links for a (state, char) pair not yet in the table"""
+        fallback = state
+        while True:
+            nxt = self._goto[fallback].get(ch)
+            if nxt is not None or fallback == 0:
+                break
+            fallback = self._fail[fallback]
+        nxt = nxt or 0
+        self._delta[state][ch] = nxt
+        return nxt
+
+    def scan(self, text):
+        """
+        Finds every occurrence of every phrase in one pass.
+
+        Returns:
+            List of (phrase_id, start, end) tuples, ordered by end offset
+        """
+        return self.scan_from(text)[0]
+
+    def scan_from(self, text, state=0, offset=0):
+        """
+        scan() for text that arrives in chunks: pass the state returned for the
+        previous chunk and that chunk's end offset, and phrases spanning the
+        boundary are still found (with offsets into the whole text).
+
+        Returns:
+            (hits, state) with hits as in scan()
+        """
+        hits = []
+        delta = self._delta
+        out = self._out
+        lengths = self._lengths
+        step = self._step
+        for i, ch in enumerate(text, offset + 1):
+            nxt = delta[state].get(ch)
+            state = step(state, ch) if nxt is None else nxt
+            if out[state]:
+                for phrase_id in out[state]:
+                    hits.append((phrase_id, i - lengths[phrase_id], i))
+        return hits, state
+
+    def first_hits(self, text):
+        """Maps phrase_id -> (start, end) of its first occurrence"""
+        first = {}
+        for phrase_id, start, end in self.scan(text):
+            if phrase_id not in first or start < first[phrase_id][0]:
+                first[phrase_id] = (start, end)
+        return first
@@ -0,0 +1,201 @@
+import os
+import re
+import tempfile
+import threading
+
+from report_index import lowercase_same_length
+
+# Bounded-Memory Report Processing
+# For very large reports, the full text never has to exist as a string. Pages are
+# whitespace-normalized and lowercased one at a time, scanned by the phrase matcher
+# as they stream past, and written to a spill file that stays in memory up to the
+# budget and moves to disk beyond it. Only a short prefix (all the Claude prompts
+# use) is kept in memory; bias-word contexts are read back from the spill file.
+# Generation peak RSS is sampled in the background and reported either way.
+
+BOUNDED_MEMORY = os.getenv("BOUNDED_MEMORY", "0") != "0"
+# Spilled text kept in memory before it moves to a temp file, and the RSS growth
+# per generation above which a warning is printed
+MEMORY_BUDGET_BYTES = int(os.getenv("MEMORY_BUDGET_MB", "64")) * 1024 * 1024
+SPILL_DIR = os.getenv("SPILL_DIR") or None     # None: the system temp dir
+INDEX_STRIDE = 4096            # chars between char -> byte offset checkpoints in the spill
+RSS_SAMPLE_SECONDS = 0.01
+
+_WHITESPACE = re.compile(r'\s+')
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes (None where it can't be read)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakRSS:
+    """
+    Samples RSS on a background thread while the with-block runs. RSS is per
+    process, so concurrent generations show up in each other's peaks.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.start_bytes = None
+        self.peak_bytes = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and (self.peak_bytes is None or rss > self.peak_bytes):
+            self.peak_bytes = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_bytes = current_rss()
+        if self.start_bytes is not None:
+            self.peak_bytes = self.start_bytes
+            self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    @property
+    def growth_bytes(self):
+        """Peak above the RSS at the start of the block"""
+        if self.start_bytes is None:
+            return None
+        return self.peak_bytes - self.start_bytes
+
+
+class WhitespaceNormalizer:
+    """
+    Chunked equivalent of re.sub(r'\\s+', ' ', text).strip(): feeding the pieces of
+    a text and joining the outputs gives the same result as cleaning the whole text.
+    """
+
+    def __init__(self):
+        self._started = False         # any non-whitespace emitted yet
+        self._space_pending = False   # whitespace seen after the last emitted char
+
+    def feed(self, text):
+        collapsed = _WHITESPACE.sub(' ', text)
+        body = collapsed.strip(' ')
+        if not body:
+            self._space_pending = self._space_pending or bool(collapsed)
+            return ''
+        # A trailing space is only written once more text follows, so the end is stripped
+        lead = ' ' if self._started and (self._space_pending or collapsed[0] == ' ') else ''
+        self._started = True
+        self._space_pending = collapsed[-1] == ' '
+        return lead + body
+
+
+class SpilledText:
+    """
+    A report's cleaned text, built page by page without holding it in memory.
+
+    Attributes:
+        prefix: The first `prefix_chars` chars of the cleaned text (original case)
+        first_hits: phrase_id -> (start, end) of each phrase's first occurrence in the
+            lowercased text, as matcher.first_hits() on the whole text would give
+        chars: Length of the cleaned text
+    """
+
+    def __init__(self, matcher, prefix_chars, budget_bytes=MEMORY_BUDGET_BYTES, spill_dir=SPILL_DIR):
+        self.matcher = matcher
+        self.prefix_chars = prefix_chars
+        self.prefix = ""
+        self.chars = 0
+        self._first_hits = {}
+        self._state = None
+        self._normalizer = WhitespaceNormalizer()
+        # Lowercased text as UTF-8, with a byte offset every INDEX_STRIDE chars for reads
+        self._spill = tempfile.SpooledTemporaryFile(max_size=budget_bytes, dir=spill_dir)
+        self._bytes = 0
+        self._index = [0]
+
+    def add_page(self, page_text):
+        """Append one extracted page (joined the way join_pages() does)"""
+        if page_text:
+            self._add(self._normalizer.feed(page_text + "\n"))
+
+    def _add(self, cleaned):
+        if not cleaned:
+            return
+        if len(self.prefix) < self.prefix_chars:
+            self.prefix += cleaned[:self.prefix_chars - len(self.prefix)]
+
+        lowered = lowercase_same_length(cleaned)
+        hits, self._state = self.matcher.scan_from(lowered, self._state, self.chars)
+        self._keep_first(hits)
+        self._write(lowered)
+
+    def _keep_first(self, hits):
+        for phrase_id, start, end in hits:
+            # Hits arrive in end order; whitespace between a phrase's tokens can vary its length
+            first = self._first_hits.get(phrase_id)
+            if first is None or start < first[0]:
+                self._first_hits[phrase_id] = (start, end)
+
+    @property
+    def first_hits(self):
+        # The matcher holds back hits on the last token until it knows the token is complete
+        if self._state is not None:
+            self._keep_first(self.matcher.scan_from("", self._state, final=True)[0])
+            self._state = None
+        return self._first_hits
+
+    def _write(self, lowered):
+        position = self.chars
+        while lowered:
+            next_mark = len(self._index) * INDEX_STRIDE
+            head, lowered = lowered[:next_mark - position], lowered[next_mark - position:]
+            encoded = head.encode('utf-8')
+            self._spill.write(encoded)
+            self._bytes += len(encoded)
+            position += len(head)
+            if position == next_mark:
+                self._index.append(self._bytes)
+        self.chars = position
+
+    @property
+    def spilled_to_disk(self):
+        return bool(getattr(self._spill, '_rolled', False))
+
+    def read(self, start, end):
+        """Lowercased text[start:end]"""
+        start = max(0, start)
+        end = min(end, self.chars)
+        if start >= end:
+            return ""
+        block = start // INDEX_STRIDE
+        base = block * INDEX_STRIDE
+        self._spill.seek(self._index[block])
+        # A char is at most 4 UTF-8 bytes; a char cut at the end of the read is dropped
+        data = self._spill.read((end - base) * 4).decode('utf-8', errors='ignore')
+        self._spill.seek(0, os.SEEK_END)
+        return data[start - base:end - base]
+
+    def context(self, start, end, radius=50):
+        """Lowercased text around a hit, like ReportIndex(text).context(start, end, radius)"""
+        return self.read(max(0, start - radius), end + radius).strip()
+
+    def close(self):
+        self._spill.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,138 @@
+import os
+import re
+
+import numpy as np
+
+from gri_matcher import GRI_MATCHER
+from report_index import get_report_index
+
+# Prompt Context Builder
+# Instead of the first N chars of a report (mostly cover, contents and boilerplate),
+# prompts get a short lead (cover page: company name, report title) plus the
+# sentences that score highest under BM25 against the GRI keywords, metrics and
+# bias words, packed into a token budget and kept in document order. Sentences
+# come from the same boundaries as PDFScraper.split_into_sentences, and a phrase
+# counts in a sentence exactly where the GRI analysis finds it (whole tokens).
+
+# 'ranked': lead + BM25-selected sentences; 'prefix': the first N chars (the original behavior)
+CONTEXT_MODE = os.getenv("CONTEXT_MODE", "ranked")
+CONTEXT_LEAD_CHARS = 1500      # always sent first; the company name is almost always in it
+CHARS_PER_TOKEN = 4            # rough size of a Claude token in English report text
+BM25_K1 = 1.2
+BM25_B = 0.75
+EXCERPT_SEPARATOR = "\n...\n"
+
+# Every GRI keyword, required metric and bias word, lowercase and deduplicated
+QUERY_PHRASES = GRI_MATCHER.phrases
+
+
+def sentence_ids(index, offsets):
+    """ReportIndex sentence id of each char offset (-1 outside any kept sentence)"""
+    starts = np.frombuffer(index.sentence_starts, dtype=np.int64)
+    ends = np.frombuffer(index.sentence_ends, dtype=np.int64)
+    if not len(starts):
+        return np.full(len(offsets), -1, dtype=np.int64)
+    sentence = np.searchsorted(starts, offsets, side='right') - 1
+    inside = (sentence >= 0) & (offsets < ends[np.maximum(sentence, 0)])
+    return np.where(inside, sentence, -1)
+
+
+def _lead(text, max_chars):
+    """Up to max_chars from the start of the text, not cutting a word in half"""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(' ', 0, max_chars + 1)
+    return text[:cut if cut > 0 else max_chars]
+
+
+def score_sentences(index, matcher=GRI_MATCHER):
+    """
+    BM25 score of every sentence of a report that matches any query phrase
+    (each phrase of the matcher is one query term; sentence length is measured in chars).
+
+    Returns:
+        sentence_id -> score
+    """
+    count = index.sentence_count
+    if not count:
+        return {}
+    phrase_ids, starts, _ = matcher.hits(index)
+    sentence = sentence_ids(index, starts)
+    kept = sentence >= 0
+    if not kept.any():
+        return {}
+    # Term frequency of each (phrase, sentence) pair, then document frequency per phrase
+    pairs, tf = np.unique(np.stack([phrase_ids[kept], sentence[kept]]), axis=1, return_counts=True)
+    df = np.bincount(pairs[0], minlength=len(matcher.phrases))[pairs[0]]
+    idf = np.log((count - df + 0.5) / (df + 0.5) + 1)
+
+    lengths = np.frombuffer(index.sentence_ends, dtype=np.int64) - np.frombuffer(index.sentence_starts, dtype=np.int64)
+    norm = 1 - BM25_B + BM25_B * lengths[pairs[1]] / lengths.mean()
+    contributions = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+    totals = np.bincount(pairs[1], weights=contributions, minlength=count)
+    return {sentence_id: float(totals[sentence_id]) for sentence_id in np.unique(pairs[1]).tolist()}
+
+
+def build_context(text, max_tokens, lead_chars=CONTEXT_LEAD_CHARS, matcher=GRI_MATCHER):
+    """
+    Pack the lead and the best-scoring sentences of a cleaned report into a prompt budget.
+
+    Args:
+        text: Cleaned report text
+        max_tokens: Budget for the returned context (estimated at CHARS_PER_TOKEN)
+        lead_chars: Chars from the start of the report that are always included
+        matcher: NgramMatcher whose phrases are the query terms
+
+    Returns:
+        The lead followed by the chosen sentences in document order, separated by
+        EXCERPT_SEPARATOR where text was skipped
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+    lead = _lead(text, min(lead_chars, budget))
+    remaining = budget - len(lead)
+
+    index = get_report_index(text)
+    scores = score_sentences(index, matcher)
+    chosen = []
+    seen = set()
+    for sentence_id in sorted(scores, key=lambda s: (-scores[s], s)):
+        if index.sentence_starts[sentence_id] < len(lead):
+            continue
+        sentence = index.sentence(sentence_id)
+        # Reports repeat headers, footers and pull quotes; one copy is enough
+        key = re.sub(r'\d+', '#', sentence.lower())
+        cost = len(sentence) + len(EXCERPT_SEPARATOR)
+        if key in seen or cost > remaining:
+            continue
+        seen.add(key)
+        chosen.append(sentence_id)
+        remaining -= cost
+        if remaining < len(EXCERPT_SEPARATOR) + 30:
+            break
+
+    # Without any matching sentences, fill the budget from the start instead
+    if not chosen:
+        return _lead(text, budget)
+    parts = [lead]
+    previous_end = len(lead)
+    for sentence_id in sorted(chosen):
+        start = index.sentence_starts[sentence_id]
+        separator = " " if text[previous_end:start].strip() == "" else EXCERPT_SEPARATOR
+        parts.append(separator + index.sentence(sentence_id))
+        previous_end = index.sentence_ends[sentence_id]
+    return "".join(parts)
+
+
+def prompt_context(text, max_chars, max_tokens, mode=None):
+    """
+    The report text for one prompt under CONTEXT_MODE.
+
+    Args:
+        max_chars: Prefix length used in 'prefix' mode
+        max_tokens: Token budget used in 'ranked' mode
+    """
+    if (mode or CONTEXT_MODE) == 'prefix':
+        return text[:max_chars]
+    return build_context(text, max_tokens)
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl  # producer election across worker processes (not available on Windows)
+except ImportError:
+    fcntl = None
+
+# Preloaded Game Pool
+# SQLite-backed queue of ready-to-serve games shared by every worker process.
+# Games survive restarts, expire after a maximum age and are claimed atomically,
+# so two workers can never serve the same game. One process at a time holds the
+# producer lock and refills the pool (to the watermarks in preloader.py); the
+# others only dequeue.
+
+GAME_POOL_DB = os.getenv("GAME_POOL_DB", "game_pool.sqlite3")
+GAME_POOL_MAX_AGE = int(os.getenv("GAME_POOL_MAX_AGE", str(24 * 3600)))  # seconds
+
+
+class GamePool:
+    def __init__(self, db_path=GAME_POOL_DB, max_age=GAME_POOL_MAX_AGE):
+        self.db_path = db_path
+        self.max_age = max_age
+        self._local = threading.local()     # one SQLite connection per thread
+        self._producer_fd = None
+        self._producer_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS games_created_at ON games (created_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        # A connection inherited through fork (gunicorn --preload) must not be reused
+        if conn is None or self._local.pid != os.getpid():
+            # Autocommit mode; multi-statement updates use explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _cutoff(self):
+        return time.time() - self.max_age
+
+    def put(self, game_data):
+        """Add a generated game to the pool"""
+        self._conn().execute(
+            "INSERT INTO games (created_at, data) VALUES (?, ?)",
+            (time.time(), json.dumps(game_data))
+        )
+
+    def claim(self):
+        """
+        Atomically remove and return the oldest unexpired game, or None if the pool is empty.
+        The write lock is taken up front, so concurrent claims from any process never overlap.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, data FROM games WHERE created_at >= ? ORDER BY id LIMIT 1",
+                (self._cutoff(),)
+            ).fetchone()
+            if row:
+                conn.execute("DELETE FROM games WHERE id = ?", (row[0],))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return json.loads(row[1]) if row else None
+
+    def depth(self):
+        """Number of unexpired games ready to serve"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM games WHERE created_at >= ?", (self._cutoff(),)
+        ).fetchone()[0]
+
+    def expire(self):
+        """Delete games older than max_age; returns how many were dropped"""
+        return self._conn().execute(
+            "DELETE FROM games WHERE created_at < ?", (self._cutoff(),)
+        ).rowcount
+
+    def try_become_producer(self):
+        """
+        Try to take the single-producer lock for this process. The lock is held for the
+        life of the process and released by the OS if it dies, so another worker takes over.
+        """
+        with self._producer_lock:
+            if self._producer_fd is not None:
+                return True
+            if fcntl is None:
+                # No cross-process locking available: every process produces
+                self._producer_fd = -1
+                return True
+            fd = os.open(self.db_path + '.producer.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            os.ftruncate(fd, 0)
+            os.write(fd, str(os.getpid()).encode())
+            self._producer_fd = fd
+            return True
+
+    def is_producer(self):
+        return self._producer_fd is not None
@@ -0,0 +1,131 @@
+from functools import partial
+
+from report_index import get_report_index, text_context
+from gri_matcher import (GRI_MATCHER, GRI_PHRASES, BIAS_PHRASES, STANDARDS, STANDARD_FINGERPRINTS, STANDARDS_FINGERPRINT,
+                         first_hits_from_table, needs_text, stale_standards, update_hit_table)
+
+# GRI Compliance Analysis
+# Turns phrase matcher hits into the missing / misleading / compliant findings the
+# game and the batch tools report. Kept out of the web app so worker processes and
+# command-line tools can analyze reports without importing Flask or its stores.
+
+
+def analyze_text(pdf_content, verbose=True):
+    """
+    Compare cleaned report text against the GRI standards.
+
+    Returns:
+        (analysis, first_hits) with first_hits as phrase_id -> first (start, end)
+    """
+    index = get_report_index(pdf_content)
+    
+    # One pass over the report's tokens finds every keyword, metric and bias word
+    first_hits = GRI_MATCHER.first_hits(index)
+    
+    analysis = compliance_from_hits(first_hits, index.context, verbose)
+    return analysis, first_hits
+
+
+def phrase_counts(pdf_content):
+    """
+    Occurrences of every catalog phrase in cleaned report text.
+
+    Returns:
+        int64 NumPy vector indexed like GRI_MATCHER.phrases
+    """
+    return GRI_MATCHER.counts(get_report_index(pdf_content))
+
+
+def refresh_analysis(artifact, verbose=True):
+    """
+    Bring a stored analysis up to date with the standards database, scanning the
+    text only for the phrases of standards that changed since it was computed.
+    
+    Args:
+        artifact: Entry from the artifact store
+        verbose: Print what is rescanned and the analysis summary
+    
+    Returns:
+        (analysis, hits, fingerprints), or None if the stored analysis is current
+    """
+    if artifact['standards'] == STANDARDS_FINGERPRINT:
+        return None
+    codes = stale_standards(artifact['fingerprints'])
+    if verbose:
+        print(f"\n🔁 Standards changed since this report was analyzed, rescanning {len(codes)}: "
+              f"{', '.join(codes) or 'none'}")
+    text = artifact['text']
+    hits = update_hit_table(artifact['hits'], text if needs_text(codes) else None, codes)
+    # Contexts are sliced from the stored text; a title-only edit builds no index
+    analysis = compliance_from_hits(first_hits_from_table(hits), partial(text_context, text), verbose)
+    return analysis, hits, dict(STANDARD_FINGERPRINTS)
+
+
+def compliance_from_hits(first_hits, context, verbose=True):
+    """
+    Build the compliance analysis from matcher hits.
+
+    Args:
+        first_hits: phrase_id -> (start, end) of its first occurrence in the lowercased text
+        context: (start, end) -> lowercased text up to 50 chars around a hit
+        verbose: Print the summary counts
+    """
+    analysis = {
+        'missing_standards': [],
+        'misleading_content': [],
+        'compliant_standards': []
+    }
+
+    # Check each GRI standard
+    for gri_code, standard in STANDARDS.items():
+        phrases = GRI_PHRASES[gri_code]
+        keywords_found = [keyword for keyword, phrase_id in phrases['keywords'] if phrase_id in first_hits]
+        metrics_found = [metric for metric, phrase_id in phrases['metrics'] if phrase_id in first_hits]
+
+        if not keywords_found and not metrics_found:
+            analysis['missing_standards'].append({
+                'code': gri_code,
+                'title': standard['title'],
+                'reason': f"No keywords or metrics found for {standard['title']}"
+            })
+        elif keywords_found and not metrics_found:
+            analysis['misleading_content'].append({
+                'code': gri_code,
+                'title': standard['title'],
+                'reason': f"Mentions {', '.join(keywords_found[:2])} but lacks quantitative metrics",
+                'keywords': keywords_found
+            })
+        elif keywords_found and metrics_found:
+            analysis['compliant_standards'].append({
+                'code': gri_code,
+                'title': standard['title'],
+                'keywords': keywords_found,
+                'metrics': metrics_found
+            })
+
+    # Check for bias/fluff words (context: up to 50 chars around the first use)
+    bias_findings = []
+    for bias_word, phrase_id in BIAS_PHRASES:
+        if phrase_id in first_hits:
+            bias_findings.append({
+                'word': bias_word,
+                'context': context(*first_hits[phrase_id])
+            })
+
+    if bias_findings:
+        # Limit to top 5 bias findings to avoid overwhelming the analysis
+        for finding in bias_findings[:5]:
+            analysis['misleading_content'].append({
+                'code': 'BIAS',
+                'title': 'Marketing Language',
+                'reason': f"Uses subjective term '{finding['word']}' without data",
+                'word': finding['word']
+            })
+
+    if verbose:
+        print(f"\n📊 GRI Compliance Analysis:")
+        print(f"   ❌ Missing Standards: {len(analysis['missing_standards'])}")
+        print(f"   ⚠️  Misleading Content: {len(analysis['misleading_content'])}")
+        print(f"   ✅ Compliant Standards: {len(analysis['compliant_standards'])}")
+
+    return analysis
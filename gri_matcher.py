@@ -0,0 +1,79 @@
+from phrase_matcher import NgramMatcher
+from standards_catalog import BIAS_CODE, load_catalog
+
+# GRI Phrase Matcher
+# Token n-gram matcher over every keyword, required metric and bias word of the
+# standards catalog (see standards_catalog.py). Phrases match whole tokens of the
+# report ("rate" is not found in "generate"), in one pass whose cost does not grow
+# with the size of the catalog.
+
+# Loaded once at import: STANDARDS is code -> {'title', 'keywords', 'required_metrics'},
+# GRI_MATCHER scans text, GRI_PHRASES maps each standard's keywords/metrics (in
+# catalog order) to phrase ids, BIAS_PHRASES does the same for bias words
+CATALOG = load_catalog()
+STANDARDS = CATALOG.standards
+GRI_MATCHER, GRI_PHRASES, BIAS_PHRASES = CATALOG.matcher, CATALOG.phrases, CATALOG.bias_phrases
+
+
+# ----- incremental re-analysis -----
+# Stored analyses keep a hit table (phrase -> first (start, end)) and the fingerprint
+# of every standard they were computed with. When the database changes, only the
+# phrases of standards whose fingerprint changed are scanned again; everything else
+# is answered from the stored hits.
+
+def _standard_phrases():
+    """code -> lowercase phrases it is evaluated on (bias words under BIAS_CODE)"""
+    phrases = {gri_code: [GRI_MATCHER.phrases[phrase_id] for _, phrase_id in entry['keywords'] + entry['metrics']]
+               for gri_code, entry in GRI_PHRASES.items()}
+    phrases[BIAS_CODE] = [GRI_MATCHER.phrases[phrase_id] for _, phrase_id in BIAS_PHRASES]
+    return phrases
+
+
+STANDARD_PHRASES = _standard_phrases()
+PHRASE_IDS = {phrase: phrase_id for phrase_id, phrase in enumerate(GRI_MATCHER.phrases)}
+# code -> hash of the phrases it is evaluated on; a changed one means scanning for them again
+STANDARD_FINGERPRINTS = CATALOG.fingerprints
+# Hash of the whole catalog; a changed one (even just a title) means rebuilding analyses from hits
+STANDARDS_FINGERPRINT = CATALOG.fingerprint
+
+
+def hit_table(first_hits):
+    """GRI_MATCHER first_hits (phrase_id keys) as a phrase-keyed, JSON-friendly table"""
+    return {GRI_MATCHER.phrases[phrase_id]: [start, end] for phrase_id, (start, end) in first_hits.items()}
+
+
+def first_hits_from_table(table):
+    """Inverse of hit_table() for the current database (phrases no longer in it are dropped)"""
+    return {PHRASE_IDS[phrase]: tuple(span) for phrase, span in table.items() if phrase in PHRASE_IDS}
+
+
+def stale_standards(fingerprints):
+    """Codes whose stored fingerprint is missing or differs from the current database"""
+    return sorted(code for code, current in STANDARD_FINGERPRINTS.items() if fingerprints.get(code) != current)
+
+
+def update_hit_table(table, text, codes):
+    """
+    Bring a stored hit table up to date by scanning the text for the phrases of
+    `codes` only.
+
+    Args:
+        table: Stored phrase -> [start, end] table
+        text: The cleaned report text (may be None when `codes` have no phrases)
+        codes: Standards to re-evaluate, from stale_standards()
+
+    Returns:
+        New table covering exactly the phrases of the current database
+    """
+    rescan = sorted({phrase for code in codes for phrase in STANDARD_PHRASES[code] if phrase})
+    skip = set(rescan)
+    updated = {phrase: span for phrase, span in table.items() if phrase in PHRASE_IDS and phrase not in skip}
+    if rescan:
+        for phrase_id, (start, end) in NgramMatcher(rescan).first_hits(text).items():
+            updated[rescan[phrase_id]] = [start, end]
+    return updated
+
+
+def needs_text(codes):
+    """True if re-evaluating `codes` requires scanning the report text"""
+    return any(STANDARD_PHRASES[code] for code in codes)
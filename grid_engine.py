@@ -0,0 +1,150 @@
+import random
+import string
+from functools import lru_cache
+
+# Word Search Grid Engine
+# Places every word on the board server-side, so no game ships with a word missing.
+# All legal (row, col, direction) slots for a word length are enumerated once per
+# grid size, each with a bitmask of the cells it covers. Placement is a backtracking
+# search over those slots, longest (most constrained) word first: a slot that doesn't
+# touch the occupied-cell mask fits without looking at letters, and after each
+# placement every unplaced word must still have a fitting slot (forward checking),
+# otherwise the search backtracks instead of silently dropping a word.
+
+# Same directions the game board lets players select (reverse selection is allowed)
+DIRECTIONS = [
+    (0, 1),   # Horizontal Right
+    (1, 0),   # Vertical Down
+    (1, 1),   # Diagonal Down-Right
+    (-1, 1)   # Diagonal Up-Right
+]
+
+GRID_SIZE = 8               # matches the original client-side board
+MAX_GRID_SIZE = 15          # grow the board (up to this) if the words can't all fit
+MAX_PLACEMENT_TRIES = 2000  # slots tried per attempt, before the board is grown
+
+
+class GridPlacementError(Exception):
+    """Raised when the words can't be placed even on the largest board"""
+
+
+@lru_cache(maxsize=None)
+def slot_table(size, length):
+    """
+    Every legal slot for a word of `length` on a `size` x `size` board.
+
+    Returns:
+        Tuple of (row, col, dr, dc, cells, mask) with cells the cell indexes in word order
+    """
+    slots = []
+    for dr, dc in DIRECTIONS:
+        for row in range(size):
+            for col in range(size):
+                end_row = row + dr * (length - 1)
+                end_col = col + dc * (length - 1)
+                if not (0 <= end_row < size and 0 <= end_col < size):
+                    continue
+                cells = tuple((row + dr * i) * size + col + dc * i for i in range(length))
+                mask = 0
+                for cell in cells:
+                    mask |= 1 << cell
+                slots.append((row, col, dr, dc, cells, mask))
+    return tuple(slots)
+
+
+def _solve(words, size, rng):
+    """Backtracking placement; returns {word: (row, col, dr, dc)} or None"""
+    # Longest (most constrained) words first
+    order = sorted(words, key=len, reverse=True)
+    tables = [slot_table(size, len(word)) for word in order]
+    # Each word scans its slot table from a random point, for variety between seeds
+    offsets = [rng.randrange(len(table)) if table else 0 for table in tables]
+    board = [None] * (size * size)
+    tries = 0
+
+    def fits(word, cells, mask, occupied):
+        # Fast path: the slot doesn't touch any placed letter
+        if not mask & occupied:
+            return True
+        for cell, letter in zip(cells, word):
+            existing = board[cell]
+            if existing is not None and existing != letter:
+                return False
+        return True
+
+    def still_placeable(k, occupied):
+        # Forward check: some slot must still fit for every unplaced word
+        word = order[k]
+        return any(fits(word, slot[4], slot[5], occupied) for slot in tables[k])
+
+    def place(k, occupied, placed):
+        nonlocal tries
+        if k == len(order):
+            return placed
+        word = order[k]
+        table = tables[k]
+        count = len(table)
+        for j in range(count):
+            row, col, dr, dc, cells, mask = table[(offsets[k] + j) % count]
+            if not fits(word, cells, mask, occupied):
+                continue
+            tries += 1
+            if tries > MAX_PLACEMENT_TRIES:
+                return None
+            written = [cell for cell in cells if board[cell] is None]
+            for cell, letter in zip(cells, word):
+                board[cell] = letter
+            new_occupied = occupied | mask
+
+            if all(still_placeable(m, new_occupied) for m in range(k + 1, len(order))):
+                result = place(k + 1, new_occupied, {**placed, word: (row, col, dr, dc)})
+                if result is not None:
+                    return result
+            # Dead end: take the word back off the board and try its next slot
+            for cell in written:
+                board[cell] = None
+        return None
+
+    return place(0, 0, {})
+
+
+def build_grid(words, size=GRID_SIZE, seed=None):
+    """
+    Place every word and fill the rest of the board with random letters.
+
+    Args:
+        words: Uppercase words (each must fit the board)
+        size: Starting board size; grown up to MAX_GRID_SIZE if the words don't fit
+        seed: Makes the board reproducible (a random one is picked if None)
+
+    Returns:
+        dict with 'grid' (list of row strings), 'gridSize', 'seed' and
+        'placements' ({'word', 'row', 'col', 'dr', 'dc'} per word)
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    words = list(dict.fromkeys(w.upper() for w in words))  # unique, in order
+
+    size = max(size, max((len(w) for w in words), default=1))
+    while size <= MAX_GRID_SIZE:
+        rng = random.Random(f"{seed}:{size}")
+        placement = _solve(words, size, rng)
+        if placement is not None:
+            break
+        size += 1
+    else:
+        raise GridPlacementError(f"Could not place {words} on a {MAX_GRID_SIZE}x{MAX_GRID_SIZE} board")
+
+    cells = [None] * (size * size)
+    placements = []
+    for word in words:
+        row, col, dr, dc = placement[word]
+        for i, letter in enumerate(word):
+            cells[(row + dr * i) * size + col + dc * i] = letter
+        placements.append({'word': word, 'row': row, 'col': col, 'dr': dr, 'dc': dc})
+
+    # Fill remaining empty cells with random letters A-Z
+    cells = [letter or rng.choice(string.ascii_uppercase) for letter in cells]
+    grid = [''.join(cells[r * size:(r + 1) * size]) for r in range(size)]
+
+    return {'grid': grid, 'gridSize': size, 'seed': seed, 'placements': placements}
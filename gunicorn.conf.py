@@ -0,0 +1,21 @@
+# Gunicorn settings (picked up automatically from the working directory):
+#     gunicorn main:app
+#
+# The app is imported once in the master and forked into the workers, so they
+# share its pages and boot instantly. Nothing in main.py starts threads at import;
+# each worker starts its own preloader once it is running (only one of them wins
+# the producer lock and actually refills the shared pool).
+
+preload_app = True
+
+
+def on_starting(server):
+    # A scrape reaches any one worker: each renders the series of all of them
+    import telemetry
+    telemetry.REGISTRY.share()
+
+
+def post_worker_init(worker):
+    from main import preloader, PRELOADER_ENABLED
+    if PRELOADER_ENABLED:
+        preloader.start()
@@ -1,25 +1,50 @@
-from flask import Flask, jsonify, send_from_directory
-from anthropic import Anthropic
+from dotenv import load_dotenv
+import os
+
+# Before the project modules below, which read their settings from the environment
+load_dotenv()
+
+from flask import Flask, Response, jsonify, request, send_from_directory
 import re
-import requests
-import io
 import json
-import random
-import threading
-from queue import Queue
 import time
-from dotenv import load_dotenv
-import os
-from pypdf import PdfReader
-from GRI_STANDARDS_DATABASE import GRI_STANDARDS, BIAS_FLUFF_WORDS
+from gri_matcher import GRI_MATCHER, STANDARD_FINGERPRINTS, STANDARDS_FINGERPRINT, hit_table
+from gri_analysis import analyze_text, compliance_from_hits, refresh_analysis
+from pdf_text import document_key, iter_source_pages, join_pages
+from game_pool import GamePool
+from preloader import Preloader, percentile
+from word_bank import WordBank, WORD_BANK_SIZE
+from artifact_store import ArtifactStore
+from state_store import GameStateStore
+from grid_engine import build_grid, GridPlacementError
+import telemetry
+import profiling
+from bounded_memory import BOUNDED_MEMORY, MEMORY_BUDGET_BYTES, PeakRSS, SpilledText, WhitespaceNormalizer
+from context_builder import prompt_context
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import threading
 
 
-load_dotenv()
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
-# Initialize Flask and Claude
+# Initialize Flask; the Claude client (and the anthropic/httpx import behind it)
+# is created on the first generation, so workers that only serve the page and
+# pooled games start fast and never load it
 app = Flask(__name__, static_folder='static')
-client = Anthropic(api_key=ANTHROPIC_API_KEY)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The shared Anthropic client, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from anthropic import Anthropic
+                _client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    return _client
 
 # PDF List - Sources for sustainability reports
 # These URLs are used to fetch real-world data for the game
@@ -30,38 +55,66 @@ PDF_URLS = [
     
 ]
 
-GAME_STATE_FILE = 'game_state.json'  # file to persist used PDFs state
+GAME_STATE_FILE = 'game_state.json'  # legacy state, imported into the store on first run
+game_state = GameStateStore(seed_file=GAME_STATE_FILE)  # used PDFs, shared by all workers
+
+# Limit to first 50 pages to prevent processing overload on huge reports
+MAX_PAGES = 50
+COMPANY_CONTEXT_CHARS = 8000  # text sent to Claude to identify the company
+WORDS_CONTEXT_CHARS = 6000    # text sent to Claude to generate words and clues
+# CONTEXT_MODE=ranked (the default) sends the cover lead plus the sentences most
+# relevant to the GRI findings instead, within these budgets (see context_builder.py)
+COMPANY_CONTEXT_TOKENS = 600
+WORDS_CONTEXT_TOKENS = 1200
+WORD_BANK_CONTEXT_TOKENS = 1800
+# The most of a report any prompt uses in prefix mode (all bounded-memory mode keeps in
+# memory, so there ranked contexts are chosen from within it)
+PROMPT_PREFIX_CHARS = max(COMPANY_CONTEXT_CHARS, WORDS_CONTEXT_CHARS)
+
+# Runs the company lookup while the rest of the report is still being extracted
+llm_executor = ThreadPoolExecutor(max_workers=4)
+
+CLAUDE_MODEL = "claude-sonnet-4-5-20250929"
+# 'combined': one structured call returns company, words and clues
+# 'two_call': company name first, then words and clues (the original flow)
+LLM_MODE = os.getenv("LLM_MODE", "combined")
+# Recent end-to-end LLM time per game for each mode, to compare p50/p95
+llm_latency = {'combined': deque(maxlen=200), 'two_call': deque(maxlen=200)}
+
+# Per-report banks of word/clue pairs; a warm bank makes a new game a local sample
+word_bank = WordBank()
+WORD_BANK_ENABLED = os.getenv("WORD_BANK_ENABLED", "1") != "0"
+
+# Cleaned text, GRI analysis and company per report content, so repeats skip straight
+# to word generation (versioned by the code and standards; see artifact_store.py)
+artifact_store = ArtifactStore()
+ARTIFACTS_ENABLED = os.getenv("ARTIFACTS_ENABLED", "1") != "0"
+_artifact_version = None
 
 # Preloading system to avoid wait times for the user
-preloaded_games = Queue(maxsize=2)  # Store up to 2 preloaded games logic
-preload_lock = threading.Lock()     # Thread safety for queue access
-is_preloading = False               # Flag to prevent multiple preloader threads
+# Games live in a SQLite pool shared by all workers and kept across restarts;
+# one process at a time (the producer) refills it between the preloader watermarks
+game_pool = GamePool()
+PRELOADER_ENABLED = os.getenv("PRELOADER_ENABLED", "1") != "0"
 
 class PDFScraper:
     def __init__(self):
         self.pdfs_processed = 0
 
+    def iter_pages(self, source, max_pages=MAX_PAGES):
+        """Yields (page_no, text) as each page is extracted, so callers can stop early"""
+        return iter_source_pages(source, max_pages=max_pages)
+
     def download_pdf_text(self, url):
         """Downloads a PDF from a URL and extracts its text"""
         print(f"📄 Downloading PDF from {url}...")
         try:
-            # unique user agent to avoid being blocked by some servers
-            response = requests.get(url, timeout=60)
-            response.raise_for_status()
-            
-            f = io.BytesIO(response.content)
-            reader = PdfReader(f)
-            
-            text = ""
-            # Limit to first 50 pages to prevent processing overload on huge reports
-            max_pages = min(50, len(reader.pages))
-            for i, page in enumerate(reader.pages[:max_pages]): 
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
+            # Served from the on-disk cache when this report was downloaded before
+            page_texts = [extracted for _, extracted in self.iter_pages(url)]
+            text = join_pages(page_texts)
             
             self.pdfs_processed += 1
-            print(f"✅ Successfully extracted text from PDF ({len(text)} chars, {max_pages} pages)")
+            print(f"✅ Successfully extracted text from PDF ({len(text)} chars, {len(page_texts)} pages)")
             return text
         except Exception as e:
             print(f"❌ Error processing {url}: {e}")
@@ -73,120 +126,84 @@ class PDFScraper:
 
     def analyze_gri_compliance(self, pdf_content):
         """Compare PDF content against GRI standards"""
+        return self.analyze_with_hits(pdf_content)[0]
+
+    def analyze_with_hits(self, pdf_content):
+        """analyze_gri_compliance() that also returns the phrase_id -> first (start, end) hits"""
         print("\n🔍 Analyzing PDF against GRI Standards...")
-        
-        pdf_lower = pdf_content.lower()
-        
-        analysis = {
-            'missing_standards': [],
-            'misleading_content': [],
-            'compliant_standards': []
-        }
-        
-        # Check each GRI standard
-        for gri_code, standard in GRI_STANDARDS.items():
-            keywords_found = []
-            metrics_found = []
-            
-            for keyword in standard['keywords']:
-                if keyword.lower() in pdf_lower:
-                    keywords_found.append(keyword)
-            
-            for metric in standard['required_metrics']:
-                if metric.lower() in pdf_lower:
-                    metrics_found.append(metric)
-            
-            if not keywords_found and not metrics_found:
-                analysis['missing_standards'].append({
-                    'code': gri_code,
-                    'title': standard['title'],
-                    'reason': f"No keywords or metrics found for {standard['title']}"
-                })
-            elif keywords_found and not metrics_found:
-                analysis['misleading_content'].append({
-                    'code': gri_code,
-                    'title': standard['title'],
-                    'reason': f"Mentions {', '.join(keywords_found[:2])} but lacks quantitative metrics",
-                    'keywords': keywords_found
-                })
-            elif keywords_found and metrics_found:
-                analysis['compliant_standards'].append({
-                    'code': gri_code,
-                    'title': standard['title'],
-                    'keywords': keywords_found,
-                    'metrics': metrics_found
-                })
-        
-        # Check for bias/fluff words
-        bias_findings = []
-        for bias_word in BIAS_FLUFF_WORDS:
-            if bias_word.lower() in pdf_lower:
-                pattern = r'(.{0,50}' + re.escape(bias_word) + r'.{0,50})'
-                matches = re.findall(pattern, pdf_lower, re.IGNORECASE)
-                if matches:
-                    bias_findings.append({
-                        'word': bias_word,
-                        'context': matches[0].strip()
-                    })
-        
-        if bias_findings:
-            # Limit to top 5 bias findings to avoid overwhelming the analysis
-            for finding in bias_findings[:5]:
-                analysis['misleading_content'].append({
-                    'code': 'BIAS',
-                    'title': 'Marketing Language',
-                    'reason': f"Uses subjective term '{finding['word']}' without data",
-                    'word': finding['word']
-                })
-        
-        print(f"\n📊 GRI Compliance Analysis:")
-        print(f"   ❌ Missing Standards: {len(analysis['missing_standards'])}")
-        print(f"   ⚠️  Misleading Content: {len(analysis['misleading_content'])}")
-        print(f"   ✅ Compliant Standards: {len(analysis['compliant_standards'])}")
-        
-        return analysis
+        return analyze_text(pdf_content)
 
-def load_game_state():
-    """Load game state from JSON file"""
-    try:
-        with open(GAME_STATE_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {'used_pdfs': [], 'all_pdfs': PDF_URLS}
+    def refresh_analysis(self, artifact, verbose=True):
+        """Stored analysis brought up to date with the standards (see gri_analysis.refresh_analysis)"""
+        return refresh_analysis(artifact, verbose)
 
-def save_game_state(state):
-    """Save game state to JSON file"""
-    with open(GAME_STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
+    def analyze_spilled_report(self, spilled):
+        """analyze_gri_compliance() for a SpilledText, whose phrases were matched as it was written"""
+        print("\n🔍 Analyzing PDF against GRI Standards...")
+        return compliance_from_hits(spilled.first_hits, spilled.context)
 
 def get_next_pdf():
-    """Get next random unused PDF"""
-    state = load_game_state()
-    
-    # If all PDFs used, reset to allow replaying
-    if len(state['used_pdfs']) >= len(PDF_URLS):
-        print("\n🔄 All PDFs used! Resetting...")
-        state['used_pdfs'] = []
+    """Get next PDF from the shuffled deck (atomic across threads and worker processes)"""
+    selected, reset = game_state.next_pdf(PDF_URLS)
+    if reset:
+        print("\n🔄 All PDFs used! Reshuffling...")
+    return selected
+
+def findings_weight(gri_analysis):
+    """Reports with more missing/misleading findings make better games, so deal them more often"""
+    findings = len(gri_analysis['missing_standards']) + len(gri_analysis['misleading_content'])
+    return 1 + findings // 4
+
+def build_gri_context(gri_analysis):
+    """Summarize the GRI findings (top 3 of each kind) for the word generation prompt"""
+    gri_context_parts = []
     
-    # Get unused PDFs list
-    unused = [pdf for pdf in PDF_URLS if pdf not in state['used_pdfs']]
+    if gri_analysis['missing_standards']:
+        missing = [f"{item['code']} - {item['title']}" for item in gri_analysis['missing_standards'][:3]]
+        gri_context_parts.append(f"Missing Standards: {', '.join(missing)}")
     
-    # Pick random PDF from unused list
-    selected = random.choice(unused)
+    if gri_analysis['misleading_content']:
+        misleading = []
+        for item in gri_analysis['misleading_content'][:3]:
+            if item['code'] == 'BIAS':
+                misleading.append(f"Bias word '{item['word']}'")
+            else:
+                misleading.append(f"{item['code']} - {item['reason']}")
+        gri_context_parts.append(f"Misleading: {'; '.join(misleading)}")
     
-    # Mark as used and save state
-    state['used_pdfs'].append(selected)
-    save_game_state(state)
+    if gri_analysis['compliant_standards']:
+        compliant = [f"{item['code']} - {item['title']}" for item in gri_analysis['compliant_standards'][:3]]
+        gri_context_parts.append(f"Compliant: {', '.join(compliant)}")
     
-    return selected
+    return "\n".join(gri_context_parts) if gri_context_parts else "No GRI analysis available"
+
+def create_message(call, **kwargs):
+    """Claude messages call that records its latency and token usage under `call` for /metrics"""
+    with telemetry.LLM_SECONDS.time(call=call):
+        try:
+            message = get_client().messages.create(model=CLAUDE_MODEL, **kwargs)
+        except Exception:
+            telemetry.LLM_ERRORS.inc(call=call)
+            raise
+    usage = getattr(message, 'usage', None)
+    if usage is not None:
+        telemetry.LLM_TOKENS.inc(usage.input_tokens, call=call, direction='input')
+        telemetry.LLM_TOKENS.inc(usage.output_tokens, call=call, direction='output')
+    return message
+
+def report_context(call, pdf_content, max_chars, max_tokens):
+    """The part of the report sent with the `call` prompt (prefix or ranked, per CONTEXT_MODE)"""
+    with telemetry.STAGE_SECONDS.time(stage='build_context'):
+        context = prompt_context(pdf_content, max_chars, max_tokens)
+    telemetry.PROMPT_CONTEXT_CHARS.observe(len(context), call=call)
+    return context
 
 def extract_company_name(pdf_content):
     """Extract the company name from PDF content using Claude"""
-    max_chars = 8000
-    truncated_content = pdf_content[:max_chars]
+    truncated_content = report_context('company', pdf_content, COMPANY_CONTEXT_CHARS, COMPANY_CONTEXT_TOKENS)
     
-    message = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
+    message = create_message(
+        'company',
         max_tokens=100,
         messages=[
             {
@@ -208,33 +225,12 @@ Respond with ONLY the company name, nothing else. No explanations."""
 
 def generate_words_from_pdf(pdf_content, company_name, gri_analysis, count=5):
     """Generate words and clues using Claude based on PDF content and GRI analysis"""
-    max_chars = 6000
-    truncated_content = pdf_content[:max_chars]
-    
-    # Build GRI context string
-    gri_context_parts = []
-    
-    if gri_analysis['missing_standards']:
-        missing = [f"{item['code']} - {item['title']}" for item in gri_analysis['missing_standards'][:3]]
-        gri_context_parts.append(f"Missing Standards: {', '.join(missing)}")
+    truncated_content = report_context('words', pdf_content, WORDS_CONTEXT_CHARS, WORDS_CONTEXT_TOKENS)
     
-    if gri_analysis['misleading_content']:
-        misleading = []
-        for item in gri_analysis['misleading_content'][:3]:
-            if item['code'] == 'BIAS':
-                misleading.append(f"Bias word '{item['word']}'")
-            else:
-                misleading.append(f"{item['code']} - {item['reason']}")
-        gri_context_parts.append(f"Misleading: {'; '.join(misleading)}")
+    gri_context = build_gri_context(gri_analysis)
     
-    if gri_analysis['compliant_standards']:
-        compliant = [f"{item['code']} - {item['title']}" for item in gri_analysis['compliant_standards'][:3]]
-        gri_context_parts.append(f"Compliant: {', '.join(compliant)}")
-    
-    gri_context = "\n".join(gri_context_parts) if gri_context_parts else "No GRI analysis available"
-    
-    message = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
+    message = create_message(
+        'words',
         max_tokens=2000,
         messages=[
             {
@@ -293,6 +289,179 @@ No explanations, no numbering, just word then clue, alternating."""
     # Return limited count
     return words[:count], clues[:count]
 
+def parse_json_response(response_text):
+    """Parse a JSON object from an LLM reply (tolerates code fences or text around it)"""
+    start = response_text.find('{')
+    end = response_text.rfind('}')
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object in response")
+    return json.loads(response_text[start:end + 1])
+
+def company_name_variants(company_name):
+    """Lowercase name plus its distinctive parts (e.g. 'shein' from 'SHEIN Group Ltd.')"""
+    generic = {'group', 'limited', 'ltd', 'inc', 'corp', 'corporation', 'company', 'the',
+               'llp', 'plc', 'global', 'international', 'holdings', 'network', 'and'}
+    name = company_name.lower().strip()
+    parts = [p for p in re.findall(r'[a-z0-9&]+', name) if len(p) >= 3 and p not in generic]
+    return [v for v in [name] + parts if v]
+
+def filter_word_pairs(pairs, company_name, limit):
+    """
+    Keep word/clue pairs that fit the board and don't give the company away.
+    Other keys on each pair (e.g. GRI tags) are passed through.
+    
+    Returns:
+        List of at most `limit` pair dicts with uppercase 'word' and stripped 'clue'
+    """
+    variants = company_name_variants(company_name)
+    kept = []
+    seen = set()
+    for pair in pairs:
+        if not isinstance(pair, dict):
+            continue
+        word = str(pair.get('word', '')).strip().upper()
+        clue = str(pair.get('clue', '')).strip()
+        # Words must be 3-8 letters to fit the board, with no duplicates
+        if not re.fullmatch(r'[A-Z]{3,8}', word) or word in seen or not clue:
+            continue
+        # No clue (or word) may contain the company name or a distinctive part of it
+        if any(v in clue.lower() or v == word.lower() for v in variants):
+            continue
+        seen.add(word)
+        kept.append({**pair, 'word': word, 'clue': clue})
+        if len(kept) == limit:
+            break
+    return kept
+
+def validate_word_pairs(pairs, company_name, count):
+    """
+    Validate pairs for one game.
+    
+    Returns:
+        (words, clues) with at most `count` entries each
+    """
+    kept = filter_word_pairs(pairs, company_name, count)
+    return [p['word'] for p in kept], [p['clue'] for p in kept]
+
+def generate_game_content(pdf_content, gri_analysis, count=5):
+    """
+    Identify the company and generate words/clues in ONE structured Claude call.
+    
+    Returns:
+        (company_name, words, clues)
+    """
+    truncated_content = report_context('combined', pdf_content, COMPANY_CONTEXT_CHARS, WORDS_CONTEXT_TOKENS)
+    gri_context = build_gri_context(gri_analysis)
+    # Ask for a few spares so pairs failing validation can be dropped
+    requested = count + 3
+    
+    message = create_message(
+        'combined',
+        max_tokens=2000,
+        messages=[
+            {
+                "role": "user", 
+                "content": f"""I have extracted text from a sustainability report PDF. Identify the main company the report is about, then generate {requested} words for a word search game based on the content and GRI compliance analysis.
+
+PDF Content:
+---
+{truncated_content}
+---
+
+GRI COMPLIANCE FINDINGS:
+{gri_context}
+
+For each word:
+1. Extract or identify a KEY TERM from the PDF (3-8 letters MAXIMUM, letters only, uppercase)
+2. Create a clue based on information from the PDF OR GRI findings (missing/misleading metrics)
+
+CRITICAL RULES:
+- DO NOT mention the company name or any variation of it in the clues or words
+- Every word must be 3-8 letters long to fit the board
+- The clues should be generic enough that players have to guess which company this is
+- The clues should be fun, engaging, simple, and educational
+- The clues should be fill-in-the-blank style as well. Example: "A metric this report fails to disclose: _____ consumption"
+- You can reference missing metrics (e.g., "A metric this report fails to disclose")
+- You can highlight misleading language (e.g., "Vague term used without supporting data")
+- You can reference bias words (e.g., "Subjective claim without evidence")
+- Focus on metrics, initiatives, practices, or general concepts from the PDF
+
+Respond with ONLY a JSON object in exactly this shape, no explanations:
+{{"company_name": "Company Name", "words": [{{"word": "WORD", "clue": "Clue without the company name"}}]}}"""
+            }
+        ]
+    )
+    
+    result = parse_json_response(message.content[0].text)
+    company_name = str(result.get('company_name', '')).strip()
+    if not company_name:
+        raise ValueError("Response has no company_name")
+    words, clues = validate_word_pairs(result.get('words', []), company_name, count)
+    if len(words) < count:
+        raise ValueError(f"Only {len(words)} of {count} words passed validation")
+    return company_name, words, clues
+
+def generate_word_bank(pdf_content, gri_analysis, size=WORD_BANK_SIZE):
+    """
+    Ask Claude once for a large, GRI-tagged pool of word/clue pairs for a report.
+    
+    Returns:
+        (company_name, entries) where entries are dicts with word, clue, gri_code and status
+    """
+    truncated_content = report_context('word_bank', pdf_content, COMPANY_CONTEXT_CHARS, WORD_BANK_CONTEXT_TOKENS)
+    
+    # Every finding (not just the top 3) so the pool can cover all of them
+    findings = []
+    for status, key in [('missing', 'missing_standards'), ('misleading', 'misleading_content'),
+                        ('compliant', 'compliant_standards')]:
+        for item in gri_analysis[key]:
+            detail = f"bias word '{item['word']}'" if item['code'] == 'BIAS' else item['title']
+            findings.append(f"- {status}: {item['code']} ({detail})")
+    findings_text = "\n".join(findings) if findings else "No GRI analysis available"
+    
+    message = create_message(
+        'word_bank',
+        max_tokens=4000,
+        messages=[
+            {
+                "role": "user", 
+                "content": f"""I have extracted text from a sustainability report PDF. Identify the main company the report is about, then build a bank of {size} words for word search games based on the content and GRI compliance analysis.
+
+PDF Content:
+---
+{truncated_content}
+---
+
+GRI COMPLIANCE FINDINGS (status: code):
+{findings_text}
+
+For each word:
+1. Extract or identify a KEY TERM from the PDF (3-8 letters MAXIMUM, letters only, uppercase)
+2. Create a clue based on information from the PDF OR GRI findings (missing/misleading metrics)
+3. Tag it with the GRI code the clue is about ("BIAS" for marketing language, "" if none)
+4. Tag it with the status of that finding: "missing", "misleading", "compliant" or "general"
+
+CRITICAL RULES:
+- DO NOT mention the company name or any variation of it in the clues or words
+- Every word must be 3-8 letters long to fit the board, and every word must be different
+- Spread the words across as many different findings as possible
+- The clues should be generic enough that players have to guess which company this is
+- The clues should be fun, engaging, simple, and educational
+- The clues should be fill-in-the-blank style as well. Example: "A metric this report fails to disclose: _____ consumption"
+
+Respond with ONLY a JSON object in exactly this shape, no explanations:
+{{"company_name": "Company Name", "words": [{{"word": "WORD", "clue": "Clue", "gri_code": "GRI 305", "status": "missing"}}]}}"""
+            }
+        ]
+    )
+    
+    result = parse_json_response(message.content[0].text)
+    company_name = str(result.get('company_name', '')).strip()
+    if not company_name:
+        raise ValueError("Response has no company_name")
+    entries = filter_word_pairs(result.get('words', []), company_name, size)
+    return company_name, entries
+
 @app.route('/')
 def index():
     """Serve the game HTML"""
@@ -301,6 +470,167 @@ def index():
 
 def generate_game_data():
     """Generate game data from next random PDF (used by preloader and on-demand)"""
+    with PeakRSS() as rss:
+        game_data = _generate_game_data()
+    if rss.growth_bytes is not None:
+        telemetry.GENERATION_PEAK_RSS.observe(rss.peak_bytes)
+        telemetry.GENERATION_RSS_GROWTH.observe(rss.growth_bytes)
+        growth_mb = rss.growth_bytes / 1024 / 1024
+        print(f"🧠 Peak RSS {rss.peak_bytes / 1024 / 1024:.0f} MB (+{growth_mb:.1f} MB during generation)")
+        if rss.growth_bytes > MEMORY_BUDGET_BYTES:
+            print(f"⚠️ Generation grew RSS past the {MEMORY_BUDGET_BYTES // (1024 * 1024)} MB budget")
+    return game_data
+
+
+def artifact_version():
+    """
+    Hash of the code stored artifacts depend on: extraction, cleaning, tokenization
+    (the stored hit tables use its token boundaries), phrase matching and the company
+    lookup. The standards database is not part of it; stored analyses are brought up
+    to date with it incrementally (see refresh_analysis). Computed on first use
+    (reading the sources at import would slow worker start).
+    """
+    global _artifact_version
+    if _artifact_version is None:
+        import hashlib
+        import inspect
+        import context_builder
+        import gri_analysis
+        import gri_matcher
+        import pdf_text
+        import phrase_matcher
+        import report_index
+        import standards_catalog
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps([MAX_PAGES, CLAUDE_MODEL]).encode())
+        for code in [pdf_text, report_index, phrase_matcher, standards_catalog, gri_matcher, gri_analysis,
+                     context_builder, PDFScraper, extract_company_name, report_context]:
+            hasher.update(inspect.getsource(code).encode())
+        _artifact_version = hasher.hexdigest()[:16]
+        pruned = artifact_store.prune(_artifact_version)
+        if pruned:
+            print(f"🧹 Dropped {pruned} artifacts from retired code versions")
+    return _artifact_version
+
+def remember_company(doc_key, company_name):
+    """Store the identified company with the report's artifacts, so repeats skip the lookup"""
+    if ARTIFACTS_ENABLED and doc_key and company_name:
+        artifact_store.set_company(doc_key, artifact_version(), company_name)
+
+def reanalyze_artifacts(batch_size=100):
+    """
+    Update every stored analysis computed against an older standards database, in
+    batches of one transaction each. Only standards whose phrases changed are rescanned.
+    
+    Returns:
+        Number of reports updated
+    """
+    version = artifact_version()
+    scraper = PDFScraper()
+    stale = artifact_store.stale_analyses(version, STANDARDS_FINGERPRINT)
+    updated = 0
+    for i in range(0, len(stale), batch_size):
+        updates = []
+        for doc_key in stale[i:i + batch_size]:
+            artifact = artifact_store.get(doc_key, version, touch=False)
+            refreshed = scraper.refresh_analysis(artifact, verbose=False) if artifact else None
+            if refreshed:
+                updates.append((doc_key, *refreshed, STANDARDS_FINGERPRINT))
+        artifact_store.update_analyses(version, updates)
+        updated += len(updates)
+    return updated
+
+@app.cli.command('prune-artifacts')
+def prune_artifacts_command():
+    """Retire every artifact version but the current code's (run once a deploy has finished)"""
+    version = artifact_version()
+    artifact_store.retire(keep=version)
+    print(f"✅ Dropped {artifact_store.prune(version)} artifacts from older code versions")
+
+@app.cli.command('reanalyze')
+def reanalyze_command():
+    """Bring stored GRI analyses up to date after editing the standards catalog"""
+    started = time.time()
+    updated = reanalyze_artifacts()
+    print(f"✅ Re-analyzed {updated} stored reports in {time.time() - started:.1f}s")
+
+def extract_and_analyze(scraper, pdf_url, early_company_lookup=False):
+    """
+    Download, extract, clean and analyze a report.
+    
+    Args:
+        early_company_lookup: Start the company lookup as soon as the first pages are
+            in (only when the two-call flow is going to use it)
+    
+    Returns:
+        (cleaned_content, gri_analysis, first_hits, company_future) or None if no text
+        could be extracted; first_hits are the matcher hits the analysis was built from
+        and company_future is the early company lookup if one was started, else None
+    """
+    # Process PDF page by page; the company lookup only needs the first pages,
+    # so it starts as soon as they are in while later pages are still extracting
+    print(f"📄 Downloading PDF from {pdf_url}...")
+    page_texts = []
+    page_count = 0
+    # Bounded-memory mode: pages stream through cleaning and phrase matching into a
+    # spill file, and only the prefix the prompts use is kept as a string
+    spilled = SpilledText(GRI_MATCHER, PROMPT_PREFIX_CHARS) if BOUNDED_MEMORY else None
+    # Cleaned text so far, grown page by page until it is long enough for the lookup
+    prefix = ""
+    prefix_normalizer = WhitespaceNormalizer()
+    company_future = None
+    try:
+        try:
+            for page_no, page_text in scraper.iter_pages(pdf_url):
+                page_count += 1
+                if spilled:
+                    spilled.add_page(page_text)
+                else:
+                    page_texts.append(page_text)
+                if early_company_lookup and company_future is None:
+                    if spilled:
+                        prefix = spilled.prefix
+                    elif page_text:
+                        # Same text as clean_text(join_pages(page_texts)), one page at a time
+                        prefix += prefix_normalizer.feed(page_text + "\n")
+                    if len(prefix) >= COMPANY_CONTEXT_CHARS:
+                        print(f"\n🔍 Identifying company from first {page_no + 1} pages...")
+                        company_future = llm_executor.submit(extract_company_name, prefix)
+        except Exception as e:
+            print(f"❌ Error processing {pdf_url}: {e}")
+            return None
+        
+        if spilled:
+            if not spilled.chars:
+                return None
+            where = "disk" if spilled.spilled_to_disk else "memory"
+            print(f"✅ Successfully extracted text from PDF ({spilled.chars} chars cleaned, "
+                  f"{page_count} pages, spilled to {where})")
+            cleaned_content = spilled.prefix
+            with telemetry.STAGE_SECONDS.time(stage='analyze'):
+                gri_analysis = scraper.analyze_spilled_report(spilled)
+            first_hits = spilled.first_hits
+        else:
+            pdf_content = join_pages(page_texts)
+            if not pdf_content:
+                return None
+            print(f"✅ Successfully extracted text from PDF ({len(pdf_content)} chars, {page_count} pages)")
+            
+            # Clean text
+            with telemetry.STAGE_SECONDS.time(stage='clean'):
+                cleaned_content = scraper.clean_text(pdf_content)
+            del page_texts, pdf_content
+            
+            # Analyze GRI compliance
+            with telemetry.STAGE_SECONDS.time(stage='analyze'):
+                gri_analysis, first_hits = scraper.analyze_with_hits(cleaned_content)
+    finally:
+        if spilled:
+            spilled.close()
+    return cleaned_content, gri_analysis, first_hits, company_future
+
+
+def _generate_game_data():
     print("\n" + "="*60)
     print("🎮 Generating Game Data...")
     print("="*60)
@@ -309,80 +639,248 @@ def generate_game_data():
     pdf_url = get_next_pdf()
     print(f"\n📌 Selected PDF: {pdf_url}")
     
-    # Process PDF
+    # Warm word bank: sample locally, no download or LLM call needed
+    if WORD_BANK_ENABLED:
+        sampled = word_bank.sample(pdf_url, count=5)
+        if sampled:
+            company_name, words, clues = sampled
+            print(f"📚 Sampled from word bank for {company_name}")
+            telemetry.GAMES_GENERATED.inc(path='word_bank_warm')
+            return finish_game_data(words, clues, company_name)
+    
+    # A report processed before (same content, same code and standards) comes back
+    # from the artifact store: no extraction, analysis or company lookup
     scraper = PDFScraper()
-    pdf_content = scraper.download_pdf_text(pdf_url)
+    doc_key = None
+    artifact = None
+    if ARTIFACTS_ENABLED:
+        try:
+            with telemetry.STAGE_SECONDS.time(stage='resolve'):
+                doc_key = document_key(pdf_url, max_pages=MAX_PAGES)
+        except Exception as e:
+            print(f"❌ Error processing {pdf_url}: {e}")
+            telemetry.GAMES_GENERATED.inc(path='failed')
+            return None
+        if doc_key:
+            artifact = artifact_store.get(doc_key, artifact_version())
     
-    if not pdf_content:
-        return None
+    company_future = None
+    known_company = None
+    if artifact:
+        known_company = artifact['company_name']
+        print(f"♻️ Reusing cleaned text ({len(artifact['text'])} chars), GRI analysis"
+              f"{' and company ' + known_company if known_company else ''} from an earlier run")
+        # Bounded-memory mode only ever keeps what the prompts use
+        gri_analysis = artifact['analysis']
+        # Standards edited since: re-evaluate just the changed ones from the stored hits
+        refreshed = scraper.refresh_analysis(artifact)
+        if refreshed:
+            gri_analysis, hits, fingerprints = refreshed
+            artifact_store.update_analyses(artifact_version(), [
+                (doc_key, gri_analysis, hits, fingerprints, STANDARDS_FINGERPRINT)])
+        cleaned_content = artifact['text'][:PROMPT_PREFIX_CHARS] if BOUNDED_MEMORY else artifact['text']
+    else:
+        # The cold word bank names the company itself; an early lookup would be a wasted call
+        processed = extract_and_analyze(scraper, pdf_url,
+                                        early_company_lookup=LLM_MODE == 'two_call' and not WORD_BANK_ENABLED)
+        if processed is None:
+            telemetry.GAMES_GENERATED.inc(path='failed')
+            return None
+        cleaned_content, gri_analysis, first_hits, company_future = processed
+        # Bounded-memory mode has only the prefix of the text, not a reusable artifact
+        if doc_key and not BOUNDED_MEMORY:
+            artifact_store.put(doc_key, artifact_version(), cleaned_content, gri_analysis,
+                               hit_table(first_hits), STANDARD_FINGERPRINTS, STANDARDS_FINGERPRINT)
+    game_state.set_weight(pdf_url, findings_weight(gri_analysis))
     
-    # Clean text
-    cleaned_content = scraper.clean_text(pdf_content)
+    # Cold word bank: one call fills the bank for every future game from this report
+    if WORD_BANK_ENABLED:
+        try:
+            print(f"\n📚 Building word bank ({WORD_BANK_SIZE} words)...")
+            company_name, entries = generate_word_bank(cleaned_content, gri_analysis)
+            remember_company(doc_key, company_name)
+            word_bank.put(pdf_url, company_name, entries)
+            sampled = word_bank.sample(pdf_url, count=5)
+            if sampled:
+                company_name, words, clues = sampled
+                print(f"✅ Found company: {company_name} ({len(entries)} words banked)")
+                telemetry.GAMES_GENERATED.inc(path='word_bank_cold')
+                return finish_game_data(words, clues, company_name)
+            print(f"⚠️ Only {len(entries)} valid words in bank, generating this game directly")
+        except ValueError as e:
+            print(f"⚠️ Word bank generation failed ({e}), generating this game directly")
+    
+    # Company known from an earlier run: straight to word generation
+    if known_company:
+        print(f"\n🤖 Generating word search for {known_company}...")
+        words, clues = generate_words_from_pdf(cleaned_content, known_company, gri_analysis, count=5)
+        telemetry.GAMES_GENERATED.inc(path='known_company')
+        return finish_game_data(words, clues, known_company)
     
-    # Analyze GRI compliance
-    gri_analysis = scraper.analyze_gri_compliance(cleaned_content)
+    if LLM_MODE == 'combined':
+        llm_started = time.time()
+        try:
+            print(f"\n🤖 Identifying company and generating word search...")
+            company_name, words, clues = generate_game_content(cleaned_content, gri_analysis, count=5)
+            llm_latency['combined'].append(time.time() - llm_started)
+            print(f"✅ Found company: {company_name}")
+            remember_company(doc_key, company_name)
+            telemetry.GAMES_GENERATED.inc(path='combined')
+            return finish_game_data(words, clues, company_name)
+        except ValueError as e:
+            # Malformed structured reply: fall back to the two-call flow below
+            print(f"⚠️ Combined generation failed ({e}), falling back to two calls")
     
-    # Extract company name
-    print(f"\n🔍 Identifying company from PDF...")
-    company_name = extract_company_name(cleaned_content)
+    llm_started = time.time()
+    # Extract company name (short reports never filled the prefix, so ask now)
+    if company_future is None:
+        print(f"\n🔍 Identifying company from PDF...")
+        company_future = llm_executor.submit(extract_company_name, cleaned_content)
+    company_name = company_future.result()
     print(f"✅ Found company: {company_name}")
+    remember_company(doc_key, company_name)
     
     # Generate words and clues
     print(f"\n🤖 Generating word search...")
     words, clues = generate_words_from_pdf(cleaned_content, company_name, gri_analysis, count=5)
+    llm_latency['two_call'].append(time.time() - llm_started)
+    telemetry.GAMES_GENERATED.inc(path='two_call')
     
+    return finish_game_data(words, clues, company_name)
+
+
+def finish_game_data(words, clues, company_name):
+    """Log and package the generated game, with every word placed on the board"""
     print(f"\n📝 Generated words: {words}")
     print(f"💡 Generated clues: {clues}")
-    print(f"\n✅ Game data ready!\n")
     
-    return {
+    game_data = {
         'words': words,
         'clues': clues,
         'companyName': company_name
     }
+    try:
+        # Board is built server-side so every word is guaranteed to be on it
+        with telemetry.STAGE_SECONDS.time(stage='grid'):
+            game_data.update(build_grid(words))
+    except GridPlacementError as e:
+        # The client falls back to placing words itself
+        print(f"⚠️ {e}")
+    
+    print(f"\n✅ Game data ready!\n")
+    return game_data
+
+
+def generate_preloaded_game():
+    """Background generation, profiled separately from requests when PROFILE_ENABLED is set"""
+    with profiling.profile('preload', enabled=profiling.PROFILE_ENABLED):
+        return generate_game_data()
 
 
-def preload_game_worker():
-    """Background worker that keeps games preloaded"""
-    global is_preloading
-    while True:
-        # Check if we need more games in the buffer
-        if preloaded_games.qsize() < 2 and not is_preloading:
-            with preload_lock:
-                is_preloading = True
-            try:
-                print("🔄 Background: Preloading next game...")
-                game_data = generate_game_data()
-                if game_data:
-                    preloaded_games.put(game_data)
-                    print(f"✅ Background: Game preloaded (queue size: {preloaded_games.qsize()})")
-            except Exception as e:
-                print(f"⚠️ Background preload error: {e}")
-            finally:
-                with preload_lock:
-                    is_preloading = False
-        time.sleep(2)  # Check every 2 seconds for queue status
+# Background producers, woken whenever a game is claimed (created after generate_game_data)
+preloader = Preloader(game_pool, generate_preloaded_game)
+
+# Read from the shared pool / this process's producers at scrape time
+telemetry.POOL_DEPTH.set_function(game_pool.depth)
+telemetry.PRELOAD_IN_FLIGHT.set_function(lambda: preloader.in_flight)
 
 
 @app.route('/new-game')
 def new_game():
     """Get a preloaded game or generate on-demand"""
+    started = time.perf_counter()
     try:
         # Try to get a preloaded game first (instant!)
-        if not preloaded_games.empty():
+        game_data = game_pool.claim()
+        preloader.notify()  # wake the producers to top the pool back up
+        if game_data:
             print("⚡ Serving preloaded game!")
-            return jsonify(preloaded_games.get())
+            telemetry.NEW_GAME_REQUESTS.inc(source='pool')
+            return jsonify(game_data)
         
-        # Fallback: generate on-demand if queue is empty
+        # Fallback: generate on-demand if the pool is empty
         print("⏳ No preloaded game available, generating on-demand...")
-        game_data = generate_game_data()
+        # Profiled when PROFILE_ENABLED is set or the request sends "X-Profile: <PROFILE_TOKEN>"
+        with profiling.profile('request', enabled=profiling.should_profile(request.headers)) as run:
+            game_data = generate_game_data()
         if game_data:
-            return jsonify(game_data)
+            telemetry.NEW_GAME_REQUESTS.inc(source='on_demand')
+            response = jsonify(game_data)
+            if run.run_id:
+                # profiles/request/<run id>.pstats and .collapsed on the server
+                response.headers['X-Profile-Run'] = run.run_id
+            return response
+        telemetry.NEW_GAME_REQUESTS.inc(source='failed')
         return jsonify({'error': 'Failed to generate game'}), 500
         
     except Exception as e:
         print(f"❌ Error getting game: {e}")
+        telemetry.NEW_GAME_REQUESTS.inc(source='error')
         return jsonify({'error': str(e)}), 500
+    finally:
+        telemetry.STAGE_SECONDS.observe(time.perf_counter() - started, stage='new_game')
+
+
+@app.route('/llm-stats')
+def llm_stats():
+    """p50/p95 LLM time per game for the combined and two-call generation modes"""
+    return jsonify({
+        'mode': LLM_MODE,
+        **{
+            mode: {
+                'games': len(samples),
+                'p50_seconds': percentile(list(samples), 50),
+                'p95_seconds': percentile(list(samples), 95)
+            }
+            for mode, samples in llm_latency.items()
+        }
+    })
+
+
+@app.route('/preloader-status')
+def preloader_status():
+    """Pool depth, in-flight generations and refill latency"""
+    return jsonify(preloader.stats())
+
+
+@app.route('/metrics')
+def metrics():
+    """Stage latencies, LLM usage, cache and pool counters in the Prometheus text format"""
+    return Response(telemetry.render(), content_type=telemetry.CONTENT_TYPE)
+
+
+@app.route('/healthz')
+def healthz():
+    """
+    200 while this worker can serve games, 503 when it can't (so the load balancer
+    routes around it): the pool or state database can't be read, or its preloader
+    threads have died. An empty pool is not a failure - /new-game then generates on
+    demand - so its depth is only reported ('cold' status, and in /metrics).
+    """
+    try:
+        depth = game_pool.depth()
+        game_state.ping()
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 503
+    if PRELOADER_ENABLED and not preloader.alive():
+        return jsonify({'status': 'error', 'error': 'preloader threads died', 'pool_depth': depth}), 503
+    return jsonify({
+        'status': 'ok' if depth or not PRELOADER_ENABLED else 'cold',
+        'pool_depth': depth,
+        'preloader': PRELOADER_ENABLED,
+        'in_flight': preloader.in_flight
+    }), 200
+
+
+@app.before_request
+def start_preloader():
+    """
+    Start preloading in the worker that serves requests, never at import: under
+    gunicorn --preload the app is imported in the master and threads don't survive
+    the fork. gunicorn.conf.py also starts it right after each worker forks.
+    """
+    if PRELOADER_ENABLED:
+        preloader.start()
 
 
 if __name__ == '__main__':
@@ -391,9 +889,4 @@ if __name__ == '__main__':
     print("🎮 Game will auto-generate on page load")
     print("="*60 + "\n")
     
-    # Start background preloader
-    preload_thread = threading.Thread(target=preload_game_worker, daemon=True)
-    preload_thread.start()
-    print("🔄 Background preloader started")
-    
     app.run(debug=True, port=5000)
\ No newline at end of file
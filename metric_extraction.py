@@ -0,0 +1,146 @@
+import re
+
+import numpy as np
+
+from report_index import get_report_index
+
+# Numeric Metric Extraction
+# One precompiled pattern finds every "number [scale] unit" figure in a single pass.
+# Results come back as NumPy columns with values normalized to a canonical unit,
+# so thousands of disclosed figures per report can be aggregated without Python loops.
+
+# Canonical units (ids are positions in this list)
+CANONICAL_UNITS = ['GJ', 't', 'm3', 'ha', '%', 'h']
+
+# Unit spelling -> (canonical unit, factor to convert into it)
+UNIT_ALIASES = {
+    # Energy -> GJ
+    'gj': ('GJ', 1.0),
+    'gigajoules': ('GJ', 1.0),
+    'gigajoule': ('GJ', 1.0),
+    'tj': ('GJ', 1e3),
+    'terajoules': ('GJ', 1e3),
+    'joules': ('GJ', 1e-9),
+    'kwh': ('GJ', 0.0036),
+    'mwh': ('GJ', 3.6),
+    'gwh': ('GJ', 3600.0),
+    # Mass / emissions -> t
+    'tonnes': ('t', 1.0),
+    'tonne': ('t', 1.0),
+    'tons': ('t', 1.0),
+    'metric tons': ('t', 1.0),
+    'metric tonnes': ('t', 1.0),
+    'tco2e': ('t', 1.0),
+    'tco2': ('t', 1.0),
+    't co2e': ('t', 1.0),
+    'tonnes co2e': ('t', 1.0),
+    'metric tons co2e': ('t', 1.0),
+    'kg': ('t', 1e-3),
+    'ktco2e': ('t', 1e3),
+    # Water -> m3
+    'm3': ('m3', 1.0),
+    'cubic meters': ('m3', 1.0),
+    'cubic metres': ('m3', 1.0),
+    'megaliters': ('m3', 1e3),
+    'megalitres': ('m3', 1e3),
+    'liters': ('m3', 1e-3),
+    'litres': ('m3', 1e-3),
+    'gallons': ('m3', 0.00378541),
+    # Land -> ha
+    'hectares': ('ha', 1.0),
+    'ha': ('ha', 1.0),
+    'km2': ('ha', 100.0),
+    # Other
+    '%': ('%', 1.0),
+    'percent': ('%', 1.0),
+    'hours': ('h', 1.0),
+}
+
+SCALE_WORDS = {'thousand': 1e3, 'million': 1e6, 'billion': 1e9}
+
+# Alias lookup tables, indexed by raw unit id
+RAW_UNITS = list(UNIT_ALIASES)
+_RAW_UNIT_IDS = {alias: i for i, alias in enumerate(RAW_UNITS)}
+_UNIT_OF_RAW = np.array([CANONICAL_UNITS.index(UNIT_ALIASES[a][0]) for a in RAW_UNITS], dtype=np.int8)
+_FACTOR_OF_RAW = np.array([UNIT_ALIASES[a][1] for a in RAW_UNITS], dtype=np.float64)
+
+
+def _alias_pattern(alias):
+    # Let "metric tons" also match "metric  tons" / "metric\ntons"
+    return r'\s+'.join(re.escape(part) for part in alias.split())
+
+
+# Longest aliases first so "metric tons co2e" wins over "metric tons"
+METRIC_PATTERN = re.compile(
+    r'(?<![\w.,])(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+    r'(?:\s*(?P<scale>' + '|'.join(SCALE_WORDS) + r'))?'
+    r'\s*(?P<unit>' + '|'.join(_alias_pattern(a) for a in sorted(RAW_UNITS, key=len, reverse=True)) + r')'
+    r'(?![a-z0-9])',
+    re.IGNORECASE
+)
+
+
+def extract_metric_table(text):
+    """
+    Finds every number + unit figure in text.
+
+    Returns:
+        dict of equal-length NumPy arrays:
+            'value'    float64 value converted to the canonical unit
+            'unit'     int8 index into CANONICAL_UNITS
+            'raw_unit' int16 index into RAW_UNITS (the spelling used in the report)
+            'offset'   int64 char offset of the number
+            'sentence' int32 ReportIndex sentence id (-1 if outside any kept sentence)
+    """
+    numbers = []
+    scales = []
+    raw_units = []
+    offsets = []
+    for match in METRIC_PATTERN.finditer(text):
+        numbers.append(match.group('number'))
+        scales.append(match.group('scale') or '')
+        raw_units.append(' '.join(match.group('unit').lower().split()))
+        offsets.append(match.start())
+
+    if not offsets:
+        return {
+            'value': np.empty(0, dtype=np.float64),
+            'unit': np.empty(0, dtype=np.int8),
+            'raw_unit': np.empty(0, dtype=np.int16),
+            'offset': np.empty(0, dtype=np.int64),
+            'sentence': np.empty(0, dtype=np.int32)
+        }
+
+    # Everything from here on is column-wise
+    raw_unit = np.array([_RAW_UNIT_IDS[u] for u in raw_units], dtype=np.int16)
+    value = np.char.replace(np.array(numbers), ',', '').astype(np.float64)
+    scale = np.array([SCALE_WORDS.get(s.lower(), 1.0) for s in scales], dtype=np.float64)
+    value *= scale * _FACTOR_OF_RAW[raw_unit]
+    offset = np.array(offsets, dtype=np.int64)
+
+    # Map offsets onto the sentence spans of the report index
+    index = get_report_index(text)
+    starts = np.frombuffer(index.sentence_starts, dtype=np.int64)
+    ends = np.frombuffer(index.sentence_ends, dtype=np.int64)
+    if len(starts):
+        sentence = np.searchsorted(starts, offset, side='right') - 1
+        inside = (sentence >= 0) & (offset < ends[np.maximum(sentence, 0)])
+        sentence = np.where(inside, sentence, -1).astype(np.int32)
+    else:
+        # No sentence long enough to keep (e.g. "Energy: 50 kWh"): every figure is outside
+        sentence = np.full(len(offset), -1, dtype=np.int32)
+
+    return {
+        'value': value,
+        'unit': _UNIT_OF_RAW[raw_unit],
+        'raw_unit': raw_unit,
+        'offset': offset,
+        'sentence': sentence
+    }
+
+
+def totals_by_unit(table):
+    """Sum of all values per canonical unit, e.g. {'GJ': 1234.5, 't': 88.0, ...}"""
+    sums = np.bincount(table['unit'], weights=table['value'], minlength=len(CANONICAL_UNITS))
+    counts = np.bincount(table['unit'], minlength=len(CANONICAL_UNITS))
+    return {name: float(sums[i]) for i, name in enumerate(CANONICAL_UNITS) if counts[i]}
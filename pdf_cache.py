@@ -0,0 +1,433 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import telemetry
+
+try:
+    import fcntl  # cross-process locking (not available on Windows)
+except ImportError:
+    fcntl = None
+
+# PDF Download Cache
+# Content-addressed store for report PDFs shared by remote URLs and local files.
+# Blobs are stored once per SHA-256 of their bytes, remote copies are revalidated
+# with ETag / Last-Modified and served from disk on a 304 or when offline. Reports
+# read with Range requests keep the blocks that were fetched, keyed by URL, ETag and
+# size, so the next page-limited read of the same report needs no requests beyond
+# the HEAD. The size bound covers every blob and block file on disk; a file no entry
+# references any more is deleted.
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", ".pdf_cache")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_MB", "500")) * 1024 * 1024
+# Skip the conditional GET entirely if the copy was validated this recently
+PDF_CACHE_FRESH_SECONDS = int(os.getenv("PDF_CACHE_FRESH_SECONDS", "3600"))
+
+CHUNK_SIZE = 1024 * 1024
+# A blob no entry references yet may be a download about to be recorded by another
+# process; it is only deleted as unreferenced once it is this old
+ORPHAN_GRACE_SECONDS = 300
+
+
+def file_sha256(path):
+    """SHA-256 of a file's bytes, read in place (the cache key of its blob)"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class PDFCache:
+    def __init__(self, cache_dir=PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES,
+                 fresh_seconds=PDF_CACHE_FRESH_SECONDS):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.range_dir = os.path.join(cache_dir, 'ranges')
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.lock_file = os.path.join(cache_dir, '.lock')
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.range_dir, exist_ok=True)
+
+    # ----- index helpers -----
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and (where supported) an exclusive file lock"""
+        with self._lock:
+            with open(self.lock_file, 'a') as lock_fd:
+                if fcntl:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'entries': {}, 'ranges': {}}
+
+    def _save_index(self, index):
+        # Write to a temp file and rename so readers never see a partial index
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_file)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, f"{sha256}.pdf")
+
+    def range_path(self, name):
+        return os.path.join(self.range_dir, f"{name}.ranges")
+
+    def _entry_result(self, entry):
+        return {
+            'path': self.blob_path(entry['sha256']),
+            'sha256': entry['sha256'],
+            'size': entry['size'],
+            'source': entry['source']
+        }
+
+    def _record(self, key, entry):
+        """Store/refresh an index entry and evict least recently used blobs"""
+        with self._locked():
+            index = self._load_index()
+            entry['last_used'] = time.time()
+            previous = index['entries'].get(key)
+            index['entries'][key] = entry
+            # The content behind a URL changed: its old blob may now belong to no entry
+            if previous and previous['sha256'] != entry['sha256'] and not any(
+                    e['sha256'] == previous['sha256'] for e in index['entries'].values()):
+                self._remove_blob(previous['sha256'])
+            self._evict(index, keep=entry['sha256'])
+            self._save_index(index)
+
+    def _touch(self, key, **updates):
+        with self._locked():
+            index = self._load_index()
+            entry = index['entries'].get(key)
+            if entry:
+                entry.update(updates)
+                entry['last_used'] = time.time()
+                self._save_index(index)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _remove_blob(self, sha256):
+        self._remove(self.blob_path(sha256))
+
+    @staticmethod
+    def _files_on_disk(directory, suffix):
+        """name -> (size, mtime) of every file with the suffix, referenced or not"""
+        files = {}
+        with os.scandir(directory) as it:
+            for item in it:
+                if item.name.endswith(suffix):
+                    try:
+                        stat = item.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[item.name[:-len(suffix)]] = (stat.st_size, stat.st_mtime)
+        return files
+
+    def _blobs_on_disk(self):
+        """sha256 -> (size, mtime) of every blob file, referenced or not"""
+        return self._files_on_disk(self.blob_dir, '.pdf')
+
+    def _evict(self, index, keep=None):
+        """Drop unreferenced files, then least recently used entries, until the cache fits in max_bytes"""
+        entries = index['entries']
+        ranges = index.setdefault('ranges', {})
+        # Blobs are shared, so a blob is as recent as its most recent entry
+        blob_last_used = {}
+        for entry in entries.values():
+            sha = entry['sha256']
+            blob_last_used[sha] = max(blob_last_used.get(sha, 0), entry['last_used'])
+        range_names = {entry['name'] for entry in ranges.values()}
+
+        # Every file on disk counts against the budget, including ones no entry references
+        blobs = self._blobs_on_disk()
+        range_files = self._files_on_disk(self.range_dir, '.ranges')
+        total = sum(size for size, _ in blobs.values()) + sum(size for size, _ in range_files.values())
+        now = time.time()
+        for sha, (size, mtime) in blobs.items():
+            if sha not in blob_last_used and sha != keep and now - mtime > ORPHAN_GRACE_SECONDS:
+                self._remove_blob(sha)
+                total -= size
+        for name, (size, mtime) in range_files.items():
+            if name not in range_names and name != keep and now - mtime > ORPHAN_GRACE_SECONDS:
+                self._remove(self.range_path(name))
+                total -= size
+
+        candidates = [(last_used, 'blob', sha) for sha, last_used in blob_last_used.items()]
+        candidates += [(entry['last_used'], 'ranges', url) for url, entry in ranges.items()]
+        for _, kind, name in sorted(candidates):
+            if total <= self.max_bytes:
+                break
+            if kind == 'blob':
+                if name == keep:
+                    continue
+                for key in [k for k, e in entries.items() if e['sha256'] == name]:
+                    del entries[key]
+                self._remove_blob(name)
+                total -= blobs.get(name, (0, 0))[0]
+            else:
+                entry = ranges[name]
+                if entry['name'] == keep:
+                    continue
+                del ranges[name]
+                self._remove(self.range_path(entry['name']))
+                total -= range_files.get(entry['name'], (0, 0))[0]
+
+    def _lookup(self, key):
+        with self._locked():
+            entry = self._load_index()['entries'].get(key)
+        if entry and os.path.exists(self.blob_path(entry['sha256'])):
+            return entry
+        return None
+
+    def _store_stream(self, chunks):
+        """Write chunks to a temp file, hashing as we go, then move into the blob store"""
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        hasher.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            sha256 = hasher.hexdigest()
+            final_path = self.blob_path(sha256)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)  # identical content already stored
+            else:
+                os.replace(tmp_path, final_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256, size
+
+    # ----- public API -----
+
+    def fetch(self, url, timeout=60):
+        """
+        Returns the cached copy of a remote PDF, downloading or revalidating as needed.
+
+        Returns:
+            dict with 'path' (blob on disk), 'sha256', 'size' and 'source'
+        """
+        entry = self._lookup(url)
+
+        if entry and time.time() - entry.get('validated_at', 0) < self.fresh_seconds:
+            self.hits += 1
+            telemetry.PDF_CACHE_REQUESTS.inc(result='fresh')
+            self._touch(url)
+            return self._entry_result(entry)
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        import requests  # deferred: only needed once a report is actually downloaded
+
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, headers=headers, timeout=timeout, stream=True)
+        except requests.RequestException as e:
+            if entry:
+                # Offline or host down: the disk copy is better than nothing
+                print(f"⚠️ Could not revalidate {url} ({e}), serving cached copy")
+                self.hits += 1
+                telemetry.PDF_CACHE_REQUESTS.inc(result='stale')
+                self._touch(url)
+                return self._entry_result(entry)
+            raise
+
+        with response:
+            if response.status_code == 304 and entry:
+                self.hits += 1
+                telemetry.PDF_CACHE_REQUESTS.inc(result='revalidated')
+                self._touch(url, validated_at=time.time())
+                return self._entry_result(entry)
+
+            response.raise_for_status()
+            sha256, size = self._store_stream(response.iter_content(CHUNK_SIZE))
+
+        self.misses += 1
+        elapsed = time.perf_counter() - started
+        telemetry.PDF_CACHE_REQUESTS.inc(result='miss')
+        telemetry.DOWNLOAD_BYTES.inc(size)
+        if elapsed > 0:
+            telemetry.DOWNLOAD_BYTES_PER_SECOND.observe(size / elapsed)
+        new_entry = {
+            'source': url,
+            'sha256': sha256,
+            'size': size,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'validated_at': time.time()
+        }
+        self._record(url, new_entry)
+        return self._entry_result(new_entry)
+
+    def contains(self, url):
+        """True if a copy of the URL is stored (fresh or not), so fetch() is at most a revalidation"""
+        return self._lookup(url) is not None
+
+    def get_local(self, filepath):
+        """
+        Returns the cached copy of a local PDF so local and remote reports share one store.
+        The file is re-hashed only when its size or modification time changes.
+        """
+        abs_path = os.path.abspath(filepath)
+        key = f"file://{abs_path}"
+        stat = os.stat(abs_path)
+        entry = self._lookup(key)
+
+        if entry and entry.get('mtime') == stat.st_mtime and entry['size'] == stat.st_size:
+            self.hits += 1
+            self._touch(key)
+            return self._entry_result(entry)
+
+        with open(abs_path, 'rb') as f:
+            sha256, size = self._store_stream(iter(lambda: f.read(CHUNK_SIZE), b''))
+
+        self.misses += 1
+        new_entry = {
+            'source': key,
+            'sha256': sha256,
+            'size': size,
+            'mtime': stat.st_mtime
+        }
+        self._record(key, new_entry)
+        return self._entry_result(new_entry)
+
+    @staticmethod
+    def _range_name(url, etag, size):
+        return hashlib.sha256(f"{url}\n{etag}\n{size}".encode()).hexdigest()
+
+    def load_ranges(self, url, etag, size):
+        """
+        Blocks of a remote PDF stored by store_ranges() for this exact version of it.
+
+        Returns:
+            (block_size, {block number: bytes}), or None if nothing is stored
+        """
+        if not etag:
+            return None
+        name = self._range_name(url, etag, size)
+        with self._locked():
+            index = self._load_index()
+            entry = index.setdefault('ranges', {}).get(url)
+            if entry is None or entry['name'] != name:
+                return None
+            entry['last_used'] = time.time()
+            self._save_index(index)
+        try:
+            with open(self.range_path(name), 'rb') as f:
+                header = json.loads(f.readline())
+                blocks = {}
+                for block, length in zip(header['blocks'], header['lengths']):
+                    blocks[block] = f.read(length)
+        except (OSError, ValueError, KeyError):
+            return None
+        if any(len(blocks[b]) != length for b, length in zip(header['blocks'], header['lengths'])):
+            return None     # truncated file
+        return header['block_size'], blocks
+
+    def store_ranges(self, url, etag, size, block_size, blocks):
+        """
+        Keep the blocks fetched from a remote PDF with Range requests, replacing any
+        stored for an older version of the URL. Without a strong ETag nothing is stored.
+
+        Args:
+            blocks: {block number: bytes}, block_size bytes each (the last may be shorter)
+        """
+        if not etag or not blocks:
+            return
+        name = self._range_name(url, etag, size)
+        numbers = sorted(blocks)
+        header = json.dumps({'block_size': block_size, 'blocks': numbers,
+                             'lengths': [len(blocks[b]) for b in numbers]}).encode() + b"\n"
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                for b in numbers:
+                    f.write(blocks[b])
+            os.replace(tmp_path, self.range_path(name))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        with self._locked():
+            index = self._load_index()
+            ranges = index.setdefault('ranges', {})
+            previous = ranges.get(url)
+            if previous and previous['name'] != name:
+                self._remove(self.range_path(previous['name']))
+            ranges[url] = {'name': name, 'last_used': time.time()}
+            self._evict(index, keep=name)
+            self._save_index(index)
+
+    def stats(self):
+        """Hit/miss counters and current store size"""
+        with self._locked():
+            index = self._load_index()
+            blobs = self._blobs_on_disk()
+            range_files = self._files_on_disk(self.range_dir, '.ranges')
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(index['entries']),
+            'blobs': len(blobs),
+            'ranged_reports': len(index.get('ranges', {})),
+            'bytes': sum(size for size, _ in blobs.values()) + sum(size for size, _ in range_files.values()),
+            'max_bytes': self.max_bytes
+        }
+
+    def clear(self):
+        """Remove every cached blob and reset the index"""
+        with self._locked():
+            shutil.rmtree(self.blob_dir, ignore_errors=True)
+            shutil.rmtree(self.range_dir, ignore_errors=True)
+            os.makedirs(self.blob_dir, exist_ok=True)
+            os.makedirs(self.range_dir, exist_ok=True)
+            self._save_index({'entries': {}, 'ranges': {}})
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """Process-wide cache instance (created on first use)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PDFCache()
+        return _default_cache
@@ -0,0 +1,245 @@
+import hashlib
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import telemetry
+from pdf_cache import get_pdf_cache
+from range_fetch import PDF_RANGE_FETCH, PDF_RANGE_MIN_BYTES, open_ranged_report, probe_ranges
+
+# PDF Text Extraction
+# pypdf's extract_text() is pure-Python and CPU-bound, so large reports are split
+# into contiguous page ranges and extracted across a process pool. Each worker
+# opens the PDF from the same file on disk (the download cache blob), so no page
+# data is pickled between processes - only the extracted strings come back.
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# Below this many pages the pool start-up and re-parsing cost more than they save
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+# Chunks per worker, so one slow (image heavy) range doesn't hold up the rest
+CHUNKS_PER_WORKER = 2
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _mp_context():
+    # forkserver avoids forking a process that already runs Flask/preloader threads
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _get_executor(workers):
+    """Shared process pool, (re)created when the requested worker count changes"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown_pool():
+    """Stop the worker processes (they are restarted on the next parallel extraction)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+@contextmanager
+def open_reader(path):
+    """
+    PdfReader over a read-only mmap of the file. Given a path, pypdf reads the
+    whole file into a BytesIO; with the mmap the bytes stay in the page cache.
+    """
+    # pypdf is imported on first extraction so web workers that only serve pool games never load it
+    from pypdf import PdfReader
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file: let pypdf raise its usual error
+            yield PdfReader(path)
+            return
+        try:
+            yield PdfReader(mapped)
+        finally:
+            mapped.close()
+
+
+def _extract_range(path, start, stop):
+    """Worker: open the PDF and extract pages [start, stop)"""
+    with open_reader(path) as reader:
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _split_range(page_count, chunks):
+    """Split [0, page_count) into at most `chunks` contiguous, near-equal ranges"""
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def iter_page_texts(path, max_pages=None, workers=None, reader=None):
+    """
+    Yields (page_no, text) for each page of a PDF on disk, in page order, as soon as
+    the page is extracted. Closing the generator early stops pending extraction.
+
+    Args:
+        path: PDF file path (shared by all workers)
+        max_pages: Only extract the first N pages (None for all)
+        workers: Process count (defaults to PDF_EXTRACT_WORKERS, 1 forces serial)
+        reader: Already opened PdfReader for `path`, reused on the serial path
+    """
+    if reader is None:
+        with open_reader(path) as reader:
+            yield from iter_page_texts(path, max_pages, workers, reader)
+        return
+
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    page_count = len(reader.pages)
+    if max_pages is not None:
+        page_count = min(max_pages, page_count)
+
+    # Small documents: serial extraction from the reader we already have
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for i in range(page_count):
+            yield i, reader.pages[i].extract_text() or ""
+        return
+
+    executor = _get_executor(workers)
+    futures = [executor.submit(_extract_range, path, start, stop)
+               for start, stop in _split_range(page_count, workers * CHUNKS_PER_WORKER)]
+    try:
+        page_no = 0
+        # Wait on chunks in submission order so pages are yielded in order
+        for future in futures:
+            for text in future.result():
+                yield page_no, text
+                page_no += 1
+    finally:
+        # Consumer stopped early (or failed): drop chunks that haven't started
+        for future in futures:
+            future.cancel()
+
+
+def extract_page_texts(path, max_pages=None, workers=None, reader=None):
+    """
+    Extracts the text of each page of a PDF on disk.
+
+    Returns:
+        List of page texts in page order ("" for pages without text)
+    """
+    return [text for _, text in iter_page_texts(path, max_pages, workers, reader)]
+
+
+def _is_url(source):
+    return source.startswith(('http://', 'https://'))
+
+
+def _may_read_ranged(source, max_pages):
+    """Page-limited URLs not cached yet are tried with Range requests first"""
+    return (_is_url(source) and max_pages is not None and PDF_RANGE_FETCH
+            and not get_pdf_cache().contains(source))
+
+
+def document_key(source, max_pages=None):
+    """
+    Identity of a report's content, resolved before extraction: the SHA-256 of
+    its bytes (downloading it into the cache if needed, which iter_source_pages
+    then reuses). A report that will be read with Range requests is never
+    downloaded whole, so there its strong ETag and size stand in for the hash.
+
+    Returns:
+        Key string, or None if the content can't be identified up front
+    """
+    if _may_read_ranged(source, max_pages):
+        probed = probe_ranges(source)
+        if probed is not None and probed[0] >= PDF_RANGE_MIN_BYTES:
+            size, etag = probed
+            if not etag:
+                return None
+            return "etag:" + hashlib.sha256(f"{source}\n{etag}\n{size}".encode()).hexdigest()
+    cache = get_pdf_cache()
+    cached = cache.fetch(source, timeout=60) if _is_url(source) else cache.get_local(source)
+    return cached['sha256']
+
+
+def iter_source_pages(source, max_pages=None, workers=None):
+    """
+    Yields (page_no, text) for a report given as a URL or a local file path.
+    Both kinds of source are resolved through the shared PDF cache first, except
+    page-limited URLs not cached yet, which are read with Range requests when the
+    server supports them (see range_fetch.py); the blocks fetched that way are
+    cached too and reused while the report's ETag is unchanged.
+    """
+    cache = get_pdf_cache()
+    is_url = _is_url(source)
+    ranged = None
+    with telemetry.STAGE_SECONDS.time(stage='download'):
+        if _may_read_ranged(source, max_pages):
+            ranged = open_ranged_report(source, max_pages, cache=cache)
+        if ranged is None:
+            cached = cache.fetch(source, timeout=60) if is_url else cache.get_local(source)
+
+    # Only time spent inside this generator counts as extraction, not the caller's work between pages
+    busy = 0.0
+    resumed = time.perf_counter()
+    try:
+        if ranged is not None:
+            pages = _iter_ranged_pages(source, ranged, max_pages, workers)
+        else:
+            pages = iter_page_texts(cached['path'], max_pages=max_pages, workers=workers)
+        for page in pages:
+            busy += time.perf_counter() - resumed
+            telemetry.PAGES_EXTRACTED.inc()
+            yield page
+            resumed = time.perf_counter()
+        busy += time.perf_counter() - resumed
+    finally:
+        telemetry.STAGE_SECONDS.observe(busy, stage='extract')
+
+
+def _iter_ranged_pages(source, ranged, max_pages, workers):
+    """Serial extraction from a ranged reader; on a fetch or parse error the rest comes from a full download"""
+    next_page = 0
+    try:
+        for page_no, text in iter_page_texts(None, max_pages=max_pages, workers=1, reader=ranged.reader):
+            yield page_no, text
+            next_page = page_no + 1
+        file = ranged.file
+        print(f"📉 Read {next_page} pages of {source} with {file.requests} range requests "
+              f"({file.bytes_fetched:,} of {file.size:,} bytes)")
+        if file.requests:
+            # Next time the same version of the report is read from disk
+            try:
+                get_pdf_cache().store_ranges(source, file.etag, file.size, file.block_size, file.blocks())
+            except OSError as e:
+                print(f"⚠️ Could not cache the fetched ranges of {source}: {e}")
+        return
+    except Exception as e:
+        print(f"⚠️ Range reads of {source} failed at page {next_page} ({e}), downloading it whole")
+    cached = get_pdf_cache().fetch(source, timeout=60)
+    for page_no, text in iter_page_texts(cached['path'], max_pages=max_pages, workers=workers):
+        if page_no >= next_page:
+            yield page_no, text
+
+
+def join_pages(page_texts):
+    """Joins page texts the way the scrapers always have (one newline per non-empty page)"""
+    return "".join(text + "\n" for text in page_texts if text)
@@ -1,34 +1,36 @@
-import requests
-import io
 import re
-from pypdf import PdfReader
+from functools import lru_cache
+from pdf_text import iter_source_pages, join_pages
+from report_index import get_report_index
+from phrase_matcher import NgramMatcher
+from metric_extraction import extract_metric_table, totals_by_unit
 
 # PDF Scraper Utility Class
 # Handles downloading, reading, and simple text analysis of PDF documents
-import io
-import re
-from pypdf import PdfReader
+
+@lru_cache(maxsize=32)
+def keyword_matcher(keywords):
+    """NgramMatcher for a tuple of keywords (callers search the same lists repeatedly)"""
+    return NgramMatcher(list(keywords))
 
 class PDFScraper:
     def __init__(self):
         self.pdfs_processed = 0
 
+    def iter_pages(self, source, max_pages=None):
+        """
+        Yields (page_no, text) for a URL or local file as each page is extracted.
+        Stop iterating once you have enough text and the remaining pages are skipped.
+        """
+        return iter_source_pages(source, max_pages=max_pages)
+
     def download_pdf_text(self, url):
         """Downloads a PDF from a URL and extracts its text (all pages)."""
         print(f"Downloading PDF from {url}...")
         try:
-            response = requests.get(url, timeout=60)
-            response.raise_for_status()
-            
-            f = io.BytesIO(response.content)
-            reader = PdfReader(f)
-            
-            text = ""
-            # Extract text from all pages
-            for page in reader.pages: 
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
+            # Remote and local reports share one content-addressed store;
+            # pages are extracted in parallel across processes for large reports
+            text = join_pages(extracted for _, extracted in self.iter_pages(url))
             
             self.pdfs_processed += 1
             print(f"✅ Successfully extracted text from PDF ({self.pdfs_processed} processed)")
@@ -42,13 +44,7 @@ class PDFScraper:
         """Reads a PDF from local file path and extracts its text."""
         print(f"Reading PDF from {filepath}...")
         try:
-            reader = PdfReader(filepath)
-            
-            text = ""
-            for page in reader.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
+            text = join_pages(extracted for _, extracted in self.iter_pages(filepath))
             
             self.pdfs_processed += 1
             print(f"✅ Successfully extracted text from PDF ({self.pdfs_processed} processed)")
@@ -69,28 +65,33 @@ class PDFScraper:
         # Filter noise (sentences shorter than 30 chars are usually not useful content)
         return [s.strip() for s in sentences if len(s) > 30]
 
+    def get_index(self, text):
+        """Sentence offsets + inverted token index for text (built once, then cached)."""
+        return get_report_index(text)
+
     def search_keywords(self, text, keywords):
         """
         Searches for keywords in text.
         Returns dict with keyword matches and relevant sentences.
         """
-        text_lower = text.lower()
-        sentences = self.split_into_sentences(text)
+        index = self.get_index(text)
+        keywords = list(keywords)
         
         results = {
             'found_keywords': [],      # List of keywords actually found
             'relevant_sentences': []   # Sentences containing any of the keywords
         }
         
-        # Check existence of each keyword
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                results['found_keywords'].append(keyword)
+        # Keywords match whole tokens, all of them in one pass over the report
+        phrase_ids, starts, _ = keyword_matcher(tuple(keywords)).hits(index)
+        found = set(phrase_ids.tolist())
+        results['found_keywords'] = [keyword for i, keyword in enumerate(keywords) if i in found]
         
-        # Extract context sentences
-        for sentence in sentences:
-            if any(kw.lower() in sentence.lower() for kw in keywords):
-                results['relevant_sentences'].append(sentence)
+        # Extract context sentences (straight from the keyword hit offsets)
+        sentence_ids = {index.sentence_of(start) for start in set(starts.tolist())}
+        sentence_ids.discard(None)
+        for sentence_id in sorted(sentence_ids):
+            results['relevant_sentences'].append(index.sentence(sentence_id))
         
         return results
 
@@ -98,6 +99,10 @@ class PDFScraper:
         """
         Extracts numerical metrics from text based on patterns.
         
+        Units are matched with ReportIndex.find_phrase, so they match from the
+        start of a word and their last token may be a prefix: "ton" also finds
+        "1,000 tons" and "5 tonnes", as the old substring search did.
+        
         Args:
             text: The text to search
             metric_patterns: List of metric units to look for (e.g., ['tons', 'kwh', '%'])
@@ -105,27 +110,45 @@ class PDFScraper:
         Returns:
             List of tuples: (value, metric, sentence)
         """
-        sentences = self.split_into_sentences(text)
-        metrics_found = []
+        index = self.get_index(text)
+        # (sentence_id, metric position) -> value; first match per pair
+        first_matches = {}
         
-        for sentence in sentences:
-            sent_lower = sentence.lower()
-            
-            for metric in metric_patterns:
-                # Pattern: number (int/float) + optional space + metric
-                # Matches: "1,000.50 tons", "50%", "3.5 kwh"
-                pattern = r'(\d+(?:,\d+)*(?:\.\d+)?\s*' + re.escape(metric.lower()) + r')'
-                match = re.search(pattern, sent_lower)
-                
-                if match:
-                    metrics_found.append({
-                        'value': match.group(1), # The number part
-                        'metric': metric,        # The unit
-                        'sentence': sentence     # Context
-                    })
+        for metric_no, metric in enumerate(metric_patterns):
+            metric_len = len(metric)
+            # Only look at the places the unit occurs, then check for a number before it
+            # Matches: "1,000.50 tons", "50%", "3.5 kwh"
+            for offset in index.find_phrase(metric):
+                sentence_id = index.sentence_of(offset)
+                if sentence_id is None or (sentence_id, metric_no) in first_matches:
+                    continue
+                if offset + metric_len > index.sentence_ends[sentence_id]:
+                    continue
+                number_start = index.number_before(offset, sentence_id)
+                if number_start is not None:
+                    first_matches[(sentence_id, metric_no)] = index.lower[number_start:offset + metric_len]
+        
+        metrics_found = []
+        for (sentence_id, metric_no), value in sorted(first_matches.items()):
+            metrics_found.append({
+                'value': value,                           # The number part
+                'metric': metric_patterns[metric_no],     # The unit
+                'sentence': index.sentence(sentence_id)   # Context
+            })
         
         return metrics_found
 
+    def extract_metric_table(self, text):
+        """
+        Extracts every number + unit figure in one pass, normalized to canonical units
+        (energy -> GJ, mass/emissions -> t, water -> m3, land -> ha).
+        
+        Returns:
+            dict of NumPy arrays: 'value', 'unit', 'raw_unit', 'offset', 'sentence'
+            (see metric_extraction.extract_metric_table)
+        """
+        return extract_metric_table(text)
+
 
 # Usage Examples
 if __name__ == "__main__":
@@ -151,4 +174,8 @@ if __name__ == "__main__":
         print(f"\nFound {len(metrics)} metrics:")
         for m in metrics[:3]:  # Show first 3
             print(f"  - {m['value']} in: {m['sentence'][:100]}...")
+        
+        # Extract every figure as normalized NumPy columns
+        table = scraper.extract_metric_table(cleaned)
+        print(f"\nFound {len(table['value'])} figures, totals: {totals_by_unit(table)}")
     
@@ -0,0 +1,219 @@
+import numpy as np
+
+from report_index import TOKEN_PATTERN, get_report_index
+
+# Phrase Matchers
+# NgramMatcher is what reports are analyzed with: phrases are token sequences
+# (the ReportIndex tokens: letter runs, digit runs, single symbols), so "rate"
+# matches "rate" but not "generate" and "kg" not "background". The report's
+# tokens become an integer array once, every window of 1..N tokens is hashed
+# with NumPy, and the hashes are looked up in one sorted table per phrase length,
+# so the cost is O(tokens) whatever the number of phrases. Hits are verified
+# token by token, so a hash collision can't produce a false match.
+
+# Odd 64-bit multiplier of the rolling n-gram hash (arithmetic wraps mod 2**64)
+NGRAM_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _ngram_hashes(tokens):
+    """Rolling hash of each row of a (windows, n) token id matrix"""
+    hashes = tokens[:, 0].astype(np.uint64)
+    for column in range(1, tokens.shape[1]):
+        hashes = hashes * NGRAM_HASH_MULTIPLIER + tokens[:, column].astype(np.uint64)
+    return hashes
+
+
+class NgramMatcher:
+    def __init__(self, phrases):
+        """
+        Tokenizes the phrases into patterns of token ids.
+
+        Args:
+            phrases: List of phrases (matched case-insensitively); a hit's phrase_id
+                     is its index here
+        """
+        vocabulary = {}     # token -> id; 0 stands for any token in no phrase
+        patterns = {}       # token id tuple -> pattern id (phrases can share one)
+        phrase_pattern = []
+        for phrase in phrases:
+            ids = tuple(vocabulary.setdefault(token, len(vocabulary) + 1)
+                        for token in TOKEN_PATTERN.findall(phrase.lower()))
+            phrase_pattern.append(patterns.setdefault(ids, len(patterns)) if ids else -1)
+        lengths = [len(pattern) for pattern in patterns]
+        arrays = {
+            'pattern_token': np.fromiter((i for pattern in patterns for i in pattern), np.int32, sum(lengths)),
+            'pattern_start': np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))).astype(np.int32),
+            'phrase_pattern': np.array(phrase_pattern, dtype=np.int32)
+        }
+        self._setup(phrases, list(vocabulary), arrays)
+
+    @classmethod
+    def from_compiled(cls, phrases, vocabulary, arrays):
+        """Matcher over the vocabulary and arrays of compiled() (e.g. read-only views of a mapped file)"""
+        matcher = cls.__new__(cls)
+        matcher._setup(phrases, vocabulary, arrays)
+        return matcher
+
+    def compiled(self):
+        """
+        The matcher as a vocabulary (token of id i + 1) and int32 arrays:
+            'pattern_token'   token ids of every pattern, concatenated
+            'pattern_start'   (patterns + 1) offsets of each pattern's tokens
+            'phrase_pattern'  pattern id of each phrase (-1 for phrases without tokens)
+        """
+        return self.vocabulary, dict(self._arrays)
+
+    def _setup(self, phrases, vocabulary, arrays):
+        self.phrases = list(phrases)
+        self.vocabulary = list(vocabulary)
+        self._token_ids = {token: i + 1 for i, token in enumerate(self.vocabulary)}
+        self._arrays = arrays
+        pattern_token, pattern_start = arrays['pattern_token'], arrays['pattern_start']
+        self._phrase_pattern = arrays['phrase_pattern']
+        self._pattern_lengths = np.diff(pattern_start)
+        self.max_tokens = int(self._pattern_lengths.max()) if len(self._pattern_lengths) else 0
+
+        # One table per pattern length: sorted hashes, with the pattern id and tokens of each.
+        # Two patterns of one length with the same 64-bit hash would hide the second;
+        # matches are verified, so a collision can never produce a wrong hit.
+        self._tables = {}
+        for n in np.unique(self._pattern_lengths).tolist():
+            pattern_ids = np.flatnonzero(self._pattern_lengths == n)
+            tokens = pattern_token[pattern_start[pattern_ids][:, None] + np.arange(n)]
+            hashes = _ngram_hashes(tokens)
+            order = np.argsort(hashes, kind='stable')
+            self._tables[n] = (hashes[order], pattern_ids[order], tokens[order])
+
+        # Phrase ids grouped by pattern, for turning pattern hits into phrase hits
+        with_pattern = np.flatnonzero(self._phrase_pattern >= 0)
+        self._pattern_phrases = with_pattern[np.argsort(self._phrase_pattern[with_pattern], kind='stable')]
+        self._pattern_phrase_start = np.searchsorted(self._phrase_pattern[self._pattern_phrases],
+                                                     np.arange(len(self._pattern_lengths) + 1))
+
+    def _match(self, ids, first_end=0):
+        """
+        Every pattern occurrence in a token id array.
+
+        Args:
+            first_end: Only windows ending at this token index or later
+
+        Returns:
+            (pattern ids, start token indexes), ordered by start
+        """
+        found_patterns = []
+        found_starts = []
+        wide = ids.astype(np.uint64)
+        hashes = None
+        for n in range(1, min(self.max_tokens, len(ids)) + 1):
+            # hashes[i] is the hash of ids[i:i + n]
+            hashes = wide if n == 1 else hashes[:-1] * NGRAM_HASH_MULTIPLIER + wide[n - 1:]
+            table = self._tables.get(n)
+            if table is None:
+                continue
+            table_hashes, table_patterns, table_tokens = table
+            slots = np.minimum(np.searchsorted(table_hashes, hashes), len(table_hashes) - 1)
+            starts = np.flatnonzero(table_hashes[slots] == hashes)
+            if first_end:
+                starts = starts[starts + (n - 1) >= first_end]
+            if not len(starts):
+                continue
+            slots = slots[starts]
+            same = (ids[starts[:, None] + np.arange(n)] == table_tokens[slots]).all(axis=1)
+            found_patterns.append(table_patterns[slots[same]])
+            found_starts.append(starts[same])
+        if not found_patterns:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        patterns = np.concatenate(found_patterns)
+        starts = np.concatenate(found_starts)
+        order = np.argsort(starts, kind='stable')
+        return patterns[order], starts[order]
+
+    def _phrase_hits(self, patterns, starts, token_starts, token_ends, offset=0):
+        """(phrase_ids, starts, ends) char spans of pattern occurrences, ordered by end"""
+        per_pattern = self._pattern_phrase_start[patterns + 1] - self._pattern_phrase_start[patterns]
+        first = np.cumsum(per_pattern) - per_pattern
+        rank = np.arange(per_pattern.sum()) - np.repeat(first, per_pattern)
+        phrase_ids = self._pattern_phrases[np.repeat(self._pattern_phrase_start[patterns], per_pattern) + rank]
+        char_starts = np.repeat(token_starts[starts], per_pattern) + offset
+        char_ends = np.repeat(token_ends[starts + self._pattern_lengths[patterns] - 1], per_pattern) + offset
+        order = np.argsort(char_ends, kind='stable')
+        return phrase_ids[order], char_starts[order], char_ends[order]
+
+    def _encode(self, text):
+        """(token ids, start offsets, end offsets) of a text or ReportIndex"""
+        index = text if hasattr(text, 'token_arrays') else get_report_index(text)
+        tokens, starts, ends = index.token_arrays()
+        lookup = np.fromiter((self._token_ids.get(token, 0) for token in index.vocabulary),
+                             np.int32, len(index.vocabulary))
+        return lookup[tokens], starts, ends
+
+    def hits(self, text):
+        """
+        Every occurrence of every phrase.
+
+        Args:
+            text: Report text or its ReportIndex (the tokens come from the cached index)
+
+        Returns:
+            (phrase_ids, starts, ends) NumPy arrays, ordered by end offset
+        """
+        ids, token_starts, token_ends = self._encode(text)
+        patterns, starts = self._match(ids)
+        return self._phrase_hits(patterns, starts, token_starts, token_ends)
+
+    def scan(self, text):
+        """hits() as a list of (phrase_id, start, end) tuples"""
+        return list(zip(*(column.tolist() for column in self.hits(text))))
+
+    def counts(self, text):
+        """
+        Occurrences of each phrase, as an int64 vector indexed by phrase_id. Vectors
+        of many reports stack into a (reports x phrases) matrix for scoring.
+        """
+        ids, _, _ = self._encode(text)
+        patterns, _ = self._match(ids)
+        pattern_counts = np.bincount(patterns, minlength=len(self._pattern_lengths))
+        return np.where(self._phrase_pattern >= 0, pattern_counts[np.maximum(self._phrase_pattern, 0)], 0)
+
+    def first_hits(self, text):
+        """Maps phrase_id -> (start, end) of its first occurrence"""
+        ids, token_starts, token_ends = self._encode(text)
+        patterns, starts = self._match(ids)
+        # Occurrences are ordered by start, so each pattern's first index is its earliest
+        patterns, first = np.unique(patterns, return_index=True)
+        phrase_ids, char_starts, char_ends = self._phrase_hits(patterns, starts[first], token_starts, token_ends)
+        return {phrase_id: (start, end) for phrase_id, start, end
+                in zip(phrase_ids.tolist(), char_starts.tolist(), char_ends.tolist())}
+
+    def scan_from(self, text, state=None, offset=0, final=False):
+        """
+        scan() for lowercased text that arrives in chunks: pass the state returned
+        for the previous chunk, and phrases spanning the boundary are still found
+        (with offsets into the whole text). A chunk's last token may continue in the
+        next chunk, so hits ending on it are held back until the next call; pass
+        final=True (an empty text is fine) once the text is complete.
+
+        Args:
+            offset: Offset of the first chunk in the whole text (later chunks follow on)
+
+        Returns:
+            (hits, state) with hits as in scan()
+        """
+        carry, carry_start, carry_done = state or ("", offset, 0)
+        text = carry + text
+        matches = list(TOKEN_PATTERN.finditer(text))
+        done = len(matches)
+        if not final and matches and matches[-1].end() == len(text):
+            done -= 1
+        hits = []
+        if done > carry_done:
+            ids = np.fromiter((self._token_ids.get(match.group(), 0) for match in matches[:done]), np.int32, done)
+            patterns, starts = self._match(ids, first_end=carry_done)
+            token_starts = np.fromiter((match.start() for match in matches[:done]), np.int64, done)
+            token_ends = np.fromiter((match.end() for match in matches[:done]), np.int64, done)
+            hits = list(zip(*(column.tolist() for column in
+                              self._phrase_hits(patterns, starts, token_starts, token_ends, carry_start))))
+        # Carry the last max_tokens - 1 finished tokens (they can start a longer phrase) and any open one
+        keep = max(done - max(self.max_tokens - 1, 0), 0)
+        cut = matches[keep].start() if keep < len(matches) else len(text)
+        return hits, (text[cut:], carry_start + cut, done - keep)
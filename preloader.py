@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from collections import deque
+
+import telemetry
+
+# Game Preloader
+# Event-driven producers that keep the shared game pool between a low and a high
+# watermark. Producer threads sleep on a condition variable and are woken when a
+# game is claimed in this process; claims made by other worker processes are picked
+# up by a short periodic re-check. Up to N games are generated concurrently. Pool
+# queries run outside the condition lock, so a claim's notify() never waits on SQLite.
+
+PRELOAD_PRODUCERS = int(os.getenv("PRELOAD_PRODUCERS", "2"))
+# Start refilling when the pool drops below the low watermark, stop at the high one
+PRELOAD_LOW_WATERMARK = int(os.getenv("PRELOAD_LOW_WATERMARK", "2"))
+# (GAME_POOL_TARGET is the older name of the high watermark and still read as its default)
+PRELOAD_HIGH_WATERMARK = int(os.getenv("PRELOAD_HIGH_WATERMARK", os.getenv("GAME_POOL_TARGET", "2")))
+# Claims in other processes don't signal our condition variable, so re-check this often
+PRELOAD_RECHECK_SECONDS = float(os.getenv("PRELOAD_RECHECK_SECONDS", "1"))
+# Expired games are only counted out by depth(); deleting them is a write, done this often
+PRELOAD_EXPIRE_SECONDS = float(os.getenv("PRELOAD_EXPIRE_SECONDS", "60"))
+PRODUCER_RETRY_SECONDS = 30    # how often non-producers check if the producer died
+FAILURE_BACKOFF_SECONDS = 5    # pause after a failed generation so a bad PDF can't spin
+LATENCY_SAMPLES = 200          # recent latencies kept for the percentiles in stats()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples (None when there are none)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Preloader:
+    def __init__(self, pool, generate, producers=PRELOAD_PRODUCERS,
+                 low_watermark=PRELOAD_LOW_WATERMARK, high_watermark=PRELOAD_HIGH_WATERMARK):
+        """
+        Args:
+            pool: GamePool to keep filled
+            generate: Callable returning game data (or None on failure)
+            producers: Number of concurrent generation jobs
+            low_watermark / high_watermark: Refill below low, until depth + in-flight reaches high
+        """
+        self.pool = pool
+        self.generate = generate
+        self.producers = max(1, producers)
+        self.high_watermark = max(1, high_watermark)
+        self.low_watermark = min(max(1, low_watermark), self.high_watermark)
+
+        self._cond = threading.Condition()
+        self._threads = []
+        self._supervisor = None
+        self._started = None     # pid of the process whose threads are running
+        self._refilling = False
+        self._refill_started_at = None
+        self._expired_at = 0.0
+        self._finished = 0       # generations finished; a depth read before one is stale
+
+        # Stats
+        self.in_flight = 0
+        self.generated = 0
+        self.failures = 0
+        self.claims = 0
+        self.generation_seconds = deque(maxlen=LATENCY_SAMPLES)  # one game, start to pool
+        self.refill_seconds = deque(maxlen=LATENCY_SAMPLES)      # below low -> back at high
+
+    def start(self):
+        """
+        Start the supervisor thread once per process; producers start when this process
+        wins the producer lock. Safe to call on every request, and again in a forked
+        worker (threads don't survive a fork, so a start in the parent doesn't count).
+        """
+        with self._cond:
+            if self._started == os.getpid():
+                return
+            if self._started is not None:
+                # Forked from a process whose producers are running: their jobs aren't ours
+                self._threads = []
+                self.in_flight = 0
+                self._refilling = False
+            self._started = os.getpid()
+        self._supervisor = threading.Thread(target=self._supervise, name='preload-supervisor', daemon=True)
+        self._supervisor.start()
+        print("🔄 Background preloader started")
+
+    def _supervise(self):
+        # Only one process across all workers refills the pool
+        while not self.pool.try_become_producer():
+            time.sleep(PRODUCER_RETRY_SECONDS)
+        print(f"🔄 Background: pid {os.getpid()} is the game pool producer "
+              f"({self.producers} jobs, watermarks {self.low_watermark}/{self.high_watermark})")
+        for i in range(self.producers):
+            thread = threading.Thread(target=self._produce, name=f'preload-{i}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def alive(self):
+        """
+        False once started in this process and its threads have died: the supervisor
+        while waiting for the producer lock, every producer after winning it.
+        """
+        with self._cond:
+            if self._started != os.getpid():
+                return True     # not started here (yet): nothing to have died
+            threads = list(self._threads)
+            supervisor = self._supervisor
+        if threads:
+            return all(thread.is_alive() for thread in threads)
+        return supervisor is not None and supervisor.is_alive()
+
+    def notify(self):
+        """Call after a game is dequeued so producers re-check the pool immediately"""
+        with self._cond:
+            self.claims += 1
+            self._cond.notify_all()
+
+    def _should_generate(self, depth):
+        """Hysteresis between the watermarks (caller holds the condition lock)"""
+        if depth < self.low_watermark and not self._refilling:
+            self._refilling = True
+            self._refill_started_at = time.time()
+        if self._refilling and depth >= self.high_watermark:
+            self._refilling = False
+            self.refill_seconds.append(time.time() - self._refill_started_at)
+        return self._refilling and depth + self.in_flight < self.high_watermark
+
+    def _pool_depth(self):
+        """
+        Current pool depth, dropping expired games every PRELOAD_EXPIRE_SECONDS.
+        Called without the condition lock held (SQLite can wait on a busy database).
+        """
+        with self._cond:
+            expire = time.time() - self._expired_at >= PRELOAD_EXPIRE_SECONDS
+            if expire:
+                self._expired_at = time.time()
+        if expire:
+            self.pool.expire()
+        return self.pool.depth()
+
+    def _wait_for_work(self):
+        """Block until this producer should generate a game, then count it as in flight"""
+        while True:
+            with self._cond:
+                finished = self._finished
+            try:
+                depth = self._pool_depth()
+            except Exception as e:
+                print(f"⚠️ Background pool check error: {e}")
+                depth = None
+            with self._cond:
+                if depth is not None and self._finished == finished and self._should_generate(depth):
+                    self.in_flight += 1
+                    return
+                if depth is None or self._finished == finished:
+                    self._cond.wait(timeout=PRELOAD_RECHECK_SECONDS)
+                # else a game was finished while we read the depth: read it again
+
+    def _produce(self):
+        while True:
+            self._wait_for_work()
+
+            started = time.time()
+            game_data = None
+            try:
+                print(f"🔄 Background: Preloading next game ({threading.current_thread().name})...")
+                game_data = self.generate()
+                if game_data:
+                    self.pool.put(game_data)
+            except Exception as e:
+                print(f"⚠️ Background preload error: {e}")
+
+            with self._cond:
+                self.in_flight -= 1
+                self._finished += 1
+                if game_data:
+                    self.generated += 1
+                    self.generation_seconds.append(time.time() - started)
+                    telemetry.PRELOAD_RESULTS.inc(result='generated')
+                    telemetry.STAGE_SECONDS.observe(time.time() - started, stage='preload_game')
+                else:
+                    self.failures += 1
+                    telemetry.PRELOAD_RESULTS.inc(result='failed')
+                self._cond.notify_all()
+            if game_data:
+                print(f"✅ Background: Game preloaded (pool size: {self.pool.depth()})")
+            else:
+                time.sleep(FAILURE_BACKOFF_SECONDS)
+
+    def stats(self):
+        """Queue depth, in-flight jobs and refill latency, for sizing producers against traffic"""
+        depth = self.pool.depth()
+        with self._cond:
+            generation = list(self.generation_seconds)
+            refill = list(self.refill_seconds)
+            return {
+                'is_producer': self.pool.is_producer(),
+                'depth': depth,
+                'in_flight': self.in_flight,
+                'producers': self.producers,
+                'low_watermark': self.low_watermark,
+                'high_watermark': self.high_watermark,
+                'generated': self.generated,
+                'failures': self.failures,
+                'claims': self.claims,
+                'generation_seconds': {
+                    'last': generation[-1] if generation else None,
+                    'p50': percentile(generation, 50),
+                    'p95': percentile(generation, 95)
+                },
+                'refill_seconds': {
+                    'last': refill[-1] if refill else None,
+                    'p50': percentile(refill, 50),
+                    'p95': percentile(refill, 95)
+                }
+            }
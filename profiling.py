@@ -0,0 +1,162 @@
+import cProfile
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Generation Profiler
+# Opt-in profiling of game generation, to tell pypdf, the GRI analysis and the
+# Claude calls apart when a slow /new-game happens. Each profiled run records both
+# a deterministic cProfile of the calling thread (saved as .pstats, for snakeviz or
+# `python -m pstats`) and a wall-clock stack sampler of the same thread (saved as
+# .collapsed, for flamegraph.pl / speedscope), so time spent blocked on the network
+# shows up too. Request and preloader runs are written to separate directories,
+# each keeping only the newest PROFILE_KEEP profiles. A single request can only ask
+# to be profiled with the secret PROFILE_TOKEN, and it gets back the run id, never a
+# server path.
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# "1" profiles every generation; otherwise only requests sending PROFILE_HEADER
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") != "0"
+PROFILE_HEADER = "X-Profile"
+# Value a request must send in PROFILE_HEADER to be profiled; empty: header ignored
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))                           # per kind
+PROFILE_SAMPLE_SECONDS = float(os.getenv("PROFILE_SAMPLE_MS", "5")) / 1000    # sampler interval
+
+_save_lock = threading.Lock()
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format: 'outer;inner;leaf count' per line"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+
+class ProfileRun:
+    """
+    Result of a profile() block: `path` is the saved file prefix and `run_id` its
+    name within the kind's directory (both None if not profiled)
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.path = None
+        self.run_id = None
+        self.seconds = None
+
+
+def should_profile(headers=None):
+    """True if the env var enables profiling or the request sends the profiling token"""
+    if PROFILE_ENABLED:
+        return True
+    if not PROFILE_TOKEN or headers is None:
+        return False
+    return hmac.compare_digest(headers.get(PROFILE_HEADER, "").encode(), PROFILE_TOKEN.encode())
+
+
+def _rotate(directory, keep):
+    """Delete the oldest profiles in `directory` beyond `keep` (.pstats and .collapsed together)"""
+    prefixes = {}
+    for name in os.listdir(directory):
+        prefix, ext = os.path.splitext(name)
+        if ext in ('.pstats', '.collapsed'):
+            try:
+                mtime = os.path.getmtime(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue    # rotated away by another worker
+            prefixes[prefix] = max(prefixes.get(prefix, 0), mtime)
+    for prefix in sorted(prefixes, key=prefixes.get)[:max(0, len(prefixes) - keep)]:
+        for ext in ('.pstats', '.collapsed'):
+            try:
+                os.remove(os.path.join(directory, prefix + ext))
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def profile(kind, enabled=True, profile_dir=PROFILE_DIR, keep=PROFILE_KEEP):
+    """
+    Profile the with-block on the current thread and save it under profile_dir/kind.
+
+    Args:
+        kind: Subdirectory, e.g. 'request' or 'preload'
+        enabled: When False the block runs unprofiled (the yielded run has path None)
+
+    Yields:
+        ProfileRun, whose `path` (file prefix without extension) is set after the block
+    """
+    run = ProfileRun(kind)
+    if not enabled:
+        yield run
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active cProfile per process; the sampler still runs
+        profiler = None
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        yield run
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        sampler.stop()
+        run.seconds = time.perf_counter() - started
+        try:
+            run.path = _save(kind, profiler, sampler, run.seconds, profile_dir, keep)
+            run.run_id = os.path.basename(run.path)
+            print(f"🔬 Saved {kind} profile ({run.seconds:.1f}s) to {run.path}.*")
+        except OSError as e:
+            print(f"⚠️ Could not save {kind} profile: {e}")
+
+
+def _save(kind, profiler, sampler, seconds, profile_dir, keep):
+    directory = os.path.join(profile_dir, kind)
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    prefix = os.path.join(directory, f"{stamp}-{os.getpid()}-{threading.get_ident()}-{seconds:.1f}s")
+    if profiler is not None:
+        profiler.dump_stats(prefix + ".pstats")
+    with open(prefix + ".collapsed", 'w') as f:
+        f.write(sampler.collapsed())
+    with _save_lock:
+        _rotate(directory, keep)
+    return prefix
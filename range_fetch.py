@@ -0,0 +1,265 @@
+import bisect
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import telemetry
+
+# Partial PDF Fetching
+# When only the first pages of a report are extracted, most of a 20-80 MB annual
+# report (later pages, their images) is never needed. Against servers that accept
+# byte ranges, the report is opened as a lazily-populated file: the tail (trailer
+# and xref) is fetched first, then - using the object offsets from the xref - the
+# document structure and the content streams of the wanted pages are prefetched in
+# a few merged, parallel Range requests. Anything else pypdf asks for is fetched on
+# demand. Callers fall back to a full download whenever this doesn't apply. The
+# blocks fetched can be stored in the PDF cache and seed the next read of the same
+# version of the report, which then needs no Range requests at all.
+
+PDF_RANGE_FETCH = os.getenv("PDF_RANGE_FETCH", "1") != "0"
+# Smaller reports are cheaper to download whole (and then cached for next time)
+PDF_RANGE_MIN_BYTES = int(os.getenv("PDF_RANGE_MIN_MB", "4")) * 1024 * 1024
+RANGE_BLOCK_BYTES = 16 * 1024          # fetch granularity for on-demand reads
+RANGE_TAIL_BYTES = 256 * 1024          # first request: trailer, xref and often the catalog
+RANGE_MERGE_GAP_BYTES = 64 * 1024      # prefetch spans closer than this share a request
+RANGE_MAX_REQUEST_BYTES = 4 * 1024 * 1024
+RANGE_CONCURRENCY = 8
+SMALL_OBJECT_BYTES = 8 * 1024          # page dicts, fonts, page tree nodes: prefetched up front
+
+
+class RangeNotSupported(Exception):
+    """The server ignored a Range request (or the file changed since it was opened)"""
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable view of a remote file that fetches blocks with Range
+    requests as they are read. Fetched blocks are kept in memory; `blocks` seeds
+    them (e.g. from an earlier read of the same version of the file).
+    """
+
+    def __init__(self, url, size, etag=None, session=None, timeout=60, block_size=RANGE_BLOCK_BYTES,
+                 blocks=None):
+        super().__init__()
+        import requests  # deferred like the rest of the download path
+        self.url = url
+        self.size = size
+        self.etag = etag
+        self.timeout = timeout
+        self.block_size = block_size
+        self.session = session or requests.Session()
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._blocks = dict(blocks or {})
+        self._lock = threading.Lock()
+        self._pos = 0
+
+    # ----- io.RawIOBase -----
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        elif whence == os.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def read(self, n=-1):
+        start = self._pos
+        end = self.size if n is None or n < 0 else min(self.size, start + n)
+        if start >= end:
+            return b""
+        self._ensure([(start, end)], parallel=False)
+        first, last = start // self.block_size, (end - 1) // self.block_size
+        data = b"".join(self._blocks[b] for b in range(first, last + 1))
+        offset = first * self.block_size
+        self._pos = end
+        return data[start - offset:end - offset]
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    # ----- fetching -----
+
+    def _get(self, start, end):
+        headers = {'Range': f"bytes={start}-{end - 1}"}
+        if self.etag:
+            headers['If-Range'] = self.etag
+        # Streamed so a server answering with the whole file (200) is hung up on, not read
+        response = self.session.get(self.url, headers=headers, timeout=self.timeout, stream=True)
+        with response:
+            if response.status_code != 206:
+                raise RangeNotSupported(f"Got {response.status_code} for a range of {self.url}")
+            data = response.content
+        if len(data) != end - start:
+            raise RangeNotSupported(f"Got {len(data)} bytes for a {end - start} byte range")
+        with self._lock:
+            self.requests += 1
+            self.bytes_fetched += len(data)
+        telemetry.RANGE_REQUESTS.inc()
+        telemetry.DOWNLOAD_BYTES.inc(len(data))
+        return data
+
+    def _fetch_blocks(self, first, last):
+        """Fetch blocks [first, last] in one request"""
+        start = first * self.block_size
+        end = min(self.size, (last + 1) * self.block_size)
+        data = self._get(start, end)
+        with self._lock:
+            for b in range(first, last + 1):
+                offset = (b - first) * self.block_size
+                self._blocks[b] = data[offset:offset + self.block_size]
+
+    def _missing_runs(self, spans):
+        """Runs of missing blocks covering the spans, merged across small gaps and size-capped"""
+        wanted = set()
+        for start, end in spans:
+            start, end = max(0, start), min(self.size, end)
+            if start < end:
+                wanted.update(range(start // self.block_size, (end - 1) // self.block_size + 1))
+        missing = sorted(b for b in wanted if b not in self._blocks)
+        gap = RANGE_MERGE_GAP_BYTES // self.block_size
+        cap = max(1, RANGE_MAX_REQUEST_BYTES // self.block_size)
+        runs = []
+        for b in missing:
+            if runs and b - runs[-1][1] <= gap + 1 and b - runs[-1][0] < cap:
+                runs[-1][1] = b
+            else:
+                runs.append([b, b])
+        return runs
+
+    def _ensure(self, spans, parallel=True):
+        runs = self._missing_runs(spans)
+        if len(runs) > 1 and parallel:
+            with ThreadPoolExecutor(max_workers=RANGE_CONCURRENCY) as pool:
+                list(pool.map(lambda run: self._fetch_blocks(*run), runs))
+        else:
+            for first, last in runs:
+                self._fetch_blocks(first, last)
+
+    def prefetch(self, spans):
+        """Fetch everything in the (start, end) byte spans with as few parallel requests as possible"""
+        self._ensure(spans, parallel=True)
+
+    def blocks(self):
+        """Copy of the blocks held so far, block number -> bytes"""
+        with self._lock:
+            return dict(self._blocks)
+
+
+def object_spans(reader, size):
+    """idnum -> (start, end) byte span of every uncompressed object, from the xref offsets"""
+    offsets = sorted({offset for entries in reader.xref.values() for offset in entries.values()})
+    spans = {}
+    for entries in reader.xref.values():
+        for idnum, offset in entries.items():
+            i = bisect.bisect_right(offsets, offset)
+            spans[idnum] = (offset, offsets[i] if i < len(offsets) else size)
+    return spans
+
+
+def _refs(value):
+    """Object numbers of the indirect references in a raw (unresolved) value or array"""
+    from pypdf.generic import IndirectObject
+    items = value if isinstance(value, list) else [value]
+    return [item.idnum for item in items if isinstance(item, IndirectObject)]
+
+
+class RangedReport:
+    """A remote PDF opened with Range requests: `reader` extracts, `file` has the fetch stats"""
+
+    def __init__(self, file, reader):
+        self.file = file
+        self.reader = reader
+
+
+def probe_ranges(url, timeout=60, session=None):
+    """
+    (size, etag) if the server advertises byte ranges for the URL, else None.
+    """
+    import requests
+    session = session or requests.Session()
+    try:
+        response = session.head(url, allow_redirects=True, timeout=timeout)
+    except requests.RequestException:
+        return None
+    with response:
+        if response.status_code != 200 or response.headers.get('Accept-Ranges', '').lower() != 'bytes':
+            return None
+        try:
+            size = int(response.headers.get('Content-Length', ''))
+        except ValueError:
+            return None
+        # Weak validators can't be used with If-Range
+        etag = response.headers.get('ETag')
+        if etag and etag.startswith('W/'):
+            etag = None
+        return size, etag
+
+
+def open_ranged_report(url, max_pages, timeout=60, min_bytes=PDF_RANGE_MIN_BYTES, cache=None):
+    """
+    Open the first `max_pages` of a remote PDF via Range requests.
+
+    Args:
+        cache: PDFCache whose stored blocks for this URL, ETag and size seed the reader
+
+    Returns:
+        RangedReport, or None when ranges don't apply (no range support, small file
+        or a PDF pypdf can only read leniently) and the caller should download it whole
+    """
+    import requests
+    from pypdf import PdfReader
+
+    session = requests.Session()
+    probed = probe_ranges(url, timeout, session)
+    if probed is None or probed[0] < min_bytes:
+        return None
+    size, etag = probed
+
+    stored = cache.load_ranges(url, etag, size) if cache is not None else None
+    blocks = stored[1] if stored and stored[0] == RANGE_BLOCK_BYTES else None
+    file = HTTPRangeFile(url, size, etag, session, timeout, blocks=blocks)
+    try:
+        file.prefetch([(size - RANGE_TAIL_BYTES, size)])
+        # Strict: lenient mode re-reads every object's header, which would fetch the whole file
+        reader = PdfReader(file, strict=True)
+
+        # Structure first (page tree, page dicts, fonts, object streams), then the page contents
+        spans = object_spans(reader, size)
+        object_streams = {stream_id for stream_id, _ in reader.xref_objStm.values()}
+        file.prefetch([span for idnum, span in spans.items()
+                       if span[1] - span[0] <= SMALL_OBJECT_BYTES or idnum in object_streams])
+        # Then what text extraction reads for each wanted page: its content streams and
+        # the XObjects (forms, images) they may draw
+        needed = []
+        for page in reader.pages[:max_pages]:
+            if '/Contents' in page:
+                needed.extend(_refs(page.raw_get('/Contents')))
+            resources = page.get('/Resources')
+            if resources is not None and '/XObject' in resources:
+                xobjects = resources['/XObject']
+                needed.extend(idnum for name in xobjects for idnum in _refs(xobjects.raw_get(name)))
+        file.prefetch([spans[idnum] for idnum in needed if idnum in spans])
+    except Exception as e:
+        print(f"⚠️ Range fetch of {url} not possible ({e}), downloading it whole")
+        return None
+
+    telemetry.PDF_CACHE_REQUESTS.inc(result='ranged' if file.requests else 'ranged_stored')
+    return RangedReport(file, reader)
@@ -0,0 +1,176 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+# Report Index
+# Built once per document: sentence boundaries as offset arrays plus a
+# token -> char offsets inverted index over the lowercased text. Keyword,
+# sentence and context lookups then cost O(hits) instead of rescanning the text.
+# The same tokens, in text order, are available as NumPy arrays for the n-gram
+# phrase matcher.
+
+# Same boundaries as PDFScraper.split_into_sentences (punctuation followed by space)
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+SENTENCE_MIN_CHARS = 30
+# Letter runs, digit runs and single symbols, so "35kwh" indexes as "35" + "kwh"
+TOKEN_PATTERN = re.compile(r'[^\W\d_]+|\d+|[^\w\s]|_')
+# Number immediately before a unit: "1,000.50 " in "1,000.50 tons"
+NUMBER_BEFORE_UNIT = re.compile(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*$')
+NUMBER_LOOKBACK_CHARS = 64
+
+INDEX_CACHE_SIZE = 8
+
+
+def lowercase_same_length(text):
+    """Lowercase without changing offsets (a few characters lowercase to two chars)"""
+    lower = text.lower()
+    if len(lower) == len(text):
+        return lower
+    return ''.join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+def text_context(text, start, end, radius=50):
+    """ReportIndex(text).context(start, end, radius) without building the index"""
+    return lowercase_same_length(text[max(0, start - radius):end + radius]).strip()
+
+
+class ReportIndex:
+    def __init__(self, text):
+        self.text = text
+        self.lower = lowercase_same_length(text)
+
+        # Sentence spans (stripped, short ones dropped) as parallel offset arrays
+        self.sentence_starts = array('q')
+        self.sentence_ends = array('q')
+        segment_start = 0
+        for match in SENTENCE_BREAK.finditer(text):
+            self._add_sentence(segment_start, match.start())
+            segment_start = match.end()
+        self._add_sentence(segment_start, len(text))
+
+        # Inverted index: token -> sorted char offsets
+        postings = {}
+        for match in TOKEN_PATTERN.finditer(self.lower):
+            offsets = postings.get(match.group())
+            if offsets is None:
+                offsets = postings[match.group()] = array('q')
+            offsets.append(match.start())
+        self.postings = postings
+        self.vocabulary = sorted(postings)  # for prefix lookups
+        self._token_arrays = None
+
+    def _add_sentence(self, start, end):
+        # split_into_sentences filters on the unstripped length, then strips
+        if end - start <= SENTENCE_MIN_CHARS:
+            return
+        segment = self.text[start:end]
+        stripped = segment.strip()
+        if not stripped:
+            return
+        start += len(segment) - len(segment.lstrip())
+        self.sentence_starts.append(start)
+        self.sentence_ends.append(start + len(stripped))
+
+    # ----- lookups -----
+
+    @property
+    def sentence_count(self):
+        return len(self.sentence_starts)
+
+    def sentence(self, sentence_id):
+        return self.text[self.sentence_starts[sentence_id]:self.sentence_ends[sentence_id]]
+
+    def sentences(self):
+        return [self.sentence(i) for i in range(self.sentence_count)]
+
+    def sentence_of(self, offset):
+        """Id of the sentence containing a char offset (None if between sentences)"""
+        i = bisect_right(self.sentence_starts, offset) - 1
+        if i >= 0 and offset < self.sentence_ends[i]:
+            return i
+        return None
+
+    def _token_offsets(self, token, prefix):
+        if not prefix:
+            return self.postings.get(token, ())
+        # Every indexed token starting with `token` sits in one sorted vocabulary run
+        lo = bisect_left(self.vocabulary, token)
+        hi = bisect_left(self.vocabulary, token + '\U0010ffff')
+        if hi - lo == 1:
+            return self.postings[self.vocabulary[lo]]
+        return sorted(offset for word in self.vocabulary[lo:hi] for offset in self.postings[word])
+
+    def find_phrase(self, phrase):
+        """
+        Char offsets where a phrase starts, case-insensitive. Phrases match from
+        the start of a token, and a single-token phrase also matches longer
+        words it prefixes ("emission" finds "emissions").
+        """
+        phrase_lower = phrase.lower()
+        tokens = TOKEN_PATTERN.findall(phrase_lower)
+        if not tokens:
+            return []
+        candidates = self._token_offsets(tokens[0], prefix=len(tokens) == 1)
+        if len(tokens) == 1:
+            return list(candidates)
+        lower = self.lower
+        return [offset for offset in candidates if lower.startswith(phrase_lower, offset)]
+
+    def token_arrays(self):
+        """
+        The text as a token sequence, built from the postings on first use.
+
+        Returns:
+            (tokens, starts, ends) NumPy arrays in text order; tokens index self.vocabulary
+        """
+        if self._token_arrays is None:
+            vocabulary = self.vocabulary
+            sizes = np.fromiter((len(self.postings[token]) for token in vocabulary), np.int64, len(vocabulary))
+            offsets = np.frombuffer(b''.join(self.postings[token].tobytes() for token in vocabulary), dtype=np.int64)
+            tokens = np.repeat(np.arange(len(vocabulary), dtype=np.int32), sizes)
+            order = np.argsort(offsets, kind='stable')
+            tokens = tokens[order]
+            starts = offsets[order]
+            lengths = np.fromiter(map(len, vocabulary), np.int64, len(vocabulary))
+            self._token_arrays = (tokens, starts, starts + lengths[tokens])
+        return self._token_arrays
+
+    def context(self, start, end, radius=50):
+        """Up to `radius` chars either side of a span (lowercased, stripped)"""
+        return self.lower[max(0, start - radius):end + radius].strip()
+
+    def number_before(self, offset, sentence_id):
+        """
+        Start offset of a number that directly precedes `offset` (optional
+        whitespace between) within the same sentence, or None.
+        """
+        window_start = max(self.sentence_starts[sentence_id], offset - NUMBER_LOOKBACK_CHARS)
+        match = NUMBER_BEFORE_UNIT.search(self.lower, window_start, offset)
+        return match.start() if match else None
+
+
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def get_report_index(text):
+    """
+    Returns the ReportIndex for a text, building it on first use. Recently used
+    indexes are kept alongside their text so repeat calls on the same report are free.
+    """
+    with _index_cache_lock:
+        index = _index_cache.get(text)
+        if index is not None:
+            _index_cache.move_to_end(text)
+            return index
+
+    index = ReportIndex(text)
+    with _index_cache_lock:
+        _index_cache[text] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
@@ -0,0 +1,359 @@
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+from GRI_STANDARDS_DATABASE import GRI_STANDARDS, BIAS_FLUFF_WORDS
+from phrase_matcher import NgramMatcher
+
+# Standards Catalog
+# The standards a report is checked against, and the bias words. By default that is
+# the built-in GRI_STANDARDS_DATABASE; STANDARDS_CATALOG points at external JSON
+# files instead (the full GRI disclosure list, SASB- or ESRS-style sets), each:
+#
+#     {"framework": "SASB",
+#      "standards": {"EM-EP-110a.1": {"title": "...", "keywords": [...], "required_metrics": [...]}},
+#      "bias_words": ["..."]}
+#
+# Files are validated, then compiled once into a binary artifact: the normalized
+# phrase tables and token vocabulary as JSON plus the n-gram matcher's pattern
+# arrays. The artifact is keyed by the files' content, and every later start (and
+# every worker) memory-maps it instead of parsing, validating and tokenizing the
+# catalog again.
+
+# Catalog JSON files or directories of them, separated by os.pathsep; empty: built-in database
+STANDARDS_CATALOG = os.getenv("STANDARDS_CATALOG", "")
+CATALOG_CACHE_DIR = os.getenv("CATALOG_CACHE_DIR", ".catalog_cache")
+CATALOG_MAGIC = b"GRICAT\x00\x01"
+CATALOG_FORMAT = 2             # bump when the artifact layout or the matcher changes
+ARRAY_ALIGN = 8
+
+# Pseudo standard the bias words are fingerprinted under; not allowed as a real code
+BIAS_CODE = 'BIAS'
+
+FILE_KEYS = {'framework', 'version', 'description', 'standards', 'bias_words'}
+STANDARD_KEYS = {'title', 'description', 'keywords', 'required_metrics'}
+
+
+class CatalogError(ValueError):
+    """A catalog file that can't be read or doesn't validate"""
+
+
+def _fingerprint(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def normalize_phrase(phrase):
+    """Lowercase, single-spaced: the form clean_text()'d report text is matched in"""
+    return ' '.join(phrase.lower().split())
+
+
+def builtin_catalog():
+    """GRI_STANDARDS_DATABASE in the catalog file format"""
+    return {'framework': 'GRI', 'standards': GRI_STANDARDS, 'bias_words': BIAS_FLUFF_WORDS}
+
+
+def _phrase_errors(value, where):
+    if not isinstance(value, list):
+        return [f"{where}: must be a list of strings"]
+    return [f"{where}[{i}]: must be a non-empty string" for i, phrase in enumerate(value)
+            if not isinstance(phrase, str) or not normalize_phrase(phrase)]
+
+
+def validate_catalog(data, name):
+    """
+    Check one catalog document.
+
+    Returns:
+        List of error messages (empty if valid)
+    """
+    if not isinstance(data, dict):
+        return [f"{name}: must be a JSON object"]
+    errors = [f"{name}: unknown key '{key}'" for key in sorted(set(data) - FILE_KEYS)]
+    if 'framework' in data and (not isinstance(data['framework'], str) or not data['framework'].strip()):
+        errors.append(f"{name}: framework must be a non-empty string")
+    standards = data.get('standards')
+    if not isinstance(standards, dict) or not standards:
+        errors.append(f"{name}: standards must be a non-empty object")
+        standards = {}
+    for code, standard in standards.items():
+        where = f"{name}: standards['{code}']"
+        if not code.strip() or code == BIAS_CODE:
+            errors.append(f"{where}: invalid code")
+        if not isinstance(standard, dict):
+            errors.append(f"{where}: must be an object")
+            continue
+        errors += [f"{where}: unknown key '{key}'" for key in sorted(set(standard) - STANDARD_KEYS)]
+        if not isinstance(standard.get('title'), str) or not standard['title'].strip():
+            errors.append(f"{where}.title: must be a non-empty string")
+        errors += _phrase_errors(standard.get('keywords', []), f"{where}.keywords")
+        errors += _phrase_errors(standard.get('required_metrics', []), f"{where}.required_metrics")
+        if not standard.get('keywords') and not standard.get('required_metrics'):
+            errors.append(f"{where}: needs at least one keyword or required metric")
+    errors += _phrase_errors(data.get('bias_words', []), f"{name}: bias_words")
+    return errors
+
+
+def catalog_paths(spec):
+    """JSON files named by a STANDARDS_CATALOG value, directories expanded in name order"""
+    paths = []
+    for entry in filter(None, spec.split(os.pathsep)):
+        if os.path.isdir(entry):
+            paths += [os.path.join(entry, name) for name in sorted(os.listdir(entry)) if name.endswith('.json')]
+        else:
+            paths.append(entry)
+    return paths
+
+
+def compile_catalog(documents):
+    """
+    Merge validated catalog documents and build the matcher.
+
+    Args:
+        documents: List of (name, data) in priority order; a code may only appear once
+
+    Returns:
+        (meta, matcher): meta holds the standards, frameworks, bias words, phrase
+        tables and fingerprints (see Catalog); matcher is the NgramMatcher over
+        the distinct normalized phrases
+    """
+    errors = []
+    for name, data in documents:
+        errors += validate_catalog(data, name)
+    standards = {}
+    frameworks = {}
+    defined_in = {}
+    for name, data in documents:
+        for code in data.get('standards', {}) if isinstance(data, dict) else []:
+            if code in defined_in:
+                errors.append(f"{name}: standards['{code}'] is already defined in {defined_in[code]}")
+            defined_in.setdefault(code, name)
+    if errors:
+        raise CatalogError("Invalid standards catalog:\n  " + "\n  ".join(errors))
+
+    phrase_ids = {}
+
+    def phrase_id(phrase):
+        return phrase_ids.setdefault(normalize_phrase(phrase), len(phrase_ids))
+
+    phrases = {}
+    bias_words = []
+    for name, data in documents:
+        framework = data.get('framework') or os.path.splitext(os.path.basename(name))[0]
+        for code, standard in data['standards'].items():
+            keywords = standard.get('keywords', [])
+            metrics = standard.get('required_metrics', [])
+            standards[code] = {'title': standard['title'], 'keywords': keywords, 'required_metrics': metrics}
+            frameworks[code] = framework
+            phrases[code] = {
+                'keywords': [(keyword, phrase_id(keyword)) for keyword in keywords],
+                'metrics': [(metric, phrase_id(metric)) for metric in metrics]
+            }
+        bias_words += data.get('bias_words', [])
+    # Files may share bias words; keep the first spelling of each
+    seen = set()
+    bias_words = [word for word in bias_words
+                  if normalize_phrase(word) not in seen and not seen.add(normalize_phrase(word))]
+    bias_phrases = [(word, phrase_id(word)) for word in bias_words]
+    normalized = list(phrase_ids)
+
+    fingerprints = {code: _fingerprint([normalized[i] for _, i in entry['keywords'] + entry['metrics']])
+                    for code, entry in phrases.items()}
+    fingerprints[BIAS_CODE] = _fingerprint([normalized[i] for _, i in bias_phrases])
+    # Phrase tables are stored as ids next to the spellings in 'standards' and 'bias_words'
+    meta = {
+        'sources': [name for name, _ in documents],
+        'standards': standards,
+        'frameworks': frameworks,
+        'bias_words': bias_words,
+        'phrases': normalized,
+        'phrase_ids': {code: [[i for _, i in entry['keywords']], [i for _, i in entry['metrics']]]
+                       for code, entry in phrases.items()},
+        'bias_ids': [i for _, i in bias_phrases],
+        'fingerprints': fingerprints,
+        'fingerprint': _fingerprint([standards, bias_words])
+    }
+    return meta, NgramMatcher(normalized)
+
+
+class Catalog:
+    """
+    A loaded catalog:
+        standards          code -> {'title', 'keywords', 'required_metrics'} (as written)
+        frameworks         code -> framework name
+        bias_words         bias words (as written)
+        matcher            NgramMatcher over the normalized phrases
+        phrases            code -> {'keywords': [(keyword, phrase_id)], 'metrics': [(metric, phrase_id)]}
+        bias_phrases       [(bias_word, phrase_id)]
+        fingerprints       code (and BIAS_CODE) -> hash of the normalized phrases it is evaluated on
+        fingerprint        hash of the whole catalog (titles included)
+        artifact_path      mapped artifact (None when built in memory)
+    """
+
+    def __init__(self, meta, matcher, artifact_path=None):
+        self.sources = meta['sources']
+        self.standards = meta['standards']
+        self.frameworks = meta['frameworks']
+        self.bias_words = meta['bias_words']
+        self.matcher = matcher
+        self.phrases = {
+            code: {'keywords': list(zip(self.standards[code]['keywords'], keyword_ids)),
+                   'metrics': list(zip(self.standards[code]['required_metrics'], metric_ids))}
+            for code, (keyword_ids, metric_ids) in meta['phrase_ids'].items()
+        }
+        self.bias_phrases = list(zip(self.bias_words, meta['bias_ids']))
+        self.fingerprints = meta['fingerprints']
+        self.fingerprint = meta['fingerprint']
+        self.artifact_path = artifact_path
+
+
+def write_artifact(path, meta, matcher):
+    """Serialize a compiled catalog (written to a temp file and renamed into place)"""
+    vocabulary, arrays = matcher.compiled()
+    header = {'format': CATALOG_FORMAT, 'meta': meta, 'vocabulary': vocabulary, 'arrays': {}}
+    # Array offsets are relative to the (aligned) end of the header
+    offset = 0
+    for name, values in arrays.items():
+        header['arrays'][name] = [offset, len(values), values.dtype.str]
+        offset += -(-values.nbytes // ARRAY_ALIGN) * ARRAY_ALIGN
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = -(-(len(CATALOG_MAGIC) + 8 + len(encoded)) // ARRAY_ALIGN) * ARRAY_ALIGN
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(CATALOG_MAGIC + len(encoded).to_bytes(8, 'little') + encoded)
+        for name, values in arrays.items():
+            f.seek(data_start + header['arrays'][name][0])
+            f.write(np.ascontiguousarray(values).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path):
+    """Catalog over a memory-mapped artifact; the matcher arrays are read-only views of the mapping"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(CATALOG_MAGIC)] != CATALOG_MAGIC:
+        raise CatalogError(f"{path} is not a compiled standards catalog")
+    header_end = len(CATALOG_MAGIC) + 8
+    header_len = int.from_bytes(mapped[len(CATALOG_MAGIC):header_end], 'little')
+    header = json.loads(mapped[header_end:header_end + header_len])
+    if header['format'] != CATALOG_FORMAT:
+        raise CatalogError(f"{path} has format {header['format']}, expected {CATALOG_FORMAT}")
+    data_start = -(-(header_end + header_len) // ARRAY_ALIGN) * ARRAY_ALIGN
+    arrays = {name: np.frombuffer(mapped, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+              for name, (offset, count, dtype) in header['arrays'].items()}
+    meta = header['meta']
+    matcher = NgramMatcher.from_compiled(meta['phrases'], header['vocabulary'], arrays)
+    return Catalog(meta, matcher, artifact_path=path)
+
+
+def _read_files(paths):
+    """(path, raw bytes) for each catalog file"""
+    files = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                files.append((path, f.read()))
+        except OSError as e:
+            raise CatalogError(f"Can't read standards catalog {path}: {e}") from e
+    return files
+
+
+def _parse_files(files):
+    """(path, data) for each catalog file"""
+    documents = []
+    for path, raw in files:
+        try:
+            documents.append((path, json.loads(raw)))
+        except ValueError as e:
+            raise CatalogError(f"Standards catalog {path} is not valid JSON: {e}") from e
+    return documents
+
+
+def artifact_path(files, cache_dir=CATALOG_CACHE_DIR):
+    """Cache file for a set of catalog files: a hash of their names and contents"""
+    hasher = hashlib.sha256(CATALOG_MAGIC + str(CATALOG_FORMAT).encode() + sys.byteorder.encode())
+    for name, raw in files:
+        hasher.update(os.path.basename(name).encode() + b'\0' + hashlib.sha256(raw).digest())
+    return os.path.join(cache_dir, f"catalog-{hasher.hexdigest()[:24]}.bin")
+
+
+def load_catalog(spec=STANDARDS_CATALOG, cache_dir=CATALOG_CACHE_DIR):
+    """
+    The catalog to analyze against.
+
+    Args:
+        spec: STANDARDS_CATALOG-style list of files/directories (empty: built-in database)
+        cache_dir: Where compiled artifacts are kept
+
+    Returns:
+        Catalog, mapped from the cached artifact when the files haven't changed
+
+    Raises:
+        CatalogError: a file is missing, not JSON, or doesn't validate
+    """
+    if not spec:
+        # Small enough to build directly on every start
+        return Catalog(*compile_catalog([('GRI_STANDARDS_DATABASE.py', builtin_catalog())]))
+    paths = catalog_paths(spec)
+    if not paths:
+        raise CatalogError(f"No catalog files found in STANDARDS_CATALOG={spec}")
+    files = _read_files(paths)
+    path = artifact_path(files, cache_dir)
+    if os.path.exists(path):
+        try:
+            return read_artifact(path)
+        except (CatalogError, ValueError, KeyError, OSError) as e:
+            print(f"⚠️ Unreadable catalog artifact {path} ({e}), recompiling it")
+
+    started = time.perf_counter()
+    meta, matcher = compile_catalog(_parse_files(files))
+    try:
+        write_artifact(path, meta, matcher)
+    except OSError as e:
+        print(f"⚠️ Couldn't cache the compiled catalog ({e}), using it from memory")
+        return Catalog(meta, matcher)
+    print(f"📚 Compiled standards catalog ({len(meta['standards'])} standards, {len(meta['phrases'])} phrases) "
+          f"in {time.perf_counter() - started:.1f}s -> {path}")
+    return read_artifact(path)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='python -m standards_catalog',
+        description="Validate and compile standards catalog files (default: STANDARDS_CATALOG)."
+    )
+    parser.add_argument('paths', nargs='*', help='catalog JSON files or directories')
+    parser.add_argument('--export-builtin', metavar='FILE',
+                        help='write the built-in GRI database as a catalog file to start from')
+    args = parser.parse_args(argv)
+
+    if args.export_builtin:
+        with open(args.export_builtin, 'w', encoding='utf-8') as f:
+            json.dump(builtin_catalog(), f, indent=2)
+        print(f"✅ Wrote the built-in database to {args.export_builtin}")
+        return
+    spec = os.pathsep.join(args.paths) if args.paths else STANDARDS_CATALOG
+    try:
+        started = time.perf_counter()
+        catalog = load_catalog(spec)
+        seconds = time.perf_counter() - started
+    except CatalogError as e:
+        sys.exit(f"❌ {e}")
+    counts = {}
+    for framework in catalog.frameworks.values():
+        counts[framework] = counts.get(framework, 0) + 1
+    print(f"✅ {len(catalog.standards)} standards ({', '.join(f'{n} {f}' for f, n in counts.items())}), "
+          f"{len(catalog.matcher.phrases)} phrases, {len(catalog.bias_words)} bias words, "
+          f"loaded in {seconds * 1000:.1f} ms from {catalog.artifact_path or 'memory'}")
+
+
+if __name__ == '__main__':
+    main()
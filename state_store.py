@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Game State Store
+# Replaces the read-modify-write of game_state.json with SQLite in WAL mode.
+# Every selection runs inside one BEGIN IMMEDIATE transaction, so the preloader
+# threads, on-demand requests and other gunicorn workers can't lose or corrupt
+# each other's updates. game_state.json is only read once, to seed a new store.
+#
+# Reports rotate through a persisted shuffled deck plus a cursor: a pick reads one
+# deck row and writes the cursor (O(1) regardless of catalog size), and the deck is
+# reshuffled once it is exhausted. Report weights decide how many times a report
+# appears per deck, and are applied at the next reshuffle.
+
+GAME_STATE_DB = os.getenv("GAME_STATE_DB", "game_state.sqlite3")
+MAX_WEIGHT = 5   # a report appears at most this many times per deck
+
+
+class GameStateStore:
+    def __init__(self, db_path=GAME_STATE_DB, seed_file=None):
+        """
+        Args:
+            db_path: SQLite database file
+            seed_file: Legacy game_state.json imported when the store is first created
+        """
+        self.db_path = db_path
+        self._local = threading.local()     # one SQLite connection per thread
+        self._rng = random.Random()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with self.transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS deck (position INTEGER PRIMARY KEY, url TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS weights (url TEXT PRIMARY KEY, weight REAL NOT NULL)")
+            if seed_file and self._get(conn, 'seeded') is None:
+                self._seed(conn, seed_file)
+                self._set(conn, 'seeded', True)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        # New thread, or a worker forked from a --preload master
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Exclusive write transaction (blocks other writers in any process until done)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _get(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _seed(self, conn, seed_file):
+        try:
+            with open(seed_file, 'r') as f:
+                legacy = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        # Kept until the first deck is built, which puts these reports last
+        self._set(conn, 'legacy_used_pdfs', legacy.get('used_pdfs', []))
+        if legacy.get('all_pdfs'):
+            self._set(conn, 'all_pdfs', legacy['all_pdfs'])
+
+    # ----- deck -----
+
+    def _fingerprint(self, catalog):
+        """Catalog hash, recomputed on every pick so in-place edits to the list reshuffle the deck"""
+        return hashlib.sha256("\n".join(catalog).encode()).hexdigest()
+
+    def _copies(self, conn, urls):
+        """Deck entries for urls, each repeated according to its weight"""
+        weights = dict(conn.execute("SELECT url, weight FROM weights"))
+        deck = []
+        for url in urls:
+            deck.extend([url] * max(1, min(MAX_WEIGHT, round(weights.get(url, 1)))))
+        return deck
+
+    def _write_deck(self, conn, deck, fingerprint):
+        conn.execute("DELETE FROM deck")
+        conn.executemany("INSERT INTO deck (position, url) VALUES (?, ?)", list(enumerate(deck)))
+        self._set(conn, 'deck_size', len(deck))
+        self._set(conn, 'cursor', 0)
+        self._set(conn, 'deck_fingerprint', fingerprint)
+
+    def _spread(self, deck):
+        """Best-effort pass that moves repeated copies of a weighted report apart"""
+        for i in range(1, len(deck)):
+            if deck[i] != deck[i - 1]:
+                continue
+            for j in range(i + 1, len(deck)):
+                if deck[j] != deck[i - 1] and (j + 1 == len(deck) or deck[j + 1] != deck[i]):
+                    deck[i], deck[j] = deck[j], deck[i]
+                    break
+
+    def _reshuffle(self, conn, catalog, fingerprint, last_pick):
+        deck = self._copies(conn, catalog)
+        self._rng.shuffle(deck)
+        self._spread(deck)
+        # Don't serve the same report twice in a row across the deck boundary
+        if len(deck) > 1 and deck[0] == last_pick:
+            for i in range(1, len(deck)):
+                if deck[i] != last_pick:
+                    deck[0], deck[i] = deck[i], deck[0]
+                    break
+        self._write_deck(conn, deck, fingerprint)
+
+    def _reconcile(self, conn, catalog, fingerprint):
+        """
+        The catalog changed (or there is no deck yet): keep the rest of the current
+        deck for reports still in the catalog, shuffle newly added reports into it and
+        drop removed ones. On first build, reports the legacy state marked as used go last.
+        """
+        catalog_set = set(catalog)
+        rows = conn.execute("SELECT url FROM deck ORDER BY position").fetchall()
+        cursor = self._get(conn, 'cursor', 0)
+
+        if rows:
+            in_deck = {row[0] for row in rows}
+            remaining = [row[0] for row in rows[cursor:] if row[0] in catalog_set]
+            added = self._copies(conn, [url for url in catalog if url not in in_deck])
+            for url in added:
+                remaining.insert(self._rng.randint(0, len(remaining)), url)
+            deck = remaining
+        else:
+            legacy_used = set(self._get(conn, 'legacy_used_pdfs', []))
+            unused = self._copies(conn, [url for url in catalog if url not in legacy_used])
+            used = self._copies(conn, [url for url in catalog if url in legacy_used])
+            self._rng.shuffle(unused)
+            self._rng.shuffle(used)
+            deck = unused + used
+            conn.execute("DELETE FROM state WHERE key = 'legacy_used_pdfs'")
+
+        self._write_deck(conn, deck, fingerprint)
+        self._set(conn, 'all_pdfs', list(catalog))
+
+    def next_pdf(self, catalog):
+        """
+        Atomically take the next report off the deck.
+
+        Args:
+            catalog: All report URLs (reconciled with the stored deck when it changes)
+
+        Returns:
+            (selected_url, reset) where reset is True if the deck was just reshuffled
+        """
+        if not catalog:
+            raise ValueError("Report catalog is empty")
+        fingerprint = self._fingerprint(catalog)
+        with self.transaction() as conn:
+            if self._get(conn, 'deck_fingerprint') != fingerprint:
+                self._reconcile(conn, catalog, fingerprint)
+
+            cursor = self._get(conn, 'cursor', 0)
+            # If all PDFs used, reshuffle to allow replaying
+            reset = cursor >= self._get(conn, 'deck_size', 0)
+            if reset:
+                self._reshuffle(conn, catalog, fingerprint, self._get(conn, 'last_pick'))
+                cursor = 0
+
+            selected = conn.execute("SELECT url FROM deck WHERE position = ?", (cursor,)).fetchone()[0]
+            self._set(conn, 'cursor', cursor + 1)
+            self._set(conn, 'last_pick', selected)
+        return selected, reset
+
+    def ping(self):
+        """Raises if the state database can't be read"""
+        self._conn().execute("SELECT 1 FROM state LIMIT 1").fetchall()
+
+    def set_weight(self, url, weight):
+        """How many times per deck a report should come up (applied at the next reshuffle)"""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO weights (url, weight) VALUES (?, ?)", (url, float(weight))
+        )
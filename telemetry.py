@@ -0,0 +1,380 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Telemetry
+# In-process counters, gauges and histograms for every pipeline stage, rendered in
+# the Prometheus text exposition format for the /metrics endpoint. Hand-rolled to
+# avoid a dependency: the app only needs labelled series and cumulative buckets.
+# A scrape reaches whichever gunicorn worker takes the request, so under gunicorn
+# (see gunicorn.conf.py) each worker writes its series to TELEMETRY_DIR every
+# TELEMETRY_FLUSH_SECONDS and at scrape time, and /metrics renders the sum over all
+# of them: counters and histograms of every worker since the server started,
+# gauges of the workers still alive. Gauges read from shared state, like the pool
+# depth, are read once by the scraped worker. Other processes (the dev server,
+# batch runs) only ever render their own series.
+
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", ".telemetry")
+TELEMETRY_FLUSH_SECONDS = float(os.getenv("TELEMETRY_FLUSH_SECONDS", "5"))
+
+# Seconds, from a cache hit to a cold LLM call on a 300-page report
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _Metric:
+    kind = None
+    # Series of processes that exited still count (False: only live processes')
+    keeps_exited = True
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+        self.registry = registry if registry is not None else REGISTRY
+        self.registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        self.registry.ensure_flusher()
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        """This process's series as JSON-able [label values, value] pairs"""
+        with self._lock:
+            return [[list(key), self._copy(value)] for key, value in self._series.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def _add(total, value):
+        return total + value
+
+    def merged(self, snapshots):
+        """Series summed over several processes' snapshots"""
+        series = {}
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(key)
+                series[key] = self._add(series[key], value) if key in series else self._copy(value)
+        return series
+
+    def _samples(self, series):
+        """Yields (suffix, label_values, extra_labels, value)"""
+        raise NotImplementedError
+
+    def render(self, series=None):
+        """The metric's lines for the given series (default: this process's)"""
+        if series is None:
+            series = dict(self.snapshot_items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self._samples(series):
+            lines.append(f"{self.name}{suffix}{_label_text(self.labelnames, values, extra)} "
+                         f"{_format_value(value)}")
+        return "\n".join(lines)
+
+    def snapshot_items(self):
+        return [(tuple(key), value) for key, value in self.snapshot()]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def _samples(self, series):
+        for values, value in sorted(series.items()):
+            yield "_total", values, (), value
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    keeps_exited = False
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, shared=False):
+        """
+        Args:
+            shared: The value is the same in every process (read from shared state), so
+                    it is read by the scraped process only instead of summed
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self.shared = shared
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from function() at scrape or flush time instead"""
+        self._function = function
+
+    def snapshot(self):
+        if self._function is not None:
+            try:
+                return [[[], self._function()]]
+            except Exception:
+                return []    # a failing source shouldn't break the whole scrape
+        return super().snapshot()
+
+    def _samples(self, series):
+        for values, value in sorted(series.items()):
+            yield "", values, (), value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    @staticmethod
+    def _copy(value):
+        return dict(value, counts=list(value['counts']))
+
+    @staticmethod
+    def _add(total, value):
+        if len(value['counts']) == len(total['counts']):    # skip a process with other buckets
+            total['counts'] = [a + b for a, b in zip(total['counts'], value['counts'])]
+            total['sum'] += value['sum']
+            total['count'] += value['count']
+        return total
+
+    def _samples(self, series):
+        for values, s in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, s['counts']):
+                cumulative += count
+                yield "_bucket", values, (('le', _format_value(float(bound))),), cumulative
+            yield "_sum", values, (), s['sum']
+            yield "_count", values, (), s['count']
+
+
+class Registry:
+    def __init__(self, directory=None, flush_seconds=TELEMETRY_FLUSH_SECONDS):
+        """
+        Args:
+            directory: Where every process writes its series for the others to merge
+                       (None: render this process's series only; see share())
+        """
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._metrics = []
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def register(self, metric):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def _reset_after_fork(self):
+        # A forked worker starts from zero; what the parent recorded is in the parent's file
+        self._lock = threading.Lock()
+        for metric in self._metrics:
+            metric._lock = threading.Lock()
+            metric._series = {}
+
+    def ensure_flusher(self):
+        """Start this process's background flush once it records something (again after a fork)"""
+        if self.directory is None or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name='telemetry-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ Could not write telemetry: {e}")
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def flush(self):
+        """Write this process's series to the telemetry directory"""
+        with self._lock:
+            metrics = list(self._metrics)
+        data = {m.name: m.snapshot() for m in metrics if not getattr(m, 'shared', False)}
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._path(os.getpid()))
+
+    def share(self, directory=TELEMETRY_DIR):
+        """
+        Merge the series of every process that writes to `directory`, starting from
+        zero. Call once in the parent before the workers are forked.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(('.json', '.tmp')):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _process_snapshots(self):
+        """(pid, alive, {metric name: snapshot}) of every process that wrote its series"""
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                pid = int(name[:-len('.json')])
+                with open(os.path.join(self.directory, name)) as f:
+                    data = json.load(f)
+            except (ValueError, OSError):
+                continue    # replaced or removed while we read
+            snapshots.append((pid, pid == os.getpid() or _pid_alive(pid), data))
+        return snapshots
+
+    def render(self):
+        """All metrics in the Prometheus text format (version 0.0.4), summed over processes"""
+        with self._lock:
+            metrics = list(self._metrics)
+        if self.directory is None:
+            return "\n".join(metric.render() for metric in metrics) + "\n"
+        try:
+            processes = self._process_snapshots()
+        except OSError as e:
+            print(f"⚠️ Could not read telemetry of other workers ({e}), rendering this one only")
+            return "\n".join(metric.render() for metric in metrics) + "\n"
+        parts = []
+        for metric in metrics:
+            if getattr(metric, 'shared', False):
+                parts.append(metric.render())
+                continue
+            snapshots = [data.get(metric.name, []) for _, alive, data in processes
+                         if alive or metric.keeps_exited]
+            parts.append(metric.render(metric.merged(snapshots)))
+        return "\n".join(parts) + "\n"
+
+
+REGISTRY = Registry()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=REGISTRY._reset_after_fork)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ----- pipeline metrics -----
+
+STAGE_SECONDS = Histogram(
+    'susearch_stage_seconds', 'Wall time of each game generation stage', ['stage'])
+DOWNLOAD_BYTES = Counter(
+    'susearch_download_bytes', 'Report bytes downloaded (cache misses only)')
+DOWNLOAD_BYTES_PER_SECOND = Histogram(
+    'susearch_download_bytes_per_second', 'Throughput of each report download',
+    buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8))
+PDF_CACHE_REQUESTS = Counter(
+    'susearch_pdf_cache_requests', 'Report fetches by cache outcome', ['result'])
+ARTIFACT_REQUESTS = Counter(
+    'susearch_artifact_requests', 'Stored report artifact lookups by outcome', ['result'])
+RANGE_REQUESTS = Counter(
+    'susearch_range_requests', 'HTTP Range requests made for partially fetched reports')
+PAGES_EXTRACTED = Counter(
+    'susearch_pages_extracted', 'Report pages extracted to text')
+LLM_SECONDS = Histogram(
+    'susearch_llm_request_seconds', 'Latency of each Claude call', ['call'])
+PROMPT_CONTEXT_CHARS = Histogram(
+    'susearch_prompt_context_chars', 'Report text included in each Claude prompt', ['call'],
+    buckets=(500, 1000, 2000, 4000, 6000, 8000, 12000, 16000))
+LLM_TOKENS = Counter(
+    'susearch_llm_tokens', 'Tokens used by Claude calls', ['call', 'direction'])
+LLM_ERRORS = Counter(
+    'susearch_llm_errors', 'Claude calls that raised', ['call'])
+NEW_GAME_REQUESTS = Counter(
+    'susearch_new_game_requests', '/new-game requests by how the game was served', ['source'])
+GAMES_GENERATED = Counter(
+    'susearch_games_generated', 'Games generated by path taken', ['path'])
+POOL_DEPTH = Gauge(
+    'susearch_game_pool_depth', 'Preloaded games waiting in the shared pool', shared=True)
+PRELOAD_IN_FLIGHT = Gauge(
+    'susearch_preload_in_flight', 'Games this process is generating in the background')
+GENERATION_PEAK_RSS = Histogram(
+    'susearch_generation_peak_rss_bytes', 'Process RSS at its highest during each game generation',
+    buckets=tuple(mb * 1024 * 1024 for mb in (64, 128, 256, 384, 512, 768, 1024, 2048)))
+GENERATION_RSS_GROWTH = Histogram(
+    'susearch_generation_rss_growth_bytes', 'Peak RSS above the RSS at the start of each generation',
+    buckets=tuple(mb * 1024 * 1024 for mb in (1, 4, 16, 32, 64, 128, 256, 512)))
+PRELOAD_RESULTS = Counter(
+    'susearch_preload_results', 'Background generations by outcome', ['result'])
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,96 @@
+import random
+import re
+
+import pytest
+
+from bounded_memory import SpilledText, WhitespaceNormalizer
+from gri_matcher import GRI_MATCHER
+from pdf_text import join_pages
+from report_index import ReportIndex
+
+FILLER = ['the', 'company', 'reported', 'café', 'Straße', 'İstanbul', 'naïve', 'ÆØÅ', '日本語', 'énergie',
+          'emissionsreport', '2023', '35kwh', '%', '-', 'Ωmega', 'water-', 'best', 'in', 'class']
+SPACES = [' ', ' ', ' ', '  ', '\n', ' \n\t ', ' ', '  ']
+
+
+def make_text(rng, words=400):
+    """Filler with catalog phrases planted in it, whitespace runs inside and between them"""
+    phrases = GRI_MATCHER.phrases
+    parts = []
+    for _ in range(words):
+        if rng.random() < 0.2:
+            phrase = rng.choice(phrases)
+            word = rng.choice(SPACES).join(phrase.split(' '))
+            parts.append(word.upper() if rng.random() < 0.3 else word)
+        else:
+            parts.append(rng.choice(FILLER))
+        parts.append(rng.choice(SPACES))
+    return rng.choice(['', '  \n']) + ''.join(parts)
+
+
+def interesting_cuts(text):
+    """Offsets inside whitespace runs, inside phrase occurrences and around non-ASCII characters"""
+    cuts = set()
+    for match in re.finditer(r'\s{2,}', text):
+        cuts.update(range(match.start() + 1, match.end()))
+    lower = text.lower()
+    for phrase in GRI_MATCHER.phrases:
+        for match in re.finditer(re.escape(phrase.split(' ')[0]), lower):
+            cuts.add(match.start() + len(phrase.split(' ')[0]) // 2)
+            cuts.add(match.end())
+    for i, char in enumerate(text):
+        if not char.isascii():
+            cuts.update((i, i + 1))
+    return sorted(cut for cut in cuts if 0 < cut < len(text))
+
+
+def split_at(text, rng, count):
+    cuts = interesting_cuts(text)
+    chosen = sorted(set(rng.sample(cuts, min(count, len(cuts))) + [rng.randrange(1, len(text))]))
+    bounds = [0] + chosen + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def clean(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_whitespace_normalizer_matches_whole_text(seed):
+    rng = random.Random(seed)
+    text = make_text(rng)
+    normalizer = WhitespaceNormalizer()
+    assert ''.join(normalizer.feed(piece) for piece in split_at(text, rng, 60)) == clean(text)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_scan_from_matches_scan(seed):
+    rng = random.Random(seed)
+    lowered = clean(make_text(rng)).lower()
+    hits, state = [], None
+    for piece in split_at(lowered, rng, 80):
+        found, state = GRI_MATCHER.scan_from(piece, state)
+        hits.extend(found)
+    hits.extend(GRI_MATCHER.scan_from("", state, final=True)[0])
+    assert sorted(hits) == sorted(GRI_MATCHER.scan(lowered))
+    assert hits
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_spilled_text_matches_in_memory_path(seed):
+    rng = random.Random(seed)
+    pages = split_at(make_text(rng, words=800), rng, 40)
+    index = ReportIndex(clean(join_pages(pages)))
+    expected = GRI_MATCHER.first_hits(index)
+
+    # A budget of a few hundred bytes makes the spill move to disk mid-report
+    with SpilledText(GRI_MATCHER, prefix_chars=200, budget_bytes=512) as spilled:
+        for page in pages:
+            spilled.add_page(page)
+        assert spilled.spilled_to_disk
+        assert spilled.chars == len(index.text)
+        assert spilled.prefix == index.text[:200]
+        assert spilled.first_hits == expected
+        assert expected
+        for start, end in expected.values():
+            assert spilled.context(start, end) == index.context(start, end)
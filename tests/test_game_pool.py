@@ -0,0 +1,69 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from game_pool import GamePool
+
+
+def drain(db_path):
+    """Claims games until the pool is empty; returns their ids"""
+    pool = GamePool(db_path)
+    claimed = []
+    while True:
+        game = pool.claim()
+        if game is None:
+            return claimed
+        claimed.append(game['id'])
+
+
+def fill(db_path, count):
+    pool = GamePool(db_path)
+    for game_id in range(count):
+        pool.put({'id': game_id, 'words': ['CARBON', 'WATER']})
+
+
+def test_concurrent_claims_from_threads_are_unique(tmp_path):
+    db_path = str(tmp_path / 'pool.sqlite3')
+    fill(db_path, 200)
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        return drain(db_path)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = [future.result() for future in [executor.submit(worker) for _ in range(8)]]
+    claimed = [game_id for result in results for game_id in result]
+    assert sorted(claimed) == list(range(200))
+    assert GamePool(db_path).depth() == 0
+
+
+def test_concurrent_claims_from_processes_are_unique(tmp_path):
+    db_path = str(tmp_path / 'pool.sqlite3')
+    fill(db_path, 200)
+    with ProcessPoolExecutor(4) as executor:
+        results = list(executor.map(drain, [db_path] * 4))
+    claimed = [game_id for result in results for game_id in result]
+    assert sorted(claimed) == list(range(200))
+
+
+def test_claims_oldest_first(tmp_path):
+    db_path = str(tmp_path / 'pool.sqlite3')
+    fill(db_path, 5)
+    assert drain(db_path) == [0, 1, 2, 3, 4]
+
+
+def test_expired_games_are_skipped(tmp_path):
+    db_path = str(tmp_path / 'pool.sqlite3')
+    pool = GamePool(db_path, max_age=60)
+    fill(db_path, 4)
+    # Age the first two games past max_age
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE games SET created_at = ? WHERE id <= 2", (time.time() - 61,))
+
+    assert pool.depth() == 2
+    assert pool.claim()['id'] == 2
+    assert pool.expire() == 2
+    assert pool.claim()['id'] == 3
+    assert pool.claim() is None
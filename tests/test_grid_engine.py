@@ -0,0 +1,73 @@
+import random
+import string
+
+import pytest
+
+from grid_engine import GRID_SIZE, MAX_GRID_SIZE, GridPlacementError, build_grid
+
+
+def random_words(rng, count, min_len=3, max_len=8):
+    return [''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(min_len, max_len)))
+            for _ in range(count)]
+
+
+def spelled(grid, placement):
+    """The letters a placement covers, read off the grid"""
+    word, row, col, dr, dc = (placement[k] for k in ('word', 'row', 'col', 'dr', 'dc'))
+    return ''.join(grid[row + dr * i][col + dc * i] for i in range(len(word)))
+
+
+def covered_cells(placement):
+    row, col, dr, dc = (placement[k] for k in ('row', 'col', 'dr', 'dc'))
+    return {(row + dr * i, col + dc * i): letter for i, letter in enumerate(placement['word'])}
+
+
+def check_board(board, words):
+    size = board['gridSize']
+    assert len(board['grid']) == size
+    assert all(len(row) == size for row in board['grid'])
+    assert [p['word'] for p in board['placements']] == list(dict.fromkeys(w.upper() for w in words))
+
+    letters = {}
+    for placement in board['placements']:
+        assert spelled(board['grid'], placement) == placement['word']
+        # Words may cross only where they share the letter
+        for cell, letter in covered_cells(placement).items():
+            assert letters.setdefault(cell, letter) == letter
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_every_word_is_spelled_on_the_board(seed):
+    rng = random.Random(seed)
+    words = random_words(rng, rng.randint(1, 10))
+    check_board(build_grid(words, seed=seed), words)
+
+
+def test_overlapping_words_share_letters():
+    words = ['EMISSIONS', 'ENERGY', 'WATER', 'WASTE', 'SAFETY', 'GOVERNANCE', 'SCOPE', 'CARBON']
+    for seed in range(20):
+        check_board(build_grid(words, seed=seed), words)
+
+
+def test_same_seed_same_board():
+    words = ['CARBON', 'WATER', 'ENERGY', 'WASTE', 'SCOPE']
+    assert build_grid(words, seed=42) == build_grid(words, seed=42)
+    assert build_grid(words, seed=42)['seed'] == 42
+
+
+def test_grows_the_board_instead_of_dropping_words():
+    # 12 eight-letter words with no letters in common can't share cells: 96 > 64
+    rng = random.Random(7)
+    alphabet = list(string.ascii_uppercase)
+    words = []
+    for _ in range(12):
+        rng.shuffle(alphabet)
+        words.append(''.join(alphabet[:8]))
+    board = build_grid(words, seed=1)
+    assert GRID_SIZE < board['gridSize'] <= MAX_GRID_SIZE
+    check_board(board, words)
+
+
+def test_word_longer_than_the_largest_board():
+    with pytest.raises(GridPlacementError):
+        build_grid(['A' * (MAX_GRID_SIZE + 1)], seed=0)
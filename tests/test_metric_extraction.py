@@ -0,0 +1,15 @@
+from metric_extraction import extract_metric_table
+from pdfile import PDFScraper
+
+
+def test_figures_without_kept_sentences():
+    # Too short to be kept as a sentence by the report index
+    table = extract_metric_table("We used 50 tons.")
+    assert table['value'].tolist() == [50.0]
+    assert table['sentence'].tolist() == [-1]
+
+
+def test_scraper_metric_table_on_short_text():
+    table = PDFScraper().extract_metric_table("Energy: 50 kWh")
+    assert table['sentence'].tolist() == [-1]
+    assert table['value'].tolist() == [50 * 0.0036]
@@ -0,0 +1,93 @@
+import os
+import sys
+
+import pytest
+import requests
+
+from pdf_cache import PDFCache, file_sha256
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from fixtures import ReportServer, synthetic_report_pdf  # noqa: E402
+
+
+@pytest.fixture
+def reports():
+    return {f'report-{seed}.pdf': synthetic_report_pdf(4, seed=seed) for seed in range(3)}
+
+
+def read(result):
+    with open(result['path'], 'rb') as f:
+        return f.read()
+
+
+def test_fresh_copy_needs_no_request(tmp_path, reports):
+    cache = PDFCache(str(tmp_path), fresh_seconds=3600)
+    with ReportServer(reports) as server:
+        first = cache.fetch(f'{server.url}/report-0.pdf')
+        second = cache.fetch(f'{server.url}/report-0.pdf')
+        assert server.requests == 1
+    assert read(first) == read(second) == reports['report-0.pdf']
+    assert first['sha256'] == file_sha256(first['path'])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_revalidation_with_304(tmp_path, reports):
+    cache = PDFCache(str(tmp_path), fresh_seconds=0)
+    with ReportServer(reports) as server:
+        url = f'{server.url}/report-0.pdf'
+        first = cache.fetch(url)
+        sent = server.bytes_sent
+        assert cache.fetch(url) == first
+        assert server.requests == 2
+        assert server.bytes_sent == sent    # 304: no body
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # New content behind the same URL replaces the old blob
+        server.files['report-0.pdf'] = reports['report-1.pdf']
+        changed = cache.fetch(url)
+        assert read(changed) == reports['report-1.pdf']
+        assert not os.path.exists(first['path'])
+        assert cache.stats()['blobs'] == 1
+
+
+def test_lru_eviction_against_byte_budget(tmp_path, reports):
+    sizes = [len(body) for body in reports.values()]
+    # Room for two reports, not three
+    cache = PDFCache(str(tmp_path), max_bytes=sum(sizes) - min(sizes) // 2, fresh_seconds=3600)
+    with ReportServer(reports) as server:
+        urls = [f'{server.url}/report-{seed}.pdf' for seed in range(3)]
+        cache.fetch(urls[0])
+        cache.fetch(urls[1])
+        cache.fetch(urls[0])     # report-1 is now least recently used
+        cache.fetch(urls[2])
+        assert [cache.contains(url) for url in urls] == [True, False, True]
+        stats = cache.stats()
+        assert stats['bytes'] <= stats['max_bytes']
+        assert stats['blobs'] == 2
+
+        # The evicted report is downloaded again
+        requests_before = server.requests
+        assert read(cache.fetch(urls[1])) == reports['report-1.pdf']
+        assert server.requests == requests_before + 1
+
+
+def test_serves_disk_copy_when_the_host_is_down(tmp_path, reports):
+    cache = PDFCache(str(tmp_path), fresh_seconds=0)
+    with ReportServer(reports) as server:
+        url = f'{server.url}/report-0.pdf'
+        first = cache.fetch(url)
+    # Server shut down: revalidation fails, the stored copy is served
+    assert cache.fetch(url, timeout=2) == first
+    assert read(first) == reports['report-0.pdf']
+    with pytest.raises(requests.RequestException):
+        cache.fetch(f'{server.url}/report-1.pdf', timeout=2)
+
+
+def test_local_files_share_the_store(tmp_path, reports):
+    cache = PDFCache(str(tmp_path / 'cache'))
+    path = tmp_path / 'report.pdf'
+    path.write_bytes(reports['report-2.pdf'])
+    local = cache.get_local(str(path))
+    assert read(local) == reports['report-2.pdf']
+    assert cache.get_local(str(path)) == local
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,80 @@
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from state_store import GameStateStore
+
+CATALOG = [f"https://example.com/report-{i}.pdf" for i in range(10)]
+
+
+def pick(db_path, count, catalog=CATALOG):
+    store = GameStateStore(db_path)
+    return [store.next_pdf(catalog) for _ in range(count)]
+
+
+def check_decks(picks, catalog=CATALOG):
+    """30 picks from a 10-report catalog: three full decks, two reshuffles"""
+    counts = Counter(url for url, _ in picks)
+    assert counts == {url: len(picks) // len(catalog) for url in catalog}
+    assert sum(reset for _, reset in picks) == len(picks) // len(catalog) - 1
+
+
+def test_concurrent_picks_from_threads(tmp_path):
+    db_path = str(tmp_path / 'state.sqlite3')
+    GameStateStore(db_path)
+    start = threading.Barrier(6)
+
+    def worker():
+        start.wait()
+        return pick(db_path, 5)
+
+    with ThreadPoolExecutor(6) as executor:
+        results = [future.result() for future in [executor.submit(worker) for _ in range(6)]]
+    check_decks([p for result in results for p in result])
+
+
+def test_concurrent_picks_from_processes(tmp_path):
+    db_path = str(tmp_path / 'state.sqlite3')
+    GameStateStore(db_path)
+    with ProcessPoolExecutor(3) as executor:
+        results = list(executor.map(pick, [db_path] * 3, [10] * 3))
+    check_decks([p for result in results for p in result])
+
+
+def test_deck_exhaustion_reshuffles(tmp_path):
+    picks = pick(str(tmp_path / 'state.sqlite3'), 40)
+    for deck_no in range(4):
+        deck = picks[deck_no * 10:(deck_no + 1) * 10]
+        assert sorted(url for url, _ in deck) == CATALOG
+        assert [reset for _, reset in deck] == [deck_no > 0] + [False] * 9
+    # The same report is never served twice in a row across a reshuffle
+    assert all(a[0] != b[0] for a, b in zip(picks, picks[1:]))
+
+
+def test_catalog_change_keeps_the_deck(tmp_path):
+    store = GameStateStore(str(tmp_path / 'state.sqlite3'))
+    catalog = list(CATALOG)
+    picked = [store.next_pdf(catalog)[0] for _ in range(4)]
+    unpicked = [url for url in CATALOG if url not in picked]
+    # Edited in place with the same length: the removed report must not come up
+    catalog[catalog.index(unpicked[0])] = 'https://example.com/new.pdf'
+    rest = [store.next_pdf(catalog) for _ in range(6)]
+    assert not any(reset for _, reset in rest)
+    assert sorted(url for url, _ in rest) == sorted(unpicked[1:] + ['https://example.com/new.pdf'])
+    assert store.next_pdf(catalog)[1]
+
+
+def test_seeded_reports_go_last(tmp_path):
+    seed_file = tmp_path / 'game_state.json'
+    seed_file.write_text(json.dumps({'used_pdfs': CATALOG[:7], 'all_pdfs': CATALOG}))
+    store = GameStateStore(str(tmp_path / 'state.sqlite3'), seed_file=str(seed_file))
+    picks = [store.next_pdf(CATALOG)[0] for _ in range(10)]
+    assert sorted(picks[:3]) == CATALOG[7:]
+
+
+def test_empty_catalog(tmp_path):
+    with pytest.raises(ValueError):
+        GameStateStore(str(tmp_path / 'state.sqlite3')).next_pdf([])
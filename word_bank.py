@@ -0,0 +1,154 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+# Word Bank
+# One LLM call per report produces a large pool of word/clue pairs tagged with the
+# GRI code they relate to and whether that standard is missing, misleading or
+# compliant. Pools are persisted in SQLite and each game samples a handful of pairs
+# locally, so once a report's bank is warm a new game needs no LLM call at all.
+
+WORD_BANK_DB = os.getenv("WORD_BANK_DB", "word_bank.sqlite3")
+WORD_BANK_SIZE = int(os.getenv("WORD_BANK_SIZE", "40"))                       # pairs per report
+WORD_BANK_MAX_AGE = int(os.getenv("WORD_BANK_MAX_AGE", str(30 * 24 * 3600)))  # seconds
+# Below this many pairs a bank can't give varied games, so it gets regenerated
+WORD_BANK_MIN_SIZE = int(os.getenv("WORD_BANK_MIN_SIZE", "15"))
+
+STATUSES = ['missing', 'misleading', 'compliant', 'general']
+
+
+class WordBank:
+    def __init__(self, db_path=WORD_BANK_DB, max_age=WORD_BANK_MAX_AGE, min_size=WORD_BANK_MIN_SIZE):
+        self.db_path = db_path
+        self.max_age = max_age
+        self.min_size = min_size
+        self._local = threading.local()     # one SQLite connection per thread
+        self._rng = random.Random()
+        self._rng_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                source TEXT PRIMARY KEY,
+                company_name TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                source TEXT NOT NULL,
+                word TEXT NOT NULL,
+                clue TEXT NOT NULL,
+                gri_code TEXT NOT NULL,
+                status TEXT NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (source, word)
+            )
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        # Reopen after a fork: SQLite connections must not cross processes
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def put(self, source, company_name, entries):
+        """
+        Replace the bank for a report.
+
+        Args:
+            source: Report URL or path
+            company_name: Company the report belongs to
+            entries: List of dicts with 'word', 'clue', 'gri_code' and 'status'
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries WHERE source = ?", (source,))
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (source, company_name, created_at) VALUES (?, ?, ?)",
+                (source, company_name, time.time())
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO entries (source, word, clue, gri_code, status) VALUES (?, ?, ?, ?, ?)",
+                [(source, e['word'], e['clue'], e.get('gri_code') or '',
+                  e.get('status') if e.get('status') in STATUSES else 'general') for e in entries]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, source):
+        """The report's bank as {'company_name', 'entries'}, or None if missing, stale or too small"""
+        conn = self._conn()
+        report = conn.execute(
+            "SELECT company_name, created_at FROM reports WHERE source = ?", (source,)
+        ).fetchone()
+        if not report or time.time() - report[1] > self.max_age:
+            return None
+        rows = conn.execute(
+            "SELECT word, clue, gri_code, status, uses FROM entries WHERE source = ?", (source,)
+        ).fetchall()
+        if len(rows) < self.min_size:
+            return None
+        return {
+            'company_name': report[0],
+            'entries': [
+                {'word': r[0], 'clue': r[1], 'gri_code': r[2], 'status': r[3], 'uses': r[4]}
+                for r in rows
+            ]
+        }
+
+    def sample(self, source, count=5):
+        """
+        Pick `count` pairs for one game, or None if the report has no usable bank.
+
+        Least-used pairs go first, then the pick rotates across statuses and avoids
+        repeating a GRI code, so each game covers different findings.
+
+        Returns:
+            (company_name, words, clues)
+        """
+        bank = self.get(source)
+        if not bank:
+            return None
+
+        entries = bank['entries']
+        with self._rng_lock:
+            self._rng.shuffle(entries)
+        entries.sort(key=lambda e: e['uses'])   # stable: shuffled order within equal use counts
+
+        chosen = []
+        used_codes = set()
+        # Pass 1: round-robin over statuses, one pair per GRI code
+        # Pass 2: fill any remaining slots regardless of code
+        for allow_repeat_code in (False, True):
+            by_status = {status: [e for e in entries if e['status'] == status and e not in chosen]
+                         for status in STATUSES}
+            while len(chosen) < count and any(by_status.values()):
+                for status in STATUSES:
+                    candidates = by_status[status]
+                    while candidates:
+                        entry = candidates.pop(0)
+                        code = entry['gri_code']
+                        if allow_repeat_code or not code or code not in used_codes:
+                            chosen.append(entry)
+                            used_codes.add(code)
+                            break
+                    if len(chosen) == count:
+                        break
+
+        conn = self._conn()
+        conn.executemany(
+            "UPDATE entries SET uses = uses + 1 WHERE source = ? AND word = ?",
+            [(source, e['word']) for e in chosen]
+        )
+        return bank['company_name'], [e['word'] for e in chosen], [e['clue'] for e in chosen]